@@ -0,0 +1,176 @@
+"""Corpus sintético e determinístico de currículos (TXT, DOCX e PDF) e descrições de vagas"""
+import random
+import textwrap
+import zipfile
+from io import BytesIO
+from typing import Dict, List
+
+import docx
+
+NOMES = ['Ana Souza', 'Bruno Lima', 'Carla Mendes', 'Diego Alves', 'Elisa Rocha', 'Felipe Costa',
+         'Gabriela Nunes', 'Henrique Dias', 'Isabela Ramos', 'João Pereira', 'Larissa Melo', 'Marcos Teixeira']
+CIDADES = ['São Paulo - SP', 'Belo Horizonte - MG', 'Recife - PE', 'Curitiba - PR', 'Porto Alegre - RS',
+           'Florianópolis - SC', 'Salvador - BA', 'Fortaleza - CE']
+EMPRESAS = ['Banco Horizonte', 'Loja Digital S.A.', 'Agro Sistemas', 'Saúde Mais', 'Logística Express',
+            'Fintech Aurora', 'Educa Online', 'Telecom Brasil', 'Varejo Nacional', 'Energia Verde']
+CARGOS = ['Desenvolvedor Backend', 'Desenvolvedor Frontend', 'Desenvolvedor Full Stack', 'Analista de Dados',
+          'Engenheiro de Dados', 'Analista de Sistemas', 'Engenheiro DevOps', 'Desenvolvedor Mobile',
+          'Coordenador de Tecnologia', 'Gerente de Projetos']
+NIVEIS = ['junior', 'pleno', 'senior', 'tech lead', 'estagiário', 'especialista']
+SKILLS = ['python', 'javascript', 'java', 'typescript', 'go', 'php', 'c#', 'kotlin', 'react', 'angular',
+          'vue', 'node.js', 'django', 'flask', 'spring', 'express', 'mysql', 'postgresql', 'mongodb', 'redis',
+          'aws', 'azure', 'docker', 'kubernetes', 'jenkins', 'terraform', 'pandas', 'numpy', 'tensorflow',
+          'power bi', 'react native', 'flutter', 'git', 'jira', 'linux', 'scrum', 'kanban', 'devops']
+FORMACOES = ['Bacharelado em Ciência da Computação', 'Graduação em Sistemas de Informação',
+             'Pós-graduação em Engenharia de Software', 'MBA em Gestão de Projetos', 'Técnico em Informática',
+             'Mestrado em Inteligência Artificial', 'Tecnólogo em Análise e Desenvolvimento de Sistemas']
+ATIVIDADES = [
+    'Desenvolvi APIs REST utilizadas por milhões de clientes, com foco em desempenho e observabilidade.',
+    'Trabalhei na migração de sistemas legados para a nuvem, reduzindo custos de infraestrutura.',
+    'Participei da definição de arquitetura de microsserviços e da revisão de código do time.',
+    'Implementei pipelines de integração contínua e entrega contínua com testes automatizados.',
+    'Criei painéis de indicadores para as áreas de negócio e automatizei relatórios diários.',
+    'Atuei com levantamento de requisitos junto aos clientes e priorização do backlog.',
+    'Otimizei consultas ao banco de dados, diminuindo o tempo de resposta das telas principais.',
+    'Mentorei desenvolvedores iniciantes e conduzi treinamentos internos sobre boas práticas.',
+    'Liderei a equipe responsável pelo aplicativo mobile, com publicações quinzenais nas lojas.',
+    'Modelei processos de dados e mantive rotinas de carga e limpeza de grandes volumes.'
+]
+
+# Tamanho do currículo: (experiências, atividades por experiência)
+TAMANHOS = {'curto': (1, 2), 'medio': (3, 4), 'longo': (8, 9), 'muito_longo': (20, 10)}
+# Densidade de skills: quantas skills da lista aparecem
+DENSIDADES = {'baixa': 3, 'media': 8, 'alta': 18}
+FORMATOS = ('txt', 'docx', 'pdf')
+
+
+def resume_text(rng: random.Random, tamanho: str, densidade: str) -> str:
+    """Texto de um currículo com o tamanho e a densidade de skills pedidos"""
+    experiencias, atividades = TAMANHOS[tamanho]
+    skills = rng.sample(SKILLS, DENSIDADES[densidade])
+    nome = rng.choice(NOMES)
+    cargo = rng.choice(CARGOS)
+
+    linhas = [
+        nome.upper(),
+        f'{cargo} {rng.choice(NIVEIS)} | {rng.choice(CIDADES)}',
+        f'E-mail: {nome.split()[0].lower()}@exemplo.com.br | Telefone: (11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+        '',
+        'RESUMO PROFISSIONAL',
+        f'Profissional com {rng.randint(1, 15)} anos de experiência em tecnologia, atuando com '
+        f'{", ".join(skills[:3])}. Busco desafios em times ágeis e produtos de grande escala.',
+        '',
+        'EXPERIÊNCIA PROFISSIONAL'
+    ]
+    ano = 2024
+    for _ in range(experiencias):
+        inicio = ano - rng.randint(1, 4)
+        fim = 'atual' if ano == 2024 else str(ano)
+        linhas.append(f'{rng.choice(CARGOS)} - {rng.choice(EMPRESAS)} ({inicio} - {fim})')
+        for _ in range(atividades):
+            linhas.append(f'- {rng.choice(ATIVIDADES)}')
+        linhas.append(f'Tecnologias: {", ".join(rng.sample(skills, min(len(skills), rng.randint(2, 5))))}')
+        linhas.append('')
+        ano = inicio
+
+    linhas += ['FORMAÇÃO ACADÊMICA', rng.choice(FORMACOES), '', 'HABILIDADES TÉCNICAS', ', '.join(skills), '',
+               'IDIOMAS', 'Inglês avançado, espanhol intermediário']
+    return '\n'.join(linhas)
+
+
+def job_description(rng: random.Random) -> str:
+    cargo = rng.choice(CARGOS)
+    skills = rng.sample(SKILLS, rng.randint(3, 8))
+    return (
+        f'Vaga: {cargo} {rng.choice(NIVEIS)}\n'
+        f'Procuramos profissional com experiência em {", ".join(skills[:-1])} e {skills[-1]}. '
+        f'Desejável vivência com metodologias ágeis, comunicação clara e foco em qualidade. '
+        f'Local: {rng.choice(CIDADES)}, modelo híbrido.'
+    )
+
+
+def to_docx(text: str) -> bytes:
+    document = docx.Document()
+    for linha in text.split('\n'):
+        document.add_paragraph(linha)
+    buffer = BytesIO()
+    document.save(buffer)
+
+    # O zip grava a hora atual em cada entrada; data fixa deixa os bytes reprodutíveis
+    saida = BytesIO()
+    with zipfile.ZipFile(buffer) as origem, zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as destino:
+        for item in origem.infolist():
+            entrada = zipfile.ZipInfo(item.filename, date_time=(2024, 1, 1, 0, 0, 0))
+            entrada.compress_type = zipfile.ZIP_DEFLATED
+            destino.writestr(entrada, origem.read(item))
+    return saida.getvalue()
+
+
+def to_pdf(text: str, lines_per_page: int = 45) -> bytes:
+    """PDF mínimo (Helvetica, WinAnsi) com o texto quebrado em várias páginas"""
+    linhas = []
+    for linha in text.split('\n'):
+        linhas.extend(textwrap.wrap(linha, 90) or [''])
+    paginas = [linhas[i:i + lines_per_page] for i in range(0, len(linhas), lines_per_page)] or [[]]
+
+    def escape(linha: str) -> bytes:
+        encoded = linha.encode('cp1252', errors='replace')
+        return encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+    objetos = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>']
+    paginas_ids = []
+    for pagina in paginas:
+        stream = b'BT /F1 10 Tf 14 TL 50 800 Td ' + b''.join(b'(' + escape(linha) + b") '\n" for linha in pagina) + b'ET'
+        objetos.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objetos.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> '
+            b'/Contents %d 0 R >>' % len(objetos)
+        )
+        paginas_ids.append(len(objetos))
+    objetos[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % i for i in paginas_ids), len(paginas_ids))
+
+    saida = BytesIO()
+    saida.write(b'%PDF-1.4\n')
+    offsets = []
+    for numero, objeto in enumerate(objetos, start=1):
+        offsets.append(saida.tell())
+        saida.write(b'%d 0 obj\n' % numero + objeto + b'\nendobj\n')
+    xref = saida.tell()
+    saida.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1))
+    for offset in offsets:
+        saida.write(b'%010d 00000 n \n' % offset)
+    saida.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objetos) + 1, xref))
+    return saida.getvalue()
+
+
+def generate_corpus(seed: int = 42, per_combination: int = 2) -> List[Dict]:
+    """Currículos para cada combinação de formato, tamanho e densidade; mesmo seed, mesmos bytes"""
+    rng = random.Random(seed)
+    corpus = []
+    for formato in FORMATOS:
+        for tamanho in TAMANHOS:
+            for densidade in DENSIDADES:
+                for indice in range(per_combination):
+                    text = resume_text(rng, tamanho, densidade)
+                    if formato == 'txt':
+                        content = text.encode('utf-8')
+                    elif formato == 'docx':
+                        content = to_docx(text)
+                    else:
+                        content = to_pdf(text)
+                    corpus.append({
+                        'filename': f'curriculo_{tamanho}_{densidade}_{indice}.{formato}',
+                        'format': formato,
+                        'size': tamanho,
+                        'density': densidade,
+                        'text': text,
+                        'content': content
+                    })
+    return corpus
+
+
+def generate_job_descriptions(seed: int = 42, count: int = 5) -> List[str]:
+    rng = random.Random(seed + 1)
+    return [job_description(rng) for _ in range(count)]
@@ -0,0 +1,290 @@
+"""Benchmarks do analisador e dos endpoints sobre o corpus sintético.
+
+Uso (a partir de selecionei-backend/):
+    python -m benchmarks.run                          # imprime o resultado em JSON
+    python -m benchmarks.run --output resultado.json
+    python -m benchmarks.run --save-baseline          # grava benchmarks/baseline.json
+    python -m benchmarks.run --compare                # compara com benchmarks/baseline.json
+    python -m benchmarks.run --quick                  # corpus e tabelas menores
+
+Com --compare, o processo termina com código 1 se alguma medida ficar mais lenta
+que a baseline além de --threshold.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import generate_corpus, generate_job_descriptions
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Diferenças absolutas menores que isso (ms) são ruído, mesmo que a razão seja grande
+MIN_REGRESSION_MS = 0.05
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Estatísticas em milissegundos de uma lista de tempos em segundos"""
+    ms = sorted(sample * 1000 for sample in samples)
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 4),
+        'median_ms': round(statistics.median(ms), 4),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 4),
+        'min_ms': round(ms[0], 4)
+    }
+
+
+def timed(fn: Callable, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def by_size(corpus: List[Dict], formato: str) -> Dict[str, List[Dict]]:
+    grupos = {}
+    for item in corpus:
+        if item['format'] == formato:
+            grupos.setdefault(item['size'], []).append(item)
+    return grupos
+
+
+def bench_analyzer(corpus: List[Dict], jobs: List[str], repeat: int) -> Dict:
+    """Cada etapa do IntelligentResumeAnalyzer, por tamanho de currículo"""
+    from src.ai_analyzer import ResumeDocument, get_analyzer
+
+    analyzer = get_analyzer()
+    compiled_jobs = [analyzer.compile_job_description(job) for job in jobs]
+    results = {}
+
+    for size, items in by_size(corpus, 'txt').items():
+        samples = {}
+
+        def add(stage, elapsed):
+            samples.setdefault(stage, []).append(elapsed)
+
+        for _ in range(repeat):
+            for item in items:
+                text = item['text']
+                add('document', timed(lambda: ResumeDocument(text).token_counts))
+
+                # Documento já tokenizado: cada etapa mede só o próprio trabalho
+                document = ResumeDocument(text)
+                document.token_counts
+                add('extract_skills', timed(analyzer.extract_skills, document))
+                add('experience_years', timed(analyzer.calculate_experience_years, document))
+                years = analyzer.calculate_experience_years(document)
+                add('seniority', timed(analyzer.determine_seniority, document, years))
+                add('education', timed(analyzer.extract_education, document))
+                skills = analyzer.extract_skills(document)
+                for job in compiled_jobs:
+                    add('job_compatibility', timed(analyzer.calculate_job_compatibility, document, job, skills))
+                education = analyzer.extract_education(document)
+                add('overall_score', timed(analyzer.calculate_overall_score, skills, years, education,
+                                           analyzer.determine_seniority(document, years)))
+                add('analyze_resume', timed(analyzer.analyze_resume, item['content'], item['filename'], jobs[0]))
+                add('avaliar_curriculo', timed(analyzer.avaliar_curriculo_com_parecer, text))
+
+        for stage, values in samples.items():
+            results[f'analyzer.{stage}.{size}'] = summarize(values)
+
+    descricoes = []
+    for _ in range(repeat):
+        for job in jobs:
+            descricoes.append(timed(analyzer.compile_job_description, job))
+    results['analyzer.compile_job_description'] = summarize(descricoes)
+    return results
+
+
+def bench_extraction(corpus: List[Dict], repeat: int) -> Dict:
+    """extract_text_from_file por formato e tamanho"""
+    from src.ai_analyzer import get_analyzer
+
+    analyzer = get_analyzer()
+    results = {}
+    for formato in ('txt', 'docx', 'pdf'):
+        for size, items in by_size(corpus, formato).items():
+            samples = [
+                timed(analyzer.extract_text_from_file, item['content'], item['filename'])
+                for _ in range(repeat) for item in items
+            ]
+            results[f'extract.{formato}.{size}'] = summarize(samples)
+    return results
+
+
+def bench_endpoints(corpus: List[Dict], jobs: List[str], history_sizes: List[int]) -> Dict:
+    """/api/analyze de ponta a ponta e os endpoints de histórico com tabelas de vários tamanhos"""
+    from src.main import app, db, init_database, User, Analysis, AnalysisSkill, Payment, get_extraction_pool
+
+    init_database()
+    client = app.test_client()
+    results = {}
+
+    with app.app_context():
+        user = User(name='Benchmark', email='benchmark@exemplo.com.br', company='Benchmark',
+                    plan='enterprise', analyses_limit=10 ** 9)
+        user.set_password('benchmark')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    def analyze(item, job_description=''):
+        response = client.post('/api/analyze', data={
+            'user_id': str(user_id),
+            'job_description': job_description,
+            'file': (io.BytesIO(item['content']), item['filename'])
+        })
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    # Primeira chamada sobe os processos de extração; fica fora da medida
+    analyze(corpus[0])
+
+    for formato in ('txt', 'docx', 'pdf'):
+        items = [item for item in corpus if item['format'] == formato]
+        # Cada arquivo é analisado uma vez só, para não medir o cache de análises
+        results[f'endpoint.analyze.{formato}'] = summarize([timed(analyze, item, jobs[0]) for item in items[1:]])
+    results['endpoint.analyze.cached'] = summarize([timed(analyze, corpus[1], jobs[0]) for _ in range(20)])
+
+    template = {
+        'file_type': '.txt', 'score': 80, 'experience_years': 5, 'seniority_level': 'Pleno',
+        'education_level': 'Ensino Superior', 'job_compatibility': 75,
+        'skills_found': json.dumps(['Python', 'Aws', 'Docker']), 'strengths': json.dumps(['Python']),
+        'interview_questions': json.dumps(['Pergunta?']), 'summary': 'Resumo ' * 50,
+        'recommendation': 'Recomendado', 'processing_time': 0.1
+    }
+    created = 0
+    for size in sorted(history_sizes):
+        with app.app_context():
+            owner = db.session.get(User, user_id)
+            start_id = (db.session.query(db.func.max(Analysis.id)).scalar() or 0) + 1
+            base = datetime.datetime(2024, 1, 1)
+            rows = [
+                dict(template, id=start_id + i, user_id=owner.id, filename=f'historico_{created + i}.txt',
+                     created_at=base + datetime.timedelta(minutes=created + i))
+                for i in range(size - created)
+            ]
+            db.session.execute(Analysis.__table__.insert(), rows)
+            db.session.execute(AnalysisSkill.__table__.insert(), [
+                {'analysis_id': row['id'], 'skill': skill, 'category': 'programming', 'user_id': owner.id}
+                for row in rows for skill in ('Python', 'Aws', 'Docker')[:1 + row['id'] % 3]
+            ])
+            db.session.execute(Payment.__table__.insert(), [
+                {'user_id': owner.id, 'plan': 'starter', 'amount': 97.0, 'status': 'approved',
+                 'created_at': base + datetime.timedelta(minutes=created + i)}
+                for i in range((size - created) // 10)
+            ])
+            db.session.commit()
+            created = size
+
+        first_page = client.get(f'/api/user/{user_id}/analyses?limit=50').get_json()
+        cursor = first_page['next_cursor']
+        endpoints = {
+            'analyses': f'/api/user/{user_id}/analyses?limit=50',
+            'analyses_fields': f'/api/user/{user_id}/analyses?limit=50&fields=id,filename,score,created_at',
+            'analyses_next_page': f'/api/user/{user_id}/analyses?limit=50&cursor={cursor}',
+            'analyses_skill_filter': f'/api/user/{user_id}/analyses?limit=50&skill=python&skill=aws',
+            'payments': f'/api/user/{user_id}/payments?limit=50',
+            'top_skills': f'/api/user/{user_id}/skills',
+            'search': f'/api/candidates/search?user_id={user_id}&skills=python AND (aws OR docker)',
+            'stats': '/api/stats'
+        }
+        for name, url in endpoints.items():
+            client.get(url)
+            results[f'endpoint.history.{name}.{size}'] = summarize([timed(client.get, url) for _ in range(20)])
+
+    get_extraction_pool().close()
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Medidas presentes nas duas execuções cuja mediana piorou além do limite"""
+    regressions = []
+    for name, result in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+        delta = result['median_ms'] - base['median_ms']
+        status = 'REGRESSÃO' if ratio > 1 + threshold and delta > MIN_REGRESSION_MS else ''
+        print(f'{name:55s} {base["median_ms"]:10.3f} -> {result["median_ms"]:10.3f} ms  x{ratio:5.2f} {status}',
+              file=sys.stderr)
+        if status:
+            regressions.append({'name': name, 'baseline_ms': base['median_ms'],
+                                'current_ms': result['median_ms'], 'ratio': round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do analisador e dos endpoints')
+    parser.add_argument('--output', help='Arquivo JSON de saída (padrão: stdout)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Grava o resultado como baseline')
+    parser.add_argument('--compare', action='store_true', help='Compara com a baseline e falha em regressões')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Piora relativa tolerada (0.2 = 20%%)')
+    parser.add_argument('--quick', action='store_true', help='Corpus e tabelas menores')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip', action='append', default=[], choices=['analyzer', 'extraction', 'endpoints'])
+    args = parser.parse_args(argv)
+
+    # Banco, cache e fila em um diretório temporário, nunca nos arquivos do app
+    workdir = tempfile.mkdtemp(prefix='selecionei-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'app.db')}"
+    os.environ.pop('DATABASE_READ_URL', None)
+    os.environ['ANALYSIS_CACHE_PATH'] = os.path.join(workdir, 'analysis_cache.db')
+    os.environ['ANALYSIS_JOBS_PATH'] = os.path.join(workdir, 'jobs.db')
+
+    per_combination, repeat, history_sizes = (1, 2, [100, 1000]) if args.quick else (3, 5, [1000, 10000, 50000])
+    corpus = generate_corpus(args.seed, per_combination)
+    jobs = generate_job_descriptions(args.seed)
+
+    results = {}
+    try:
+        if 'analyzer' not in args.skip:
+            results.update(bench_analyzer(corpus, jobs, repeat))
+        if 'extraction' not in args.skip:
+            results.update(bench_extraction(corpus, repeat))
+        if 'endpoints' not in args.skip:
+            results.update(bench_endpoints(corpus, jobs, history_sizes))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'quick': args.quick,
+            'corpus_size': len(corpus)
+        },
+        'results': results
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report, baseline, args.threshold)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(output + '\n')
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    elif not args.save_baseline:
+        print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
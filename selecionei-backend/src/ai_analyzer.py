@@ -1,15 +1,157 @@
 import re
 import json
 import datetime
-from typing import Dict, List, Optional, Tuple
-import PyPDF2
-import docx
-from io import BytesIO
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src import extractors
+from src.metrics import measure
+
+ANALYZER_VERSION = '2.2'
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def _is_word_char(char: str) -> bool:
+    # Mesma definição de \w do módulo re para str
+    return char.isalnum() or char == '_'
+
+
+def _at_word_boundary(text: str, position: int) -> bool:
+    r"""Equivalente a \b na posição: só um dos lados é caractere de palavra"""
+    before = position > 0 and _is_word_char(text[position - 1])
+    after = position < len(text) and _is_word_char(text[position])
+    return before != after
+
+
+# Pontos por educação (máximo 10 pontos) e por senioridade (máximo 10 pontos)
+EDUCATION_POINTS = {
+    'Pós-graduação': 10,
+    'Ensino Superior': 8,
+    'Ensino Técnico': 5,
+    'Não informado': 0
+}
+SENIORITY_POINTS = {
+    'Senior': 10,
+    'Pleno': 7,
+    'Junior': 5
+}
+
+# Orçamento de extração por documento (configurável por variável de ambiente)
+EXTRACTION_MAX_PAGES = int(os.getenv('EXTRACTION_MAX_PAGES', 20))
+EXTRACTION_MAX_CHARS = int(os.getenv('EXTRACTION_MAX_CHARS', 100000))
+
+class TextStream:
+    """Texto extraído trecho a trecho (página ou parágrafo), parando ao atingir o orçamento"""
+    
+    def __init__(self, chunks: Iterable[str], total_pages: Optional[int] = None,
+                 max_pages: Optional[int] = None, max_chars: Optional[int] = None,
+                 format: Optional[str] = None, backend: Optional[str] = None, elapsed: float = 0.0):
+        self._chunks = chunks
+        self.total_pages = total_pages
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.pages_parsed = 0
+        self.chars = 0
+        self.truncated = False
+        self.format = format
+        self.backend = backend
+        # Tempo gasto no extrator: abertura do arquivo + cada trecho pedido ao parser
+        self.elapsed = elapsed
+    
+    def __iter__(self) -> Iterator[str]:
+        iterator = iter(self._chunks)
+        while True:
+            # Verifica o orçamento antes de pedir a próxima página ao parser
+            budget_met = (
+                (self.max_pages is not None and self.pages_parsed >= self.max_pages)
+                or (self.max_chars is not None and self.chars >= self.max_chars)
+            )
+            if budget_met:
+                self.truncated = self.total_pages is None or self.pages_parsed < self.total_pages
+                return
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.elapsed += time.perf_counter() - start
+            
+            if self.total_pages is not None:
+                self.pages_parsed += 1
+            
+            if self.max_chars is not None and self.chars + len(chunk) > self.max_chars:
+                chunk = chunk[:self.max_chars - self.chars]
+                self.chars += len(chunk)
+                self.truncated = True
+                yield chunk
+                return
+            
+            self.chars += len(chunk)
+            yield chunk
+    
+    @property
+    def pages_skipped(self) -> int:
+        if self.total_pages is None:
+            return 0
+        return self.total_pages - self.pages_parsed
+    
+    def read(self) -> str:
+        """Consome o stream e devolve o texto completo"""
+        return ''.join(self)
+    
+    def stats(self) -> Dict:
+        return {
+            'paginas_total': self.total_pages,
+            'paginas_processadas': self.pages_parsed,
+            'paginas_ignoradas': self.pages_skipped,
+            'caracteres': self.chars,
+            'truncado': self.truncated,
+            'formato': self.format,
+            'backend': self.backend,
+            'tempo_ms': round(self.elapsed * 1000, 3)
+        }
+
+class ResumeDocument:
+    """Texto de um currículo pré-processado uma única vez e compartilhado entre as etapas da análise"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        # Normaliza acentos decompostos (comuns em PDFs) para a forma composta
+        self.lower = unicodedata.normalize('NFC', text).lower()
+    
+    @cached_property
+    def tokens(self) -> List[Tuple[str, int, int]]:
+        """Palavras do texto em minúsculas com suas posições (token, início, fim)"""
+        return [(match.group(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(self.lower)]
+    
+    @cached_property
+    def token_counts(self) -> Counter:
+        """Quantidade de ocorrências de cada palavra"""
+        return Counter(token for token, _, _ in self.tokens)
+    
+    @cached_property
+    def word_count(self) -> int:
+        """Quantidade de palavras separadas por espaço no texto original"""
+        return len(self.text.split())
+    
+    def __bool__(self):
+        return bool(self.text.strip())
 
 class IntelligentResumeAnalyzer:
     """IA avançada para análise de currículos"""
     
-    def __init__(self):
+    def __init__(self, max_pages: int = EXTRACTION_MAX_PAGES, max_chars: int = EXTRACTION_MAX_CHARS):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        
         self.skills_database = {
             'programming': [
                 'python', 'javascript', 'java', 'c#', 'c++', 'php', 'ruby', 'go', 'rust', 'swift',
@@ -60,72 +202,143 @@ class IntelligentResumeAnalyzer:
             'superior': ['bacharelado', 'licenciatura', 'graduação', 'superior'],
             'pos': ['pós', 'especialização', 'mba', 'mestrado', 'doutorado', 'phd']
         }
+        
+        self._compile_skill_matcher()
+        self._compile_text_patterns()
+        
+        # Versão do analisador + hash da taxonomia: muda sempre que a base de
+        # skills ou palavras-chave muda, invalidando resultados em cache
+        taxonomy = json.dumps(
+            [self.skills_database, self.experience_keywords, self.education_levels],
+            sort_keys=True
+        )
+        self.version = f"{ANALYZER_VERSION}-{hashlib.sha256(taxonomy.encode('utf-8')).hexdigest()[:12]}"
+
+    def _compile_skill_matcher(self):
+        r"""Indexa a base de skills pela primeira palavra de cada uma.
+
+        Onde \bskill\b casa, o texto tem exatamente a primeira palavra da skill;
+        então cada palavra do texto custa uma consulta ao índice, mais a conferência
+        das skills compostas que começam por ela (ex.: 'react' -> 'react native').
+        O custo por texto é O(n), sem depender do tamanho da base.
+        """
+        self._skills_by_word = {}
+        # Skills que começam por pontuação (ex.: '.net') só casam logo depois de uma palavra
+        self._skills_after_word = {}
+        for skills in self.skills_database.values():
+            for skill in skills:
+                skill = skill.lower()
+                first_word = TOKEN_PATTERN.match(skill)
+                if first_word:
+                    self._skills_by_word.setdefault(first_word.group(), []).append(skill)
+                else:
+                    self._skills_after_word.setdefault(skill[0], []).append(skill)
+
+    def _compile_text_patterns(self):
+        """Pré-compila os padrões usados pelas etapas de experiência e senioridade"""
+        self._date_patterns = [re.compile(pattern) for pattern in [
+            r'(\d{4})\s*[-–]\s*(\d{4})',  # 2020-2024
+            r'(\d{4})\s*[-–]\s*presente',  # 2020-presente
+            r'(\d{4})\s*[-–]\s*atual',     # 2020-atual
+            r'(\d{1,2})\s*anos?\s*de\s*experiência',  # X anos de experiência
+            r'experiência\s*de\s*(\d{1,2})\s*anos?'   # experiência de X anos
+        ]]
+        self._job_title_pattern = re.compile(r'(desenvolvedor|analista|gerente|coordenador)')
+        self._keyword_pattern = re.compile(r'\b\w{4,}\b')
+        
+        # Palavras-chave de uma só palavra são contadas pelos tokens do documento;
+        # as compostas (ex.: 'tech lead') ganham um regex próprio
+        self._seniority_patterns = {}
+        for keywords in self.experience_keywords.values():
+            for keyword in keywords:
+                if not TOKEN_PATTERN.fullmatch(keyword):
+                    self._seniority_patterns[keyword] = re.compile(r'\b' + re.escape(keyword) + r'\b')
+        
+        # Parecer: as skills mais curtas aparecem mais como substring, então vêm primeiro
+        # para a contagem atingir logo o teto que importa para a nota
+        self._parecer_skills = tuple(sorted(
+            (skill for group in self.skills_database.values() for skill in group), key=len
+        ))
+        self._structure_pattern = re.compile(r"\b[a-z]{3,}\s+[a-z]{3,}\b")
+
+    def _as_document(self, text: Union[str, ResumeDocument]) -> ResumeDocument:
+        """Aceita texto puro ou um ResumeDocument já pré-processado"""
+        if isinstance(text, ResumeDocument):
+            return text
+        return ResumeDocument(text)
+
+    def count_skills(self, text: Union[str, ResumeDocument]) -> Dict[str, int]:
+        r"""Conta ocorrências de cada skill da base em uma única passada pelas palavras do texto.
+
+        Mesma regra de \bskill\b, e skills sobrepostas contam todas (ex.: 'react'
+        e 'react native', ou 'gitlab ci' e 'ci/cd' em 'gitlab ci/cd').
+        """
+        document = self._as_document(text)
+        lower = document.lower
+        counts = {}
+        for token, start, end in document.tokens:
+            for skill in self._skills_by_word.get(token, ()):
+                # Skill de uma palavra: o token já é delimitado por fronteiras
+                if len(skill) == end - start or (
+                    lower.startswith(skill, start) and _at_word_boundary(lower, start + len(skill))
+                ):
+                    counts[skill] = counts.get(skill, 0) + 1
+            if self._skills_after_word and end < len(lower):
+                for skill in self._skills_after_word.get(lower[end], ()):
+                    if lower.startswith(skill, end) and _at_word_boundary(lower, end + len(skill)):
+                        counts[skill] = counts.get(skill, 0) + 1
+        return counts
+
+    def stream_text_from_file(self, file_content: bytes, filename: str,
+                              max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> TextStream:
+        """Extrai texto como um stream com orçamento de páginas e caracteres.
+
+        O extrator é escolhido pelo conteúdo do arquivo (src/extractors.py), não
+        pela extensão de filename.
+        """
+        max_pages = self.max_pages if max_pages is None else max_pages
+        max_chars = self.max_chars if max_chars is None else max_chars
+        
+        start = time.perf_counter()
+        file_format = extractors.sniff_format(file_content)
+        extractor = extractors.select_extractor(file_format) or extractors.select_extractor(extractors.FORMAT_TEXT)
+        try:
+            chunks, total_pages = extractor.open(file_content)
+        except Exception:
+            # Arquivo corrompido: o que houver de texto legível
+            extractor = extractors.select_extractor(extractors.FORMAT_TEXT)
+            chunks, total_pages = extractor.open(file_content)
+        return TextStream(chunks, total_pages, max_pages if total_pages is not None else None, max_chars,
+                          file_format, extractor.name, time.perf_counter() - start)
 
     def extract_text_from_file(self, file_content: bytes, filename: str) -> str:
         """Extrai texto de diferentes tipos de arquivo"""
-        try:
-            file_ext = filename.lower().split('.')[-1]
-            
-            if file_ext == 'txt':
-                return file_content.decode('utf-8', errors='ignore')
-            
-            elif file_ext == 'pdf':
-                pdf_file = BytesIO(file_content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
-            
-            elif file_ext in ['doc', 'docx']:
-                doc_file = BytesIO(file_content)
-                doc = docx.Document(doc_file)
-                text = ""
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\n"
-                return text
-            
-            else:
-                return file_content.decode('utf-8', errors='ignore')
-                
-        except Exception as e:
-            # Fallback para texto simples
-            return file_content.decode('utf-8', errors='ignore')
+        return self.stream_text_from_file(file_content, filename).read()
 
-    def extract_skills(self, text: str) -> Dict[str, List[str]]:
+    def extract_skills(self, text: Union[str, ResumeDocument]) -> Dict[str, List[str]]:
         """Extrai skills técnicas do texto"""
-        text_lower = text.lower()
+        counts = self.count_skills(text)
         found_skills = {}
         
         for category, skills in self.skills_database.items():
-            found_in_category = []
-            for skill in skills:
-                # Busca por palavra completa ou com pontuação
-                pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-                if re.search(pattern, text_lower):
-                    found_in_category.append(skill.title())
+            # Mantém a ordem da base de skills dentro de cada categoria
+            found_in_category = [skill.title() for skill in skills if skill.lower() in counts]
             
             if found_in_category:
                 found_skills[category] = found_in_category
         
         return found_skills
 
-    def calculate_experience_years(self, text: str) -> int:
+    def calculate_experience_years(self, text: Union[str, ResumeDocument]) -> int:
         """Calcula anos de experiência baseado no texto"""
-        # Busca por padrões de data
-        date_patterns = [
-            r'(\d{4})\s*[-–]\s*(\d{4})',  # 2020-2024
-            r'(\d{4})\s*[-–]\s*presente',  # 2020-presente
-            r'(\d{4})\s*[-–]\s*atual',     # 2020-atual
-            r'(\d{1,2})\s*anos?\s*de\s*experiência',  # X anos de experiência
-            r'experiência\s*de\s*(\d{1,2})\s*anos?'   # experiência de X anos
-        ]
+        document = self._as_document(text)
         
         current_year = datetime.datetime.now().year
         total_experience = 0
         
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text.lower())
+        # Busca por padrões de data
+        for pattern in self._date_patterns:
+            matches = pattern.findall(document.lower)
             for match in matches:
                 if isinstance(match, tuple) and len(match) == 2:
                     start_year = int(match[0])
@@ -146,21 +359,24 @@ class IntelligentResumeAnalyzer:
         
         # Se não encontrou padrões específicos, estima baseado em cargos
         if total_experience == 0:
-            job_count = len(re.findall(r'(desenvolvedor|analista|gerente|coordenador)', text.lower()))
+            job_count = len(self._job_title_pattern.findall(document.lower))
             total_experience = min(job_count * 2, 10)  # Estima 2 anos por cargo, máximo 10
         
         return min(total_experience, 25)  # Máximo 25 anos
 
-    def determine_seniority(self, text: str, experience_years: int) -> str:
+    def determine_seniority(self, text: Union[str, ResumeDocument], experience_years: int) -> str:
         """Determina nível de senioridade"""
-        text_lower = text.lower()
+        document = self._as_document(text)
         
         # Pontuação por palavras-chave
         seniority_scores = {'junior': 0, 'pleno': 0, 'senior': 0}
         
         for level, keywords in self.experience_keywords.items():
             for keyword in keywords:
-                count = len(re.findall(r'\b' + re.escape(keyword) + r'\b', text_lower))
+                if keyword in self._seniority_patterns:
+                    count = len(self._seniority_patterns[keyword].findall(document.lower))
+                else:
+                    count = document.token_counts[keyword]
                 seniority_scores[level] += count
         
         # Ajusta baseado na experiência
@@ -183,9 +399,9 @@ class IntelligentResumeAnalyzer:
         
         return level_map[max_level]
 
-    def extract_education(self, text: str) -> str:
+    def extract_education(self, text: Union[str, ResumeDocument]) -> str:
         """Extrai informações sobre educação"""
-        text_lower = text.lower()
+        text_lower = self._as_document(text).lower
         
         education_found = []
         
@@ -204,17 +420,34 @@ class IntelligentResumeAnalyzer:
         else:
             return 'Não informado'
 
-    def calculate_job_compatibility(self, resume_text: str, job_description: str) -> int:
-        """Calcula compatibilidade entre currículo e vaga"""
+    def compile_job_description(self, job_description: str) -> Dict:
+        """Pré-processa a descrição da vaga uma única vez para ser reaproveitada entre currículos"""
+        job = self._as_document(job_description)
+        return {
+            'skills': self.extract_skills(job),
+            'keywords': self._keyword_pattern.findall(job.lower)[:10]  # Top 10 palavras
+        }
+
+    def calculate_job_compatibility(self, resume_text: Union[str, ResumeDocument],
+                                    job_description: Union[str, Dict],
+                                    resume_skills: Dict[str, List[str]] = None) -> int:
+        """Calcula compatibilidade entre currículo e vaga.
+
+        job_description pode ser o texto da vaga ou o resultado de compile_job_description.
+        """
         if not job_description:
             return None
         
-        resume_lower = resume_text.lower()
-        job_lower = job_description.lower()
+        resume = self._as_document(resume_text)
+        resume_lower = resume.lower
+        
+        if not isinstance(job_description, dict):
+            job_description = self.compile_job_description(job_description)
         
-        # Extrai skills de ambos
-        resume_skills = self.extract_skills(resume_text)
-        job_skills = self.extract_skills(job_description)
+        # Extrai skills de ambos (as do currículo podem vir já calculadas)
+        if resume_skills is None:
+            resume_skills = self.extract_skills(resume)
+        job_skills = job_description['skills']
         
         # Conta skills em comum
         common_skills = 0
@@ -232,7 +465,7 @@ class IntelligentResumeAnalyzer:
         compatibility = (common_skills / total_job_skills) * 100
         
         # Ajustes baseados em palavras-chave importantes
-        important_keywords = re.findall(r'\b\w{4,}\b', job_lower)[:10]  # Top 10 palavras
+        important_keywords = job_description['keywords']
         keyword_matches = 0
         
         for keyword in important_keywords:
@@ -345,58 +578,65 @@ class IntelligentResumeAnalyzer:
         score += experience_points
         
         # Pontos por educação (máximo 10 pontos)
-        education_points = {
-            'Pós-graduação': 10,
-            'Ensino Superior': 8,
-            'Ensino Técnico': 5,
-            'Não informado': 0
-        }
-        score += education_points.get(education, 0)
+        score += EDUCATION_POINTS.get(education, 0)
         
         # Pontos por senioridade (máximo 10 pontos)
-        seniority_points = {
-            'Senior': 10,
-            'Pleno': 7,
-            'Junior': 5
-        }
-        score += seniority_points.get(seniority, 5)
+        score += SENIORITY_POINTS.get(seniority, 5)
         
         return min(95, max(60, score))  # Entre 60 e 95
 
-    def analyze_resume(self, file_content: bytes, filename: str, job_description: str = None) -> Dict:
-        """Análise completa do currículo"""
+    def analyze_resume(self, file_content: bytes, filename: str,
+                       job_description: Union[str, Dict] = None,
+                       timings: Optional[Dict[str, float]] = None) -> Dict:
+        """Análise completa do currículo.
+
+        Se timings for informado, recebe o tempo (em segundos) de cada etapa.
+        """
+        timings = {} if timings is None else timings
         try:
-            # Extrai texto do arquivo
-            text = self.extract_text_from_file(file_content, filename)
+            # Extrai texto do arquivo (o stream só lê o arquivo em read()); etapa por formato detectado
+            stream = self.stream_text_from_file(file_content, filename)
+            text = stream.read()
+            timings[f'extract.{stream.format}'] = stream.elapsed
             
-            if not text.strip():
+            # Pré-processa o texto uma única vez para todas as etapas
+            with measure(timings, 'analyzer.document'):
+                document = ResumeDocument(text)
+            if not document:
                 raise ValueError("Não foi possível extrair texto do arquivo")
             
             # Análises individuais
-            skills = self.extract_skills(text)
-            experience_years = self.calculate_experience_years(text)
-            seniority = self.determine_seniority(text, experience_years)
-            education = self.extract_education(text)
+            with measure(timings, 'analyzer.skills'):
+                skills = self.extract_skills(document)
+            with measure(timings, 'analyzer.experience'):
+                experience_years = self.calculate_experience_years(document)
+            with measure(timings, 'analyzer.seniority'):
+                seniority = self.determine_seniority(document, experience_years)
+            with measure(timings, 'analyzer.education'):
+                education = self.extract_education(document)
             
             # Pontuação geral
-            overall_score = self.calculate_overall_score(skills, experience_years, education, seniority)
+            with measure(timings, 'analyzer.score'):
+                overall_score = self.calculate_overall_score(skills, experience_years, education, seniority)
             
             # Compatibilidade com vaga
             job_compatibility = None
             if job_description:
-                job_compatibility = self.calculate_job_compatibility(text, job_description)
+                with measure(timings, 'analyzer.job_compatibility'):
+                    job_compatibility = self.calculate_job_compatibility(document, job_description, skills)
             
-            # Perguntas para entrevista
-            interview_questions = self.generate_interview_questions(skills, seniority, experience_years)
-            
-            # Pontos fortes
-            strengths = self.generate_strengths(skills, experience_years, education)
-            
-            # Resumo executivo
-            summary = self.generate_executive_summary(overall_score, seniority, experience_years, skills)
-            
-            # Recomendação
-            recommendation = self.generate_recommendation(overall_score, job_compatibility)
+            with measure(timings, 'analyzer.report'):
+                # Perguntas para entrevista
+                interview_questions = self.generate_interview_questions(skills, seniority, experience_years)
+                
+                # Pontos fortes
+                strengths = self.generate_strengths(skills, experience_years, education)
+                
+                # Resumo executivo
+                summary = self.generate_executive_summary(overall_score, seniority, experience_years, skills)
+                
+                # Recomendação
+                recommendation = self.generate_recommendation(overall_score, job_compatibility)
             
             # Flatten skills para resposta
             all_skills = []
@@ -415,6 +655,7 @@ class IntelligentResumeAnalyzer:
                 'perguntas_entrevista': interview_questions,
                 'resumo': summary,
                 'recomendacao': recommendation,
+                'extracao': stream.stats(),
                 'processado_em': datetime.datetime.now().isoformat()
             }
             
@@ -468,13 +709,23 @@ class IntelligentResumeAnalyzer:
 
 
 
-    def avaliar_curriculo_com_parecer(self, texto: str) -> dict:
+    def avaliar_curriculo_com_parecer(self, texto: Union[str, ResumeDocument]) -> dict:
         """Gera nota de 0 a 10 e um parecer explicativo sobre o currículo analisado."""
         score = 0
         parecer = []
 
-        texto_lower = texto.lower()
-        habilidades = sum(texto_lower.count(skill) for group in self.skills_database.values() for skill in group)
+        documento = self._as_document(texto)
+        texto = documento.text
+        texto_lower = documento.lower
+        # Contagem por substring, não por palavra como count_skills: 'r' conta em 'trabalhei' e
+        # 'java' em 'javascript'. Trocar pelos tokens do ResumeDocument mudaria a faixa da nota de
+        # boa parte dos currículos curtos e, com a parada em 10, seria mais lenta que str.count.
+        # A nota só distingue 5 e 10 ocorrências: a contagem para ao chegar em 10
+        habilidades = 0
+        for skill in self._parecer_skills:
+            habilidades += texto_lower.count(skill)
+            if habilidades >= 10:
+                break
         if habilidades >= 10:
             score += 4
             parecer.append("Possui várias habilidades técnicas relevantes.")
@@ -491,14 +742,14 @@ class IntelligentResumeAnalyzer:
         else:
             parecer.append("Não apresenta experiência profissional clara.")
 
-        if len(texto.split()) > 200:
+        if documento.word_count > 200:
             score += 2
             parecer.append("Currículo tem bom volume de conteúdo.")
         else:
             score += 0.5
             parecer.append("Currículo curto, poderia ser mais detalhado.")
 
-        if re.search(r"\b[a-z]{3,}\s+[a-z]{3,}\b", texto):
+        if self._structure_pattern.search(texto):
             score += 1
             parecer.append("Texto bem estruturado.")
         else:
@@ -509,3 +760,17 @@ class IntelligentResumeAnalyzer:
             "nota": score,
             "parecer": "Nota: {:.1f} — {}".format(score, " ".join(parecer))
         }
+
+
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> IntelligentResumeAnalyzer:
+    """Instância única por processo: a base de skills e os padrões são montados uma só vez"""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                _shared_analyzer = IntelligentResumeAnalyzer()
+    return _shared_analyzer
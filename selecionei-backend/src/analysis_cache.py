@@ -0,0 +1,192 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.db_config import apply_sqlite_pragmas
+
+# Configuração do cache (configurável por variável de ambiente)
+CACHE_MEMORY_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MEMORY_ENTRIES', 1024))
+CACHE_MAX_BYTES = int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+CACHE_PATH = os.getenv(
+    'ANALYSIS_CACHE_PATH',
+    os.path.join(os.path.dirname(__file__), 'database', 'analysis_cache.db')
+)
+
+
+def normalize_job_description(job_description: Optional[str]) -> str:
+    """Normaliza a descrição da vaga para que variações de espaço e caixa gerem a mesma chave"""
+    if not job_description:
+        return ''
+    text = unicodedata.normalize('NFC', job_description).lower()
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def hash_job_description(job_description: Optional[str]) -> str:
+    """SHA-256 da descrição da vaga normalizada"""
+    return hashlib.sha256(normalize_job_description(job_description).encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """Cache de resultados de análise endereçado pelo conteúdo do arquivo.
+
+    Dois níveis: um LRU em memória, limitado por quantidade de entradas, e um
+    SQLite persistente, limitado pelo tamanho total dos resultados gravados.
+    Os dois guardam o JSON do resultado: cada get devolve um dict novo, que o
+    chamador pode alterar sem afetar o cache.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, memory_entries: int = CACHE_MEMORY_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(file_content: bytes, job_description: Optional[str], version: str,
+                 job_hash: Optional[str] = None) -> str:
+        """Chave = SHA-256 do arquivo + hash da vaga normalizada + versão do analisador.
+
+        job_hash permite usar o hash já calculado de um JobProfile.
+        """
+        file_hash = hashlib.sha256(file_content).hexdigest()
+        job_hash = job_hash or hash_job_description(job_description)
+        return f'{file_hash}:{job_hash[:16]}:{version}'
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Abre o SQLite do cache no primeiro uso (desabilitado se o caminho for vazio)"""
+        if not self.path:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            apply_sqlite_pragmas(self._conn)
+            # Totais mantidos por triggers na mesma transação de cada escrita (inclusive de
+            # outros processos); a linha é semeada uma vez para caches criados sem ela
+            self._conn.executescript('''
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS analysis_cache (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS ix_analysis_cache_accessed_at ON analysis_cache (accessed_at);
+                CREATE TABLE IF NOT EXISTS analysis_cache_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 1), entries INTEGER NOT NULL, size INTEGER NOT NULL);
+                INSERT OR IGNORE INTO analysis_cache_totals
+                    SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache;
+                CREATE TRIGGER IF NOT EXISTS analysis_cache_insert AFTER INSERT ON analysis_cache BEGIN
+                    UPDATE analysis_cache_totals SET entries = entries + 1, size = size + NEW.size;
+                END;
+                CREATE TRIGGER IF NOT EXISTS analysis_cache_update AFTER UPDATE OF size ON analysis_cache BEGIN
+                    UPDATE analysis_cache_totals SET size = size - OLD.size + NEW.size;
+                END;
+                CREATE TRIGGER IF NOT EXISTS analysis_cache_delete AFTER DELETE ON analysis_cache BEGIN
+                    UPDATE analysis_cache_totals SET entries = entries - 1, size = size - OLD.size;
+                END;
+                COMMIT;
+            ''')
+        return self._conn
+
+    def _remember(self, key: str, payload: str):
+        """Coloca a entrada no topo do LRU em memória, descartando a mais antiga se preciso"""
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _served(payload: str) -> Dict:
+        """Cópia do resultado com processado_em do momento em que foi servido"""
+        value = json.loads(payload)
+        if 'processado_em' in value:
+            value['processado_em'] = datetime.datetime.now().isoformat()
+        return value
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Busca um resultado no cache (memória primeiro, depois SQLite)"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._served(self._memory[key])
+
+            conn = self._connection()
+            if conn is not None:
+                row = conn.execute('SELECT value FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+                if row:
+                    conn.execute('UPDATE analysis_cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+                    conn.commit()
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return self._served(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict):
+        """Grava um resultado nos dois níveis e aplica o limite de tamanho do SQLite"""
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(key, payload)
+
+            conn = self._connection()
+            if conn is None:
+                return
+            # Upsert, não REPLACE: o REPLACE apaga a linha antiga sem disparar o trigger de DELETE
+            conn.execute(
+                'INSERT INTO analysis_cache (key, value, size, accessed_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size, '
+                'accessed_at = excluded.accessed_at',
+                (key, payload, len(payload), time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Remove as entradas acessadas há mais tempo até caber em max_bytes"""
+        total = conn.execute('SELECT size FROM analysis_cache_totals').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM analysis_cache ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM analysis_cache WHERE key = ?', evicted)
+
+    def stats(self) -> Dict:
+        """Contadores de acerto/erro e ocupação, usados para dimensionar o cache"""
+        with self._lock:
+            disk_entries, disk_bytes = 0, 0
+            conn = self._connection()
+            if conn is not None:
+                disk_entries, disk_bytes = conn.execute(
+                    'SELECT entries, size FROM analysis_cache_totals'
+                ).fetchone()
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_capacity': self.memory_entries,
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes,
+                'disk_capacity_bytes': self.max_bytes
+            }
@@ -0,0 +1,121 @@
+import contextvars
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from src.extraction_pool import get_extraction_pool
+from src.uploads import as_stream, upload_content
+
+# Limites do processamento em lote (configuráveis por variável de ambiente)
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', 500))
+
+
+def _analyze_in_pool(pool, file_content: bytes, filename: str, job_description: str = None) -> Dict:
+    """Envia um arquivo ao pool de extração e aguarda o resultado da análise"""
+    start_time = time.time()
+    try:
+        analysis_result = pool.analyze(file_content, filename, job_description)
+        return {
+            'filename': filename,
+            'success': True,
+            'analysis': analysis_result,
+            'processing_time': time.time() - start_time
+        }
+    except Exception as e:
+        return {
+            'filename': filename,
+            'success': False,
+            'error': str(e)
+        }
+
+
+def expand_uploads(files: Iterable, allowed_extensions: set) -> Tuple[List[Tuple[str, bytes]], List[Dict]]:
+    """Lê os arquivos enviados, expandindo arquivos ZIP.
+
+    Retorna a lista de (nome, conteúdo) válidos e a lista de arquivos rejeitados.
+    """
+    items = []
+    rejected = []
+
+    for file in files:
+        filename = file.filename or ''
+        file_ext = os.path.splitext(filename)[1].lower()
+
+        if file_ext == '.zip':
+            try:
+                with zipfile.ZipFile(as_stream(upload_content(file))) as archive:
+                    for info in archive.infolist():
+                        name = os.path.basename(info.filename)
+                        # Ignora diretórios e metadados do macOS
+                        if info.is_dir() or not name or info.filename.startswith('__MACOSX/'):
+                            continue
+                        if os.path.splitext(name)[1].lower() not in allowed_extensions:
+                            rejected.append({'filename': name, 'success': False, 'error': 'Tipo de arquivo não suportado'})
+                            continue
+                        items.append((name, archive.read(info)))
+            except zipfile.BadZipFile:
+                rejected.append({'filename': filename, 'success': False, 'error': 'Arquivo ZIP inválido'})
+        elif file_ext in allowed_extensions:
+            items.append((filename, upload_content(file)))
+        else:
+            rejected.append({'filename': filename, 'success': False, 'error': 'Tipo de arquivo não suportado'})
+
+    # Arquivos vazios não chegam ao pool
+    valid_items = []
+    for filename, content in items:
+        if len(content) == 0:
+            rejected.append({'filename': filename, 'success': False, 'error': 'Arquivo vazio'})
+        else:
+            valid_items.append((filename, content))
+
+    return valid_items, rejected
+
+
+def analyze_batch(items: List[Tuple[str, bytes]], job_description=None,
+                  cache=None, version: str = None, job_hash: str = None) -> Iterator[Dict]:
+    """Distribui as análises pelo pool de extração e devolve os resultados na ordem em que terminam.
+
+    Cada processo do pool analisa um arquivo por vez, com limites de tempo e
+    memória; as threads aqui apenas aguardam as respostas. job_description pode
+    ser o texto da vaga ou uma vaga já compilada (JobProfile.compiled). Com um
+    AnalysisCache, arquivos já analisados são devolvidos sem passar pelo pool.
+    """
+    pool = get_extraction_pool()
+    executor = ThreadPoolExecutor(max_workers=pool.size)
+    cached_results = []
+    futures = {}
+
+    for filename, content in items:
+        key = None
+        if cache is not None:
+            key = cache.make_key(content, job_description, version, job_hash)
+            cached = cache.get(key)
+            if cached is not None:
+                cached_results.append({
+                    'filename': filename,
+                    'success': True,
+                    'analysis': cached,
+                    'processing_time': 0.0,
+                    'cached': True
+                })
+                continue
+        # Cada thread roda no contexto da requisição (perfil e tempos por etapa)
+        future = executor.submit(contextvars.copy_context().run, _analyze_in_pool, pool, content, filename,
+                                 job_description)
+        futures[future] = (filename, key)
+
+    try:
+        yield from cached_results
+
+        for future in as_completed(futures):
+            filename, key = futures[future]
+            result = future.result()
+            if result['success'] and key is not None:
+                cache.put(key, result['analysis'])
+            yield result
+    finally:
+        # Stream abandonado (cliente desconectou): os arquivos que ainda não entraram
+        # no pool são descartados, em vez de ocupá-lo para as outras requisições
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,100 @@
+import functools
+import os
+import sqlite3
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Banco principal e, opcionalmente, uma réplica (ou outro arquivo) só para leitura
+DATABASE_URL = os.getenv(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+
+# Pool de conexões para bancos servidor (PostgreSQL, MySQL)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+
+# SQLite: quanto esperar por um lock antes de falhar e quanto do arquivo mapear em memória
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+READ_BIND = 'read'
+
+
+def apply_sqlite_pragmas(conn, read_only: bool = False):
+    """WAL deixa leitores trabalharem durante uma escrita; NORMAL só sincroniza no checkpoint"""
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    if read_only:
+        cursor.execute('PRAGMA query_only=ON')
+    cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """Opções de create_engine conforme o tipo de banco"""
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_pre_ping': True
+    }
+
+
+def configure_database(app, db, url: str = None, read_url: str = None):
+    """Configura o SQLAlchemy do app: URL, pool, pragmas do SQLite e engine de leitura"""
+    url = url or app.config.get('SQLALCHEMY_DATABASE_URI') or DATABASE_URL
+    read_url = read_url or DATABASE_READ_URL
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    if read_url:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds[READ_BIND] = {'url': read_url, **engine_options(read_url)}
+        app.config['SQLALCHEMY_BINDS'] = binds
+    db.init_app(app)
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name == 'sqlite':
+                listener = functools.partial(_on_sqlite_connect, read_only=bind_key == READ_BIND)
+                event.listen(engine, 'connect', listener)
+
+
+def _on_sqlite_connect(dbapi_connection, connection_record, read_only=False):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection, read_only)
+
+
+def read_only(view):
+    """Marca um endpoint que só lê: suas consultas vão para a engine de leitura, se configurada"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """Sessão que manda as consultas de endpoints read_only para a engine de leitura.
+
+    Escritas (flush) sempre vão para o banco principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get('read_only')
+                and READ_BIND in self._db.engines):
+            return self._db.engines[READ_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,254 @@
+import atexit
+import cProfile
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src import metrics, profiling
+
+try:
+    import resource
+except ImportError:  # Windows: sem limites de CPU/memória por processo
+    resource = None
+
+# Configuração do pool de extração (configurável por variável de ambiente)
+EXTRACTION_POOL_SIZE = int(os.getenv('EXTRACTION_POOL_SIZE', os.cpu_count() or 2))
+EXTRACTION_TIMEOUT = float(os.getenv('EXTRACTION_TIMEOUT', 30))
+EXTRACTION_CPU_LIMIT = int(os.getenv('EXTRACTION_CPU_LIMIT', 20))
+EXTRACTION_MAX_MEMORY_MB = int(os.getenv('EXTRACTION_MAX_MEMORY_MB', 1024))
+# Espera máxima por um processo livre antes de recusar o documento
+EXTRACTION_QUEUE_TIMEOUT = float(os.getenv('EXTRACTION_QUEUE_TIMEOUT', EXTRACTION_TIMEOUT))
+
+
+class ExtractionError(Exception):
+    """Falha ao processar um documento no pool de extração"""
+
+
+class ExtractionTimeout(ExtractionError):
+    """Documento excedeu o limite de tempo (relógio ou CPU) do pool de extração"""
+
+
+class ExtractionPoolBusy(ExtractionError):
+    """Nenhum processo do pool ficou livre dentro do tempo de espera"""
+
+
+def _apply_memory_limit(max_memory_mb: int):
+    if resource is None or not max_memory_mb:
+        return
+    limit = max_memory_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _apply_cpu_limit(cpu_limit: int):
+    """Limita o CPU do próximo documento: o kernel envia SIGXCPU e encerra o processo"""
+    if resource is None or not cpu_limit:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_limit
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, max_memory_mb: int):
+    """Loop de um processo do pool: recebe documentos, extrai/analisa e devolve o resultado"""
+    from src.ai_analyzer import IntelligentResumeAnalyzer
+
+    _apply_memory_limit(max_memory_mb)
+    analyzer = IntelligentResumeAnalyzer()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        except MemoryError:
+            conn.send(('fatal', 'Limite de memória excedido ao receber o arquivo'))
+            break
+        except Exception as e:
+            # Mensagem lida, mas não desserializada (ex.: upload em disco já removido)
+            conn.send(('error', str(e)))
+            continue
+        if message is None:
+            break
+
+        kind, args, cpu_limit, profile = message
+        _apply_cpu_limit(cpu_limit)
+        profiler = cProfile.Profile() if profile else None
+        try:
+            if profiler:
+                profiler.enable()
+            # Os tempos por etapa voltam junto com o resultado para o processo do app
+            timings = {}
+            if kind == 'extract':
+                stream = analyzer.stream_text_from_file(*args)
+                result = (stream.read(), stream.stats())
+                timings[f'extract.{stream.format}'] = stream.elapsed
+            else:
+                result = analyzer.analyze_resume(*args, timings=timings)
+            profile_stats = None
+            if profiler:
+                profiler.disable()
+                profiler.create_stats()
+                profile_stats = profiler.stats
+            conn.send(('ok', (result, timings, profile_stats)))
+        except MemoryError:
+            # Estado do processo pode estar comprometido: avisa que vai sair para ser substituído
+            conn.send(('fatal', 'Limite de memória excedido ao processar o arquivo'))
+            break
+        except Exception as e:
+            conn.send(('error', str(e)))
+        finally:
+            if profiler:
+                profiler.disable()
+
+
+class _Worker:
+    def __init__(self, context, max_memory_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, max_memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Pool de processos pré-criados para extração e análise de documentos.
+
+    Cada documento tem limite de tempo de relógio, de CPU e de memória; um
+    processo que estoura o limite ou morre é substituído automaticamente.
+    """
+
+    def __init__(self, size: int = EXTRACTION_POOL_SIZE, timeout: float = EXTRACTION_TIMEOUT,
+                 cpu_limit: int = EXTRACTION_CPU_LIMIT, max_memory_mb: int = EXTRACTION_MAX_MEMORY_MB,
+                 queue_timeout: float = EXTRACTION_QUEUE_TIMEOUT):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.cpu_limit = cpu_limit
+        self.max_memory_mb = max_memory_mb
+
+        methods = multiprocessing.get_all_start_methods()
+        self._context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = set()
+        self._closed = False
+        self.replaced = 0
+
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.max_memory_mb)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            self.replaced += 1
+        return self._spawn()
+
+    def _run(self, kind: str, args: tuple, timeout: Optional[float] = None):
+        if self._closed:
+            raise ExtractionError('Pool de extração encerrado')
+
+        timeout = self.timeout if timeout is None else timeout
+        # Requisição sendo perfilada: o processo do pool também perfila e devolve as estatísticas
+        profile = profiling.current()
+        start = time.perf_counter()
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            metrics.record_stage('pool.wait', time.perf_counter() - start)
+            raise ExtractionPoolBusy(
+                f'Nenhum processo de extração livre em {self.queue_timeout:g}s; tente novamente'
+            )
+        # Espera por um processo livre: sobe quando o pool está saturado
+        metrics.record_stage('pool.wait', time.perf_counter() - start)
+        try:
+            if not worker.process.is_alive():
+                worker = self._replace(worker)
+
+            try:
+                worker.conn.send((kind, args, self.cpu_limit, profile is not None))
+            except (BrokenPipeError, OSError):
+                worker = self._replace(worker)
+                raise ExtractionError('Processo de extração indisponível')
+            if not worker.conn.poll(timeout):
+                worker = self._replace(worker)
+                raise ExtractionTimeout(f'Tempo limite de {timeout:g}s excedido ao processar o arquivo')
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # Processo morto pelo kernel (SIGXCPU ao estourar o limite de CPU, ou falta de memória)
+                worker = self._replace(worker)
+                raise ExtractionTimeout('Limite de CPU ou memória excedido ao processar o arquivo')
+            if status == 'fatal' or not worker.process.is_alive():
+                # Processo saindo (ex.: MemoryError): substituído antes de voltar para a fila,
+                # para que o próximo documento não receba um EOF como se fosse timeout
+                worker = self._replace(worker)
+        finally:
+            self._idle.put(worker)
+
+        # Tempo total visto pelo app, incluindo a espera e a troca de mensagens com o processo
+        metrics.record_stage(f'pool.{kind}', time.perf_counter() - start)
+        if status != 'ok':
+            raise ExtractionError(payload)
+        result, timings, profile_stats = payload
+        metrics.record_stages(timings)
+        if profile_stats:
+            profile.add_worker_stats(profile_stats)
+        return result
+
+    def extract(self, file_content: bytes, filename: str, timeout: Optional[float] = None) -> Tuple[str, Dict]:
+        """Extrai o texto do arquivo em um processo isolado. Retorna (texto, estatísticas)"""
+        return self._run('extract', (file_content, filename), timeout)
+
+    def analyze(self, file_content: bytes, filename: str, job_description: str = None,
+                timeout: Optional[float] = None) -> Dict:
+        """Extrai e analisa o currículo em um processo isolado"""
+        return self._run('analyze', (file_content, filename, job_description), timeout)
+
+    def close(self):
+        """Encerra todos os processos do pool"""
+        self._closed = True
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Retorna o pool compartilhado do processo, criando-o no primeiro uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,375 @@
+"""Detecção do formato pelo conteúdo e registro de extratores de texto.
+
+O formato vem dos primeiros bytes do arquivo, não da extensão: um .doc antigo
+(OLE2) ou um PDF com nome errado vão direto para o extrator certo, sem passar
+por um parser que vai falhar. Para cada formato, o registro escolhe o backend
+instalado de maior prioridade; backends opcionais mais rápidos (pypdfium2,
+PyMuPDF, pypdf, antiword) são usados automaticamente se estiverem disponíveis.
+Sem antiword, o .doc é lido pela tabela de peças do próprio arquivo (word-binary).
+"""
+import importlib.util
+import os
+import re
+import shutil
+import struct
+import subprocess
+import tempfile
+import zipfile
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.uploads import as_stream
+
+FORMAT_PDF = 'pdf'
+FORMAT_DOCX = 'docx'
+FORMAT_OLE2 = 'ole2'
+FORMAT_ZIP = 'zip'
+FORMAT_TEXT = 'text'
+
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+ZIP_MAGIC = b'PK\x03\x04'
+# O cabeçalho %PDF- pode vir depois de lixo, desde que no primeiro KB
+PDF_HEADER_WINDOW = 1024
+
+# Fixa o backend de um formato, ex.: EXTRACTOR_BACKENDS="pdf=pypdf2,ole2=ole2-strings"
+EXTRACTOR_BACKENDS = dict(
+    item.split('=', 1) for item in os.getenv('EXTRACTOR_BACKENDS', '').replace(' ', '').split(',') if '=' in item
+)
+ANTIWORD_TIMEOUT = float(os.getenv('ANTIWORD_TIMEOUT', 10))
+
+# content é bytes ou um mmap (src/uploads.py): os extratores leem sem copiar
+# (trechos de texto, total de páginas ou None se o formato não tem páginas)
+Extracted = Tuple[Iterable[str], Optional[int]]
+
+
+class Extractor(NamedTuple):
+    name: str
+    format: str
+    open: Callable[[bytes], Extracted]
+    priority: int
+    available: Callable[[], bool]
+
+
+_registry: Dict[str, List[Extractor]] = {}
+_selected: Dict[str, Extractor] = {}
+
+
+def module_installed(*modules: str) -> Callable[[], bool]:
+    """Disponibilidade sem importar o módulo (a importação fica para o primeiro arquivo)"""
+    return lambda: all(importlib.util.find_spec(module) is not None for module in modules)
+
+
+def register_extractor(format: str, name: str, open: Callable[[bytes], Extracted], priority: int = 0,
+                       available: Callable[[], bool] = lambda: True):
+    """Registra um backend para o formato; o de maior prioridade disponível é o escolhido"""
+    _registry.setdefault(format, []).append(Extractor(name, format, open, priority, available))
+    _registry[format].sort(key=lambda extractor: extractor.priority, reverse=True)
+    _selected.pop(format, None)
+
+
+def select_extractor(format: str) -> Optional[Extractor]:
+    """Backend usado para o formato (decidido uma vez por processo)"""
+    if format not in _selected:
+        candidates = _registry.get(format, [])
+        pinned = EXTRACTOR_BACKENDS.get(format)
+        if pinned:
+            candidates = [extractor for extractor in candidates if extractor.name.lower() == pinned.lower()]
+        _selected[format] = next((extractor for extractor in candidates if extractor.available()), None)
+    return _selected[format]
+
+
+def available_extractors() -> Dict[str, List[str]]:
+    """Backends instalados por formato, na ordem de preferência"""
+    return {
+        format: [extractor.name for extractor in extractors if extractor.available()]
+        for format, extractors in _registry.items()
+    }
+
+
+def sniff_format(content: bytes) -> str:
+    """Formato do arquivo pelos bytes iniciais (magic bytes)"""
+    head = content[:PDF_HEADER_WINDOW]
+    if b'%PDF-' in head:
+        return FORMAT_PDF
+    if head.startswith(OLE2_MAGIC):
+        return FORMAT_OLE2
+    if head.startswith(ZIP_MAGIC):
+        # OOXML é um ZIP com word/document.xml; só o diretório central é lido aqui
+        try:
+            with zipfile.ZipFile(as_stream(content)) as archive:
+                archive.getinfo('word/document.xml')
+            return FORMAT_DOCX
+        except (KeyError, zipfile.BadZipFile):
+            return FORMAT_ZIP
+    return FORMAT_TEXT
+
+
+# PDF
+
+def _pages(pages: Iterable, extract: Callable) -> Iterable[str]:
+    """Extrai o texto das páginas sob demanda; página ilegível vira texto vazio"""
+    for page in pages:
+        try:
+            yield (extract(page) or '') + '\n'
+        except Exception:
+            yield '\n'
+
+
+def _open_pypdf2(content: bytes) -> Extracted:
+    import PyPDF2
+    reader = PyPDF2.PdfReader(as_stream(content))
+    return _pages(reader.pages, lambda page: page.extract_text()), len(reader.pages)
+
+
+def _open_pypdf(content: bytes) -> Extracted:
+    import pypdf
+    reader = pypdf.PdfReader(as_stream(content))
+    return _pages(reader.pages, lambda page: page.extract_text()), len(reader.pages)
+
+
+def _open_pypdfium2(content: bytes) -> Extracted:
+    import pypdfium2
+    document = pypdfium2.PdfDocument(content)
+    pages = (document[index] for index in range(len(document)))
+    return _pages(pages, lambda page: page.get_textpage().get_text_range()), len(document)
+
+
+def _open_pymupdf(content: bytes) -> Extracted:
+    import fitz
+    document = fitz.open(stream=content, filetype='pdf')
+    pages = (document[index] for index in range(document.page_count))
+    return _pages(pages, lambda page: page.get_text()), document.page_count
+
+
+# DOCX
+
+def _open_python_docx(content: bytes) -> Extracted:
+    import docx
+    document = docx.Document(as_stream(content))
+    return (paragraph.text + '\n' for paragraph in document.paragraphs), None
+
+
+# DOC (OLE2)
+
+def _open_antiword(content: bytes) -> Extracted:
+    with tempfile.NamedTemporaryFile(suffix='.doc') as f:
+        f.write(content)
+        f.flush()
+        result = subprocess.run(['antiword', '-m', 'UTF-8.txt', f.name], capture_output=True,
+                                timeout=ANTIWORD_TIMEOUT, check=True)
+    return [result.stdout.decode('utf-8', errors='ignore')], None
+
+
+class OLE2Error(ValueError):
+    """Arquivo OLE2 (compound file) corrompido ou sem o stream pedido"""
+
+
+_ENDOFCHAIN = 0xFFFFFFFE
+
+
+def _u16(data, offset: int) -> int:
+    return struct.unpack_from('<H', data, offset)[0]
+
+
+def _u32(data, offset: int) -> int:
+    return struct.unpack_from('<I', data, offset)[0]
+
+
+def ole2_streams(content: bytes, names: Iterable[str]) -> Dict[str, bytes]:
+    """Lê streams de um compound file (OLE2) pelo nome, só com a biblioteca padrão.
+
+    Segue as cadeias da FAT (e da mini FAT, para streams pequenos) a partir do
+    diretório; streams ausentes ficam fora do resultado.
+    """
+    if len(content) < 512 or content[:8] != OLE2_MAGIC:
+        raise OLE2Error('Cabeçalho OLE2 inválido')
+    sector_size = 1 << _u16(content, 0x1E)
+    if sector_size not in (512, 4096):
+        raise OLE2Error('Tamanho de setor OLE2 inválido')
+    mini_sector_size = 1 << _u16(content, 0x20)
+    mini_cutoff = _u32(content, 0x38)
+    entries_per_sector = sector_size // 4
+    # Cadeias maiores que o arquivo só aparecem em arquivos corrompidos (ou em loop)
+    max_sectors = len(content) // sector_size + 1
+
+    def sector(index: int) -> bytes:
+        start = (index + 1) * sector_size
+        if start >= len(content):
+            raise OLE2Error('Setor fora do arquivo')
+        return content[start:start + sector_size]
+
+    def chain(start: int, table: List[int], limit: int) -> Iterable[int]:
+        index, count = start, 0
+        while index != _ENDOFCHAIN:
+            if index >= len(table) or count > limit:
+                raise OLE2Error('Cadeia de setores inválida')
+            yield index
+            index, count = table[index], count + 1
+
+    # DIFAT: 109 entradas no cabeçalho, o resto em setores encadeados
+    difat = list(struct.unpack_from('<109I', content, 0x4C))
+    next_difat = _u32(content, 0x44)
+    for _ in range(min(_u32(content, 0x48), max_sectors)):
+        if next_difat >= _ENDOFCHAIN:
+            break
+        data = sector(next_difat)
+        difat.extend(struct.unpack_from(f'<{entries_per_sector - 1}I', data))
+        next_difat = _u32(data, sector_size - 4)
+    fat: List[int] = []
+    for index in difat[:_u32(content, 0x2C)]:
+        fat.extend(struct.unpack(f'<{entries_per_sector}I', sector(index)))
+
+    def read(start: int, size: int) -> bytes:
+        data = b''.join(sector(index) for index in chain(start, fat, max_sectors))
+        return data[:size]
+
+    directory = read(_u32(content, 0x30), max_sectors * sector_size)
+    if len(directory) < 128 or directory[66] != 5:
+        raise OLE2Error('Entrada raiz ausente')
+    # A entrada raiz aponta para o mini stream, onde ficam os streams pequenos (blocos de 64 bytes)
+    root = (_u32(directory, 116), _u32(directory, 120))
+    entries = {}
+    for offset in range(0, len(directory) - 127, 128):
+        name_length = _u16(directory, offset + 64)
+        if 2 <= name_length <= 64 and directory[offset + 66] == 2:
+            name = directory[offset:offset + name_length - 2].decode('utf-16-le', errors='ignore')
+            entries.setdefault(name, (_u32(directory, offset + 116), _u32(directory, offset + 120)))
+
+    streams = {}
+    mini_fat = mini_stream = None
+    for name in names:
+        if name not in entries:
+            continue
+        start, size = entries[name]
+        if size >= mini_cutoff:
+            streams[name] = read(start, size)
+            continue
+        if mini_stream is None:
+            mini_stream = read(*root)
+            mini_fat_data = read(_u32(content, 0x3C), _u32(content, 0x40) * sector_size)
+            mini_fat = list(struct.unpack(f'<{len(mini_fat_data) // 4}I', mini_fat_data))
+        streams[name] = b''.join(
+            mini_stream[index * mini_sector_size:(index + 1) * mini_sector_size]
+            for index in chain(start, mini_fat, len(mini_stream) // mini_sector_size + 1)
+        )[:size]
+    return streams
+
+
+# Marcas do texto do Word: campo (código entre 0x13 e 0x14), fim de parágrafo/célula,
+# quebras de linha e de página, hífens especiais e objetos inseridos
+_WORD_FIELD_CODE = re.compile('\x13[^\x13\x14\x15]*\x14')
+_WORD_CONTROLS = {**{ord(c): '\n' for c in '\r\x07\x0b\x0c'}, 0x1e: '-',
+                  **{c: None for c in range(0x20) if c not in (0x09, 0x0a, 0x0d, 0x07, 0x0b, 0x0c, 0x1e)}}
+
+
+def word_document_text(content: bytes) -> str:
+    """Texto do corpo de um .doc (Word 97+), pela tabela de peças (CLX) do stream 0Table/1Table.
+
+    Cada peça aponta para um trecho do stream WordDocument, em cp1252 (comprimido)
+    ou UTF-16LE; só os ccpText primeiros caracteres são o corpo do documento.
+    """
+    word = ole2_streams(content, ['WordDocument'])
+    if 'WordDocument' not in word:
+        raise OLE2Error('Stream WordDocument ausente')
+    word = word['WordDocument']
+    if len(word) < 0x20 or _u16(word, 0) != 0xA5EC:
+        raise OLE2Error('FIB do Word inválido')
+    flags = _u16(word, 0x0A)
+    if flags & 0x0100:
+        raise OLE2Error('Documento criptografado')
+    table_name = '1Table' if flags & 0x0200 else '0Table'
+
+    # FIB: FibBase (32 bytes), FibRgW, FibRgLw (ccpText é o 4º campo) e FibRgFcLcb (fcClx é o 34º par)
+    offset = 0x20
+    offset += 2 + _u16(word, offset) * 2
+    text_chars = _u32(word, offset + 2 + 12)
+    offset += 2 + _u16(word, offset) * 4
+    fc_clx, lcb_clx = struct.unpack_from('<II', word, offset + 2 + 33 * 8)
+
+    table = ole2_streams(content, [table_name]).get(table_name, b'')
+    clx = table[fc_clx:fc_clx + lcb_clx]
+    position = 0
+    # Prc (0x01) com propriedades de formatação antes do Pcdt (0x02) com as peças
+    while position < len(clx) and clx[position] == 0x01:
+        position += 3 + struct.unpack_from('<h', clx, position + 1)[0]
+    if position + 5 > len(clx) or clx[position] != 0x02:
+        raise OLE2Error('Tabela de peças ausente')
+    plc_size = _u32(clx, position + 1)
+    plc = clx[position + 5:position + 5 + plc_size]
+    pieces = (plc_size - 4) // 12
+    if pieces <= 0 or len(plc) < plc_size:
+        raise OLE2Error('Tabela de peças inválida')
+    cps = struct.unpack_from(f'<{pieces + 1}I', plc)
+
+    chunks = []
+    for index in range(pieces):
+        start, end = cps[index], min(cps[index + 1], text_chars)
+        if start >= end:
+            break
+        fc = _u32(plc, 4 * (pieces + 1) + index * 8 + 2)
+        if fc & 0x40000000:
+            byte_start = (fc & 0x3FFFFFFF) // 2
+            chunks.append(word[byte_start:byte_start + end - start].decode('cp1252', errors='replace'))
+        else:
+            chunks.append(word[fc:fc + 2 * (end - start)].decode('utf-16-le', errors='replace'))
+    return _WORD_FIELD_CODE.sub('', ''.join(chunks)).translate(_WORD_CONTROLS)
+
+
+def _open_word_binary(content: bytes) -> Extracted:
+    try:
+        return [word_document_text(content)], None
+    except (OLE2Error, struct.error):
+        # Outro documento OLE2 (ex.: .xls renomeado) ou .doc danificado
+        return _open_ole2_strings(content)
+
+
+# Sem tabela de peças: sequências legíveis só do stream WordDocument. \xff fica fora
+# da classe 8 bits (é o preenchimento dos setores livres, da FAT e da DIFAT); trechos
+# curtos ou feitos de um só caractere repetido são metadados binários
+_OLE2_TEXT_8BIT = re.compile(rb'[\t\r\n\x20-\x7e\xa0-\xfe]{6,}')
+_OLE2_TEXT_UTF16 = re.compile(rb'(?:[\t\r\n\x20-\x7e\xa0-\xff]\x00){6,}')
+
+
+def _readable(chunk: str) -> bool:
+    return len(set(chunk.strip())) > 2
+
+
+def _open_ole2_strings(content: bytes) -> Extracted:
+    """Aproximação: sequências de texto legível do stream WordDocument (ou do arquivo todo)"""
+    try:
+        content = ole2_streams(content, ['WordDocument']).get('WordDocument', content)
+    except (OLE2Error, struct.error):
+        pass
+    chunks = [match.group().decode('utf-16-le') for match in _OLE2_TEXT_UTF16.finditer(content)]
+    chunks += [match.group().decode('cp1252', errors='ignore') for match in _OLE2_TEXT_8BIT.finditer(content)]
+    return ['\n'.join(chunk.replace('\r', '\n') for chunk in chunks if _readable(chunk))], None
+
+
+# Texto
+
+def decode_text(content: bytes) -> str:
+    # str() decodifica qualquer buffer (bytes ou mmap) direto
+    if content[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        return str(content, 'utf-16', errors='ignore')
+    return str(content, 'utf-8-sig', errors='ignore')
+
+
+def _open_text(content: bytes) -> Extracted:
+    return [decode_text(content)], None
+
+
+def _open_unsupported(content: bytes) -> Extracted:
+    # ZIP que não é DOCX: decodificar como texto só produziria lixo
+    return [], None
+
+
+register_extractor(FORMAT_PDF, 'pymupdf', _open_pymupdf, priority=30, available=module_installed('fitz'))
+register_extractor(FORMAT_PDF, 'pypdfium2', _open_pypdfium2, priority=20, available=module_installed('pypdfium2'))
+register_extractor(FORMAT_PDF, 'pypdf', _open_pypdf, priority=10, available=module_installed('pypdf'))
+register_extractor(FORMAT_PDF, 'pypdf2', _open_pypdf2, available=module_installed('PyPDF2'))
+register_extractor(FORMAT_DOCX, 'python-docx', _open_python_docx, available=module_installed('docx'))
+register_extractor(FORMAT_OLE2, 'antiword', _open_antiword, priority=10,
+                   available=lambda: shutil.which('antiword') is not None)
+register_extractor(FORMAT_OLE2, 'word-binary', _open_word_binary, priority=5)
+register_extractor(FORMAT_OLE2, 'ole2-strings', _open_ole2_strings)
+register_extractor(FORMAT_ZIP, 'unsupported', _open_unsupported)
+register_extractor(FORMAT_TEXT, 'text', _open_text)
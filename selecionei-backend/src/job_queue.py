@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from src.db_config import apply_sqlite_pragmas
+
+# Fila persistente de análises assíncronas (configurável por variável de ambiente)
+JOB_QUEUE_PATH = os.getenv(
+    'ANALYSIS_JOBS_PATH',
+    os.path.join(os.path.dirname(__file__), 'database', 'jobs.db')
+)
+# Tempo após o qual um job 'running' sem resposta volta para a fila (worker morreu)
+JOB_LEASE_SECONDS = int(os.getenv('ANALYSIS_JOB_LEASE_SECONDS', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('ANALYSIS_JOB_MAX_ATTEMPTS', 3))
+
+
+class JobQueue:
+    """Fila de jobs de análise gravada em SQLite, sobrevivendo a reinícios do processo"""
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, lease_seconds: int = JOB_LEASE_SECONDS,
+                 max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Uma conexão por thread, em modo autocommit (transações explícitas no claim)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            apply_sqlite_pragmas(conn)
+            if not self._initialized:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS analysis_job ('
+                    'id TEXT PRIMARY KEY, status TEXT NOT NULL, '
+                    'user_id INTEGER, filename TEXT NOT NULL, job_description TEXT, job_profile_id INTEGER, '
+                    'file_content BLOB, '
+                    'result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, '
+                    'created_at REAL NOT NULL, started_at REAL, finished_at REAL)'
+                )
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS ix_analysis_job_status_created ON analysis_job (status, created_at)'
+                )
+                self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, file_content: bytes, filename: str, job_description: str = None,
+                user_id: Optional[int] = None, job_profile_id: Optional[int] = None) -> str:
+        """Grava o job na fila e devolve seu id"""
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            'INSERT INTO analysis_job '
+            '(id, status, user_id, filename, job_description, job_profile_id, file_content, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, 'queued', user_id, filename, job_description, job_profile_id, file_content, time.time())
+        )
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """Reserva o próximo job da fila para este worker.
+
+        Jobs 'running' cujo lease expirou (worker reiniciado ou morto) são retomados.
+        Um job que esgotou as tentativas é marcado como 'failed' e devolvido com
+        esse status, para o worker liberar a cota reservada no enqueue.
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id, user_id, filename, job_description, job_profile_id, file_content, attempts '
+                'FROM analysis_job '
+                "WHERE status = 'queued' OR (status = 'running' AND started_at < ?) "
+                'ORDER BY created_at LIMIT 1',
+                (now - self.lease_seconds,)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            if row['attempts'] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE analysis_job SET status = 'failed', error = ?, file_content = NULL, finished_at = ? "
+                    'WHERE id = ?',
+                    ('Número máximo de tentativas excedido', now, row['id'])
+                )
+                conn.execute('COMMIT')
+                return dict(row, status='failed')
+            conn.execute(
+                "UPDATE analysis_job SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (now, row['id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return dict(row, status='running')
+
+    def complete(self, job_id: str, result: Dict):
+        """Marca o job como concluído e descarta o arquivo armazenado"""
+        self._connection().execute(
+            "UPDATE analysis_job SET status = 'done', result = ?, file_content = NULL, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        """Marca o job como falho e descarta o arquivo armazenado"""
+        self._connection().execute(
+            "UPDATE analysis_job SET status = 'failed', error = ?, file_content = NULL, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id)
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Retorna status e resultado de um job"""
+        row = self._connection().execute(
+            'SELECT id, status, user_id, filename, result, error, created_at, started_at, finished_at '
+            'FROM analysis_job WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        def iso(timestamp):
+            return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(timestamp)) if timestamp else None
+
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'user_id': row['user_id'],
+            'filename': row['filename'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': iso(row['created_at']),
+            'started_at': iso(row['started_at']),
+            'finished_at': iso(row['finished_at'])
+        }
@@ -0,0 +1,53 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app, job_queue, release_quota, run_analysis
+from src.models.user import Analysis, JobProfile
+from src.polling_worker import run_workers
+
+# Quantidade de workers da fila, independente dos workers web
+ANALYSIS_JOB_WORKERS = int(os.getenv('ANALYSIS_JOB_WORKERS', 2))
+ANALYSIS_JOB_POLL_INTERVAL = float(os.getenv('ANALYSIS_JOB_POLL_INTERVAL', 0.5))
+
+
+def process_next_job() -> bool:
+    """Processa um job da fila. Retorna False se a fila estiver vazia"""
+    job = job_queue.claim()
+    if job is None:
+        return False
+
+    if job['status'] == 'failed':
+        # Tentativas esgotadas (worker morto em todas): devolve a cota reservada no enqueue,
+        # a menos que uma das tentativas tenha chegado a gravar a análise
+        if job['user_id']:
+            with app.app_context():
+                if Analysis.query.filter_by(queue_job_id=job['id']).first() is None:
+                    release_quota(job['user_id'])
+        return True
+
+    try:
+        with app.app_context():
+            job_profile = JobProfile.query.get(job['job_profile_id']) if job['job_profile_id'] else None
+            result = run_analysis(
+                bytes(job['file_content']),
+                job['filename'],
+                job['job_description'] or '',
+                job['user_id'],
+                job_profile,
+                queue_job_id=job['id']
+            )
+        job_queue.complete(job['id'], result)
+    except Exception as e:
+        job_queue.fail(job['id'], f'Erro na análise: {str(e)}')
+    return True
+
+
+def main():
+    run_workers(process_next_job, 'Workers da fila de análises assíncronas',
+                ANALYSIS_JOB_WORKERS, ANALYSIS_JOB_POLL_INTERVAL, 'analysis-worker')
+
+
+if __name__ == '__main__':
+    main()
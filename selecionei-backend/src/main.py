@@ -3,15 +3,31 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
-from src.models.user import db, User, Analysis, Payment
+from sqlalchemy.exc import IntegrityError
+from src.models.user import db, User, Analysis, AnalysisSkill, Payment, JobProfile, PlatformStats
+from src.models.migrations import init_db, seed_platform_stats
+from src.db_config import configure_database, read_only
 from src.routes.user import user_bp
-from src.ai_analyzer import IntelligentResumeAnalyzer
+from src.ai_analyzer import get_analyzer
 from src.mercado_pago import MercadoPagoIntegration
+from src.batch import BATCH_MAX_FILES, analyze_batch, expand_uploads
+from src.analysis_cache import AnalysisCache, hash_job_description
+from src.extraction_pool import ExtractionPoolBusy, ExtractionTimeout, get_extraction_pool
+from src.job_queue import JobQueue
+from src.webhook_queue import WebhookQueue
+from src.ranking import (RANK_DEFAULT_LIMIT, RANK_MAX_LIMIT, get_skill_vocabulary, rank_candidates,
+                         rank_stored_candidates)
+from src.skill_index import QuerySyntaxError, SkillIndex
+from src.pagination import HISTORY_DEFAULT_LIMIT, keyset_page, page_total, parse_fields
+from src.stats_cache import SingleFlightCache
+from src import metrics, profiling, uploads
+from src.uploads import ANALYZE_MAX_UPLOAD_MB, BATCH_MAX_UPLOAD_MB, RANK_MAX_UPLOAD_MB, upload_content, upload_limit
 import datetime
 import json
 import time
+from contextlib import closing
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'selecionei_secret_key_2024'
@@ -19,17 +35,224 @@ CORS(app)
 
 app.register_blueprint(user_bp, url_prefix='/api')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Database configuration (DATABASE_URL, DATABASE_READ_URL e pool em src/db_config.py)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+configure_database(app, db)
+metrics.init_app(app)
+# Uploads grandes em disco (mmap) e MAX_CONTENT_LENGTH; limites por endpoint com @upload_limit
+uploads.init_app(app)
+# Perfil sob demanda (PROFILING_ENABLED); None quando desligado
+profile_store = profiling.init_app(app)
 
 with app.app_context():
-    db.create_all()
+    for engine in db.engines.values():
+        metrics.instrument_engine(engine)
 
-# Inicializar IA e Mercado Pago
-ai_analyzer = IntelligentResumeAnalyzer()
+# Nada aqui abre conexão, importa extratores/SDK ou monta o analisador: tudo no primeiro uso.
+# O schema é criado por `python -m src.manage init-db` (ver init_database)
 mp_integration = MercadoPagoIntegration()
+analysis_cache = AnalysisCache()
+job_queue = JobQueue()
+# Notificações do Mercado Pago, processadas por `python -m src.payment_worker`
+webhook_queue = WebhookQueue()
+skill_index = SkillIndex()
+
+def load_platform_stats():
+    """Contadores da plataforma; em banco sem `init-db`, a linha é criada na primeira leitura"""
+    stats = PlatformStats.query.get(PlatformStats.ROW_ID)
+    if stats is None:
+        seed_platform_stats(db)
+        stats = PlatformStats.query.get(PlatformStats.ROW_ID)
+    if stats is None:
+        # Réplica de leitura ainda sem a linha recém-criada no banco principal
+        stats = PlatformStats(total_users=0, total_analyses=0)
+    return stats.to_dict()
+
+# Lido pela landing page a cada acesso: uma leitura da linha de contadores a cada STATS_CACHE_TTL
+platform_stats = SingleFlightCache(load_platform_stats)
+
+def init_database():
+    """Cria/atualiza o schema e preenche analysis_skill e platform_stats"""
+    with app.app_context():
+        init_db(db, {
+            skill.title(): category
+            for category, skills in get_analyzer().skills_database.items()
+            for skill in skills
+        })
+
+ALLOWED_EXTENSIONS = {'.pdf', '.txt', '.doc', '.docx'}
+
+def build_analysis_record(user_id, filename, job_description, analysis_result, processing_time,
+                          job_profile_id=None):
+    """Monta o registro de Analysis a partir do resultado da IA"""
+    return Analysis(
+        user_id=user_id,
+        filename=filename,
+        file_type=os.path.splitext(filename)[1].lower(),
+        # Com JobProfile, o texto da vaga fica só na tabela de vagas
+        job_description=None if job_profile_id else job_description,
+        job_profile_id=job_profile_id,
+        score=analysis_result['pontuacao_geral'],
+        experience_years=analysis_result['experiencia_anos'],
+        seniority_level=analysis_result['nivel_senioridade'],
+        education_level=analysis_result.get('educacao', ''),
+        job_compatibility=analysis_result.get('compatibilidade_vaga'),
+        skills_found=json.dumps(analysis_result['skills_tecnicas']),
+        strengths=json.dumps(analysis_result['pontos_fortes']),
+        interview_questions=json.dumps(analysis_result['perguntas_entrevista']),
+        summary=analysis_result['resumo'],
+        recommendation=analysis_result['recomendacao'],
+        processing_time=processing_time,
+        skills=AnalysisSkill.from_categories(user_id, job_profile_id, analysis_result['skills_por_categoria'])
+    )
+
+@metrics.stage('db.quota')
+def reserve_quota(user_id, count=1):
+    """Reserva até count análises da cota do usuário; retorna quantas foram reservadas.
+
+    A reserva é gravada antes da análise, então lotes e uploads simultâneos não
+    ultrapassam o limite do plano; o que não for usado volta com release_quota.
+    """
+    if count == 1:
+        reserved = User.query.filter(
+            User.id == user_id, User.analyses_used < User.analyses_limit
+        ).update({User.analyses_used: User.analyses_used + 1}, synchronize_session=False)
+        db.session.commit()
+        return reserved
+    
+    while True:
+        row = db.session.query(User.analyses_used, User.analyses_limit).filter_by(id=user_id).first()
+        reserved = min(count, max(0, row.analyses_limit - row.analyses_used)) if row else 0
+        if not reserved:
+            db.session.rollback()
+            return 0
+        # Só grava se o contador não mudou desde a leitura; senão tenta de novo
+        if User.query.filter(User.id == user_id, User.analyses_used == row.analyses_used).update(
+            {User.analyses_used: User.analyses_used + reserved}, synchronize_session=False
+        ):
+            db.session.commit()
+            return reserved
+        db.session.rollback()
+
+def release_quota(user_id, count=1):
+    """Devolve à cota análises reservadas que não foram concluídas"""
+    if not count:
+        return
+    User.query.filter(User.id == user_id, User.analyses_used >= count).update(
+        {User.analyses_used: User.analyses_used - count}, synchronize_session=False
+    )
+    db.session.commit()
+
+def quota_exceeded(user):
+    return jsonify({
+        'error': 'Limite de análises atingido',
+        'remaining': 0,
+        'plan': user.plan
+    }), 403
+
+def limit_to_quota(items, reserved, rejected):
+    """Mantém no lote só o que cabe na cota reservada; o excedente vai para rejected"""
+    for filename, _ in items[reserved:]:
+        rejected.append({'filename': filename, 'success': False, 'error': 'Limite de análises atingido'})
+    return items[:reserved]
+
+def save_analyses(owner_id, analyses):
+    """Grava vários registros de análise (cota já reservada) em um único commit; retorna os ids"""
+    if not analyses:
+        return []
+    with metrics.stage('db.save'):
+        db.session.add_all(analyses)
+        PlatformStats.increment(analyses=len(analyses))
+        db.session.flush()
+        # Lidos antes do commit, que expira os objetos e forçaria um SELECT por análise
+        ids = [analysis.id for analysis in analyses]
+        db.session.commit()
+    # O commit invalida o índice de skills: a próxima busca lê as análises novas do banco
+    return ids
+
+def skill_distribution(filter_clause, limit=None):
+    """Contagem de análises por skill, agregada no banco pelos índices de analysis_skill"""
+    count = db.func.count(AnalysisSkill.analysis_id)
+    query = db.session.query(AnalysisSkill.skill, AnalysisSkill.category, count).filter(
+        filter_clause
+    ).group_by(AnalysisSkill.skill, AnalysisSkill.category).order_by(count.desc(), AnalysisSkill.skill)
+    if limit:
+        query = query.limit(limit)
+    return [{'skill': skill, 'category': category, 'count': total} for skill, category, total in query]
+
+def resolve_job_profile(job_id, user_id=None):
+    """Busca a vaga compilada informada em job_id; retorna (vaga, resposta de erro)"""
+    if not job_id:
+        return None, None
+    job_profile = JobProfile.query.get(int(job_id))
+    if not job_profile or (user_id and job_profile.user_id != int(user_id)):
+        return None, (jsonify({'error': 'Vaga não encontrada'}), 404)
+    return job_profile, None
+
+def run_analysis(file_content, filename, job_description, user_id=None, job_profile=None, queue_job_id=None):
+    """Analisa o currículo e salva o resultado; usado pelo endpoint síncrono e pelos workers da fila.
+    
+    Com user_id, a cota já deve ter sido reservada com reserve_quota; se a análise
+    falhar, a reserva é devolvida. Com queue_job_id (workers da fila), um job
+    retomado depois de já ter gravado a análise não grava nem cobra de novo.
+    """
+    # Marcar tempo de início
+    start_time = time.time()
+    
+    # Lease do job expirou depois do commit da análise (worker morto antes de concluir o job)
+    if user_id and queue_job_id and Analysis.query.filter_by(queue_job_id=queue_job_id).first() is not None:
+        user_id = None
+    
+    try:
+        # Reaproveitar resultado se o mesmo arquivo já foi analisado para esta vaga
+        job_hash = job_profile.description_hash if job_profile else None
+        with metrics.stage('cache.lookup'):
+            cache_key = analysis_cache.make_key(file_content, job_description, get_analyzer().version, job_hash)
+            analysis_result = analysis_cache.get(cache_key)
+        cached = analysis_result is not None
+        
+        if not cached:
+            # Realizar análise com IA em um processo isolado, com limite de tempo
+            # (com JobProfile, a vaga já vai compilada e não é reprocessada)
+            analysis_result = get_extraction_pool().analyze(
+                file_content, 
+                filename, 
+                job_profile.compiled() if job_profile else (job_description if job_description else None)
+            )
+            with metrics.stage('cache.store'):
+                analysis_cache.put(cache_key, analysis_result)
+        
+        # Calcular tempo de processamento
+        processing_time = time.time() - start_time
+        
+        # Salvar análise no banco se usuário logado: registro e estatísticas em uma transação
+        if user_id:
+            analysis = build_analysis_record(
+                int(user_id), filename, job_description, analysis_result, processing_time,
+                job_profile.id if job_profile else None
+            )
+            analysis.queue_job_id = queue_job_id
+            with metrics.stage('db.save'):
+                db.session.add(analysis)
+                PlatformStats.increment(analyses=1)
+                db.session.commit()
+    except Exception as e:
+        if user_id:
+            db.session.rollback()
+            # Outro worker gravou a análise deste job ao mesmo tempo: a cota já foi usada
+            if not (queue_job_id and isinstance(e, IntegrityError)):
+                release_quota(int(user_id))
+        raise
+    
+    return {
+        'success': True,
+        'analysis': analysis_result,
+        'filename': filename,
+        'processed_at': datetime.datetime.now().isoformat(),
+        'processing_time': round(processing_time, 2),
+        'cached': cached,
+        'ai_version': '2.0'
+    }
 
 @app.route('/api/health')
 def health_check():
@@ -41,6 +264,7 @@ def health_check():
     })
 
 @app.route('/api/analyze', methods=['POST'])
+@upload_limit(ANALYZE_MAX_UPLOAD_MB)
 def analyze_resume_endpoint():
     try:
         # Verificar se há arquivo
@@ -52,14 +276,13 @@ def analyze_resume_endpoint():
             return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
         
         # Verificar tipo de arquivo
-        allowed_extensions = {'.pdf', '.txt', '.doc', '.docx'}
         file_ext = os.path.splitext(file.filename)[1].lower()
         
-        if file_ext not in allowed_extensions:
+        if file_ext not in ALLOWED_EXTENSIONS:
             return jsonify({'error': 'Tipo de arquivo não suportado. Use PDF, TXT, DOC ou DOCX'}), 400
         
-        # Ler conteúdo do arquivo
-        file_content = file.read()
+        # Conteúdo do arquivo: bytes, ou o upload em disco mapeado em memória (sem cópia)
+        file_content = upload_content(file)
         
         if len(file_content) == 0:
             return jsonify({'error': 'Arquivo vazio'}), 400
@@ -68,76 +291,434 @@ def analyze_resume_endpoint():
         user_id = request.form.get('user_id')
         job_description = request.form.get('job_description', '')
         
-        # Verificar limites se usuário logado
-        if user_id:
-            user = User.query.get(int(user_id))
-            if user and not user.can_analyze():
-                return jsonify({
-                    'error': 'Limite de análises atingido',
-                    'remaining': 0,
-                    'plan': user.plan
-                }), 403
-        
-        # Marcar tempo de início
-        start_time = time.time()
-        
-        # Realizar análise com IA
-        analysis_result = ai_analyzer.analyze_resume(
-            file_content, 
-            file.filename, 
-            job_description if job_description else None
-        )
-        
-        # Calcular tempo de processamento
-        processing_time = time.time() - start_time
+        # Vaga já cadastrada em /api/jobs substitui o texto avulso
+        job_profile, error = resolve_job_profile(request.form.get('job_id'), user_id)
+        if error:
+            return error
         
-        # Salvar análise no banco se usuário logado
-        if user_id:
+        # Reservar cota se usuário logado (um UPDATE condicional, sem ler o usuário)
+        if user_id and not reserve_quota(int(user_id)):
             user = User.query.get(int(user_id))
             if user:
-                # Criar registro da análise
-                analysis = Analysis(
-                    user_id=user.id,
-                    filename=file.filename,
-                    file_type=file_ext,
-                    job_description=job_description,
-                    score=analysis_result['pontuacao_geral'],
-                    experience_years=analysis_result['experiencia_anos'],
-                    seniority_level=analysis_result['nivel_senioridade'],
-                    education_level=analysis_result.get('educacao', ''),
-                    job_compatibility=analysis_result.get('compatibilidade_vaga'),
-                    skills_found=json.dumps(analysis_result['skills_tecnicas']),
-                    strengths=json.dumps(analysis_result['pontos_fortes']),
-                    interview_questions=json.dumps(analysis_result['perguntas_entrevista']),
-                    summary=analysis_result['resumo'],
-                    recommendation=analysis_result['recomendacao'],
-                    processing_time=processing_time
+                return quota_exceeded(user)
+            # Usuário inexistente: análise avulsa, sem salvar
+            user_id = None
+        
+        # Modo assíncrono: enfileira e devolve o id do job imediatamente
+        if request.form.get('async', '').lower() in ('1', 'true'):
+            try:
+                job_id = job_queue.enqueue(
+                    file_content, file.filename, job_description, int(user_id) if user_id else None,
+                    job_profile.id if job_profile else None
                 )
-                
-                # Incrementar contador de uso
-                user.analyses_used += 1
-                
-                db.session.add(analysis)
-                db.session.commit()
+            except Exception:
+                if user_id:
+                    release_quota(int(user_id))
+                raise
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/api/analyze/jobs/{job_id}'
+            }), 202
         
-        return jsonify({
-            'success': True,
-            'analysis': analysis_result,
-            'filename': file.filename,
+        try:
+            result = run_analysis(file_content, file.filename, job_description, user_id, job_profile)
+        except ExtractionTimeout as e:
+            return jsonify({'error': f'Erro na análise: {str(e)}'}), 422
+        except ExtractionPoolBusy as e:
+            return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+        
+        # ?timings=1: tempo (ms) de cada etapa desta requisição
+        if metrics.timings_requested():
+            result['timings'] = metrics.request_timings()
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+
+@app.route('/api/analyze/batch', methods=['POST'])
+@upload_limit(BATCH_MAX_UPLOAD_MB)
+def analyze_batch_endpoint():
+    """Analisa vários currículos (ou um ZIP) para uma mesma vaga, retornando NDJSON"""
+    try:
+        uploads = request.files.getlist('files') or request.files.getlist('file')
+        if not uploads:
+            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+        
+        items, rejected = expand_uploads(uploads, ALLOWED_EXTENSIONS)
+        if not items:
+            return jsonify({'error': 'Nenhum arquivo válido enviado', 'rejected': rejected}), 400
+        
+        if len(items) > BATCH_MAX_FILES:
+            return jsonify({'error': f'Máximo de {BATCH_MAX_FILES} arquivos por lote'}), 400
+        
+        user_id = request.form.get('user_id')
+        job_description = request.form.get('job_description', '')
+        
+        job_profile, error = resolve_job_profile(request.form.get('job_id'), user_id)
+        if error:
+            return error
+        
+        # Reservar cota se usuário logado: só entra no lote o que cabe na cota
+        owner_id = int(user_id) if user_id else None
+        if owner_id:
+            reserved = reserve_quota(owner_id, len(items))
+            if reserved:
+                items = limit_to_quota(items, reserved, rejected)
+            else:
+                user = User.query.get(owner_id)
+                if user:
+                    return quota_exceeded(user)
+                # Usuário inexistente: lote avulso, sem salvar
+                owner_id = None
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+    
+    
+    # A vaga é compilada uma única vez para o lote inteiro
+    if job_profile:
+        job_spec = job_profile.compiled()
+        job_hash = job_profile.description_hash
+        job_profile_id = job_profile.id
+    else:
+        job_spec = get_analyzer().compile_job_description(job_description) if job_description else None
+        job_hash = hash_job_description(job_description)
+        job_profile_id = None
+    
+    def generate():
+        for result in rejected:
+            yield json.dumps(result) + '\n'
+        
+        analyses = []
+        saved = 0
+        succeeded = 0
+        try:
+            # closing: cliente desconectado encerra o lote na hora e libera o pool
+            with closing(analyze_batch(items, job_spec, cache=analysis_cache,
+                                       version=get_analyzer().version, job_hash=job_hash)) as results:
+                for result in results:
+                    if result['success']:
+                        succeeded += 1
+                        if owner_id:
+                            analyses.append(build_analysis_record(
+                                owner_id, result['filename'], job_description,
+                                result['analysis'], result['processing_time'], job_profile_id
+                            ))
+                        result['processing_time'] = round(result['processing_time'], 2)
+                    yield json.dumps(result) + '\n'
+            
+            # Registros gravados de uma vez ao final do lote
+            saved = len(save_analyses(owner_id, analyses))
+        finally:
+            # Falhas (ou cliente desconectado no meio do lote) devolvem a cota reservada
+            if owner_id:
+                release_quota(owner_id, len(items) - saved)
+        
+        yield json.dumps({
+            'done': True,
+            'total': len(items) + len(rejected),
+            'succeeded': succeeded,
+            'failed': len(items) - succeeded + len(rejected),
             'processed_at': datetime.datetime.now().isoformat(),
-            'processing_time': round(processing_time, 2),
             'ai_version': '2.0'
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job_profile():
+    """Cadastra uma vaga, compilando a descrição uma única vez para as análises seguintes"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['user_id', 'description']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo {field} é obrigatório'}), 400
+        
+        if not data['description'].strip():
+            return jsonify({'error': 'Descrição da vaga está vazia'}), 400
+        
+        user = User.query.get(data['user_id'])
+        if not user:
+            return jsonify({'error': 'Usuário não encontrado'}), 404
+        
+        # Mesma descrição do mesmo usuário reaproveita a vaga já compilada
+        description_hash = hash_job_description(data['description'])
+        job_profile = JobProfile.query.filter_by(user_id=user.id, description_hash=description_hash).first()
+        
+        if not job_profile:
+            compiled = get_analyzer().compile_job_description(data['description'])
+            job_profile = JobProfile(
+                user_id=user.id,
+                title=data.get('title'),
+                description=data['description'],
+                description_hash=description_hash,
+                required_skills=json.dumps(compiled['skills']),
+                keywords=json.dumps(compiled['keywords'])
+            )
+            db.session.add(job_profile)
+            db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'job': job_profile.to_dict()
         })
         
     except Exception as e:
-        return jsonify({'error': f'Erro na análise: {str(e)}'}), 500
+        return jsonify({'error': f'Erro ao criar vaga: {str(e)}'}), 500
+
+@app.route('/api/jobs')
+def list_job_profiles():
+    """Lista as vagas de um usuário"""
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify({'error': 'Campo user_id é obrigatório'}), 400
+    
+    jobs = JobProfile.query.filter_by(user_id=user_id).order_by(JobProfile.created_at.desc()).all()
+    
+    return jsonify({
+        'success': True,
+        'jobs': [job.to_dict() for job in jobs],
+        'total': len(jobs)
+    })
+
+@app.route('/api/jobs/<int:job_id>')
+def get_job_profile(job_id):
+    job_profile = JobProfile.query.get(job_id)
+    if not job_profile:
+        return jsonify({'error': 'Vaga não encontrada'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job_profile.to_dict()
+    })
+
+@app.route('/api/jobs/<int:job_id>/skills')
+@read_only
+def get_job_skill_distribution(job_id):
+    """Distribuição de skills entre os candidatos analisados para a vaga"""
+    job_profile = JobProfile.query.get(job_id)
+    if not job_profile:
+        return jsonify({'error': 'Vaga não encontrada'}), 404
+    
+    total_candidates = Analysis.query.filter_by(job_profile_id=job_id).count()
+    skills = skill_distribution(AnalysisSkill.job_profile_id == job_id)
+    for item in skills:
+        item['percentage'] = round(item['count'] / total_candidates * 100, 1)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'total_candidates': total_candidates,
+        'skills': skills
+    })
+
+@app.route('/api/jobs/<int:job_id>/rank', methods=['POST'])
+@upload_limit(RANK_MAX_UPLOAD_MB)
+def rank_job_candidates(job_id):
+    """Ranqueia candidatos para a vaga: análises já salvas do usuário ou arquivos enviados agora"""
+    try:
+        job_profile = JobProfile.query.get(job_id)
+        if not job_profile:
+            return jsonify({'error': 'Vaga não encontrada'}), 404
+        
+        data = request.get_json(silent=True) or request.form
+        limit = max(1, min(int(data.get('limit', RANK_DEFAULT_LIMIT)), RANK_MAX_LIMIT))
+        offset = max(0, int(data.get('offset', 0)))
+        job = job_profile.compiled()
+        
+        uploads = request.files.getlist('files')
+        rejected = []
+        if uploads:
+            # Arquivos novos: analisados contra a vaga, salvos e contados na cota
+            items, rejected = expand_uploads(uploads, ALLOWED_EXTENSIONS)
+            if len(items) > BATCH_MAX_FILES:
+                return jsonify({'error': f'Máximo de {BATCH_MAX_FILES} arquivos por lote'}), 400
+            
+            owner_id = job_profile.user_id
+            reserved = reserve_quota(owner_id, len(items)) if items else 0
+            if items and not reserved:
+                owner = User.query.get(owner_id)
+                if not owner:
+                    return jsonify({'error': 'Usuário não encontrado'}), 404
+                return quota_exceeded(owner)
+            items = limit_to_quota(items, reserved, rejected)
+            
+            candidates = []
+            analyses = []
+            saved = []
+            try:
+                for result in analyze_batch(items, job, cache=analysis_cache, version=get_analyzer().version,
+                                            job_hash=job_profile.description_hash):
+                    if not result['success']:
+                        rejected.append(result)
+                        continue
+                    analysis_result = result['analysis']
+                    analyses.append(build_analysis_record(
+                        owner_id, result['filename'], None, analysis_result,
+                        result['processing_time'], job_profile.id
+                    ))
+                    # Todas as skills, não só o top 10 de skills_tecnicas
+                    skills = [skill for category_skills in analysis_result['skills_por_categoria'].values()
+                              for skill in category_skills]
+                    candidates.append({
+                        'filename': result['filename'],
+                        'skills': skills,
+                        'score': analysis_result['pontuacao_geral']
+                    })
+                saved = save_analyses(owner_id, analyses)
+            finally:
+                release_quota(owner_id, len(items) - len(saved))
+            
+            for candidate, analysis_id in zip(candidates, saved):
+                candidate['analysis_id'] = analysis_id
+            
+            total, ranked = rank_candidates(candidates, job, get_skill_vocabulary(), limit, offset)
+        else:
+            # Análises já salvas: compatibilidade agregada em SQL sobre analysis_skill
+            only_job = str(data.get('only_job', '')).lower() in ('1', 'true')
+            total, ranked = rank_stored_candidates(
+                job_profile.user_id, job, get_skill_vocabulary(), limit, offset,
+                job_profile.id if only_job else None
+            )
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_profile.id,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'candidates': ranked,
+            'rejected': rejected
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Erro ao ranquear candidatos: {str(e)}'}), 500
+
+@app.route('/api/candidates/search')
+@read_only
+def search_candidates():
+    """Busca candidatos já analisados por skills (ex.: 'python AND (aws OR azure) AND NOT php')"""
+    try:
+        user = User.query.get(request.args.get('user_id', type=int) or 0)
+        if not user:
+            return jsonify({'error': 'Usuário não encontrado'}), 404
+        
+        query = request.args.get('skills', '').strip()
+        if not query:
+            return jsonify({'error': 'Informe as skills da busca'}), 400
+        limit = max(1, min(request.args.get('limit', RANK_DEFAULT_LIMIT, type=int), RANK_MAX_LIMIT))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        
+        # Escopo: análises do próprio usuário ou de todos os usuários da mesma empresa
+        if request.args.get('scope') == 'company':
+            user_ids = [row.id for row in User.query.with_entities(User.id).filter_by(company=user.company)]
+        else:
+            user_ids = [user.id]
+        
+        index = skill_index.refresh()
+        matches = index.search(query, index.scope(user_ids))
+        ids = index.page(matches, limit, offset)
+        
+        rows = {}
+        if ids:
+            rows = {row.id: row for row in db.session.query(
+                Analysis.id, Analysis.user_id, Analysis.filename, Analysis.score,
+                Analysis.seniority_level, Analysis.skills_found, Analysis.created_at
+            ).filter(Analysis.id.in_(ids))}
+        
+        return jsonify({
+            'success': True,
+            'total': matches.bit_count(),
+            'limit': limit,
+            'offset': offset,
+            'candidates': [{
+                'analysis_id': row.id,
+                'user_id': row.user_id,
+                'filename': row.filename,
+                'score': row.score,
+                'seniority_level': row.seniority_level,
+                'skills_found': json.loads(row.skills_found) if row.skills_found else [],
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            } for row in (rows[analysis_id] for analysis_id in ids if analysis_id in rows)]
+        })
+        
+    except QuerySyntaxError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Erro na busca de candidatos: {str(e)}'}), 500
+
+@app.route('/api/analyze/jobs/<job_id>')
+def get_analysis_job(job_id):
+    """Retorna status e, quando concluído, o resultado de uma análise assíncrona"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Retorna contadores do cache de análises"""
+    return jsonify({
+        'success': True,
+        'cache': analysis_cache.stats()
+    })
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Métricas do processo no formato texto do Prometheus"""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+def profiles_unavailable():
+    """Erro para os endpoints de perfil: desligados, sem PROFILING_TOKEN configurado ou sem o token no X-Profile"""
+    # Sem token (ex.: só amostragem), os perfis ficam em disco mas não são expostos pela API
+    if profile_store is None or not profiling.PROFILING_TOKEN:
+        return jsonify({'error': 'Perfil de requisições desativado'}), 404
+    if not profiling.token_matches(request.headers.get(profiling.PROFILE_HEADER)):
+        return jsonify({'error': 'Acesso negado'}), 403
+    return None
+
+@app.route('/api/profiles')
+def list_profiles():
+    """Perfis mais recentes, com as funções que mais consumiram tempo"""
+    error = profiles_unavailable()
+    if error:
+        return error
+    limit = min(max(request.args.get('limit', 20, type=int), 1), profile_store.max_files)
+    return jsonify({'profiles': profile_store.list(limit)})
+
+@app.route('/api/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Resumo de um perfil; com ?format=pstats, o arquivo para pstats/snakeviz"""
+    error = profiles_unavailable()
+    if error:
+        return error
+    if request.args.get('format') == 'pstats':
+        path = profile_store.pstats_path(profile_id)
+        if path:
+            return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                             download_name=f'{profile_id}.prof')
+    else:
+        summary = profile_store.get(profile_id)
+        if summary:
+            return jsonify(summary)
+    return jsonify({'error': 'Perfil não encontrado'}), 404
 
 @app.route('/api/stats')
+@read_only
 def get_stats():
     """Retorna estatísticas da plataforma"""
-    # Buscar estatísticas reais do banco
-    total_users = User.query.count()
-    total_analyses = User.query.with_entities(db.func.sum(User.analyses_used)).scalar() or 0
+    # Contadores materializados, lidos no máximo uma vez por STATS_CACHE_TTL
+    stats = platform_stats.get()
+    total_users = stats['total_users']
+    total_analyses = stats['total_analyses']
     
     return jsonify({
         'total_analyses': int(total_analyses) + 4200,  # Base + real
@@ -174,6 +755,7 @@ def register():
         new_user.set_password(data['password'])
         
         db.session.add(new_user)
+        PlatformStats.increment(users=1)
         db.session.commit()
         
         return jsonify({
@@ -212,23 +794,62 @@ def login():
         return jsonify({'error': f'Erro no login: {str(e)}'}), 500
 
 @app.route('/api/user/<int:user_id>/analyses')
+@read_only
 def get_user_analyses(user_id):
     try:
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        analyses = Analysis.query.filter_by(user_id=user_id).order_by(Analysis.created_at.desc()).all()
+        query = Analysis.query.filter_by(user_id=user_id)
         
-        return jsonify({
+        # ?skill=python&skill=aws: só análises com todas as skills pedidas
+        skills = list(dict.fromkeys(skill.strip().title() for skill in request.args.getlist('skill') if skill.strip()))
+        if skills:
+            matching = db.session.query(AnalysisSkill.analysis_id).filter(
+                AnalysisSkill.user_id == user_id,
+                AnalysisSkill.skill.in_(skills)
+            ).group_by(AnalysisSkill.analysis_id).having(db.func.count() == len(skills))
+            query = query.filter(Analysis.id.in_(matching))
+        
+        # Página a página: ?limit=&cursor=<next_cursor da página anterior>&fields=id,filename,score
+        # ('total' só na primeira página, ou em qualquer uma com &include_total=1)
+        fields = parse_fields(request.args.get('fields'), Analysis)
+        cursor = request.args.get('cursor')
+        total = page_total(query, cursor, request.args.get('include_total'))
+        analyses, next_cursor = keyset_page(
+            query, Analysis, cursor, request.args.get('limit', HISTORY_DEFAULT_LIMIT, type=int), fields
+        )
+        
+        response = {
             'success': True,
-            'analyses': [analysis.to_dict() for analysis in analyses],
-            'total': len(analyses)
-        })
+            'analyses': [analysis.to_dict(fields) for analysis in analyses],
+            'next_cursor': next_cursor
+        }
+        if total is not None:
+            response['total'] = total
+        return jsonify(response)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Erro ao buscar análises: {str(e)}'}), 500
 
+@app.route('/api/user/<int:user_id>/skills')
+@read_only
+def get_user_top_skills(user_id):
+    """Skills mais frequentes entre os candidatos analisados pelo usuário"""
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'Usuário não encontrado'}), 404
+    
+    limit = max(1, min(request.args.get('limit', RANK_DEFAULT_LIMIT, type=int), RANK_MAX_LIMIT))
+    
+    return jsonify({
+        'success': True,
+        'skills': skill_distribution(AnalysisSkill.user_id == user_id, limit)
+    })
+
 # ENDPOINTS DE PAGAMENTO
 
 @app.route('/api/plans')
@@ -279,6 +900,7 @@ def create_payment():
                 plan=plan,
                 amount=plan_info['price'],
                 preference_id=payment_result['preference_id'],
+                external_reference=payment_result['external_reference'],
                 status='pending'
             )
             
@@ -291,73 +913,162 @@ def create_payment():
                 'preference_id': payment_result['preference_id'],
                 'plan_info': payment_result['plan_info']
             })
+        elif payment_result.get('unavailable'):
+            # Circuit breaker aberto: responde na hora, sem ocupar o worker esperando o provedor
+            return jsonify(payment_result), 503, {'Retry-After': str(payment_result['retry_after'])}
         else:
             return jsonify(payment_result), 400
             
     except Exception as e:
         return jsonify({'error': f'Erro ao criar pagamento: {str(e)}'}), 500
 
+def user_id_from_reference(external_reference):
+    """user_id do external_reference (formato: user_123_plan_timestamp[_sufixo])"""
+    parts = (external_reference or '').split('_')
+    if len(parts) >= 2 and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+# Ordem dos estados de um mesmo pagamento, para notificações sem date_last_updated
+PAYMENT_STATUS_PRECEDENCE = {'unknown': 0, 'pending': 0, 'rejected': 1, 'cancelled': 1, 'approved': 2, 'refunded': 3}
+
+def mp_timestamp(value):
+    """Data ISO 8601 do MP (com fuso) em UTC sem fuso, como as demais colunas"""
+    if not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment
+
+def find_notified_payment(payment_id, external_reference):
+    """Pagamento local de uma notificação, ou o resultado 'ignored' se não houver"""
+    # Índices únicos: o pagamento notificado, não o pendente mais recente do usuário
+    payment = None
+    if external_reference:
+        payment = Payment.query.filter_by(external_reference=external_reference).first()
+    if payment is None:
+        payment = Payment.query.filter_by(payment_id=payment_id).first()
+    if payment is None:
+        # Pagamentos criados antes de external_reference ser gravado
+        user_id = user_id_from_reference(external_reference)
+        if user_id is None:
+            return {'action': 'ignored', 'reason': 'external_reference inválido'}
+        # Filtrar external_reference no SQL levaria o SQLite ao índice único (IS NULL), não ao do usuário
+        payment = Payment.query.filter_by(
+            user_id=user_id,
+            status='pending'
+        ).order_by(Payment.created_at.desc()).first()
+        if payment is None or payment.external_reference is not None:
+            return {'action': 'ignored', 'reason': 'pagamento não encontrado'}
+    return payment
+
+def is_stale_payment_update(payment, payment_id, status, updated_at):
+    """Notificação mais antiga que o estado já gravado (as buscas na API podem terminar fora de ordem)"""
+    if payment.payment_id not in (None, payment_id) and payment.status in ('approved', 'refunded'):
+        # Outra tentativa na mesma referência não substitui o pagamento que liberou o plano
+        return True
+    if updated_at and payment.status_updated_at:
+        return updated_at < payment.status_updated_at
+    return (payment.payment_id == payment_id and
+            PAYMENT_STATUS_PRECEDENCE.get(status, 0) < PAYMENT_STATUS_PRECEDENCE.get(payment.status, 0))
+
+def apply_payment_update(payment_info):
+    """Aplica o estado atual de um pagamento do MP (chamado pelo payment_worker).
+
+    Idempotente: reaplicar o mesmo estado não muda nada, e o plano só é
+    atualizado na transição para 'approved'. Um estado mais antigo que o
+    gravado (ex.: 'pending' buscado antes, aplicado depois do 'approved') é ignorado.
+    """
+    payment_id = str(payment_info['payment_id'])
+    status = mp_integration.validate_payment_status(payment_info['status'])
+    updated_at = mp_timestamp(payment_info.get('date_last_updated'))
+
+    while True:
+        payment = find_notified_payment(payment_id, payment_info.get('external_reference'))
+        if isinstance(payment, dict):
+            return payment
+
+        if payment.payment_id == payment_id and payment.status == status:
+            return {'action': 'unchanged', 'payment': payment.id, 'status': status}
+        if is_stale_payment_update(payment, payment_id, status, updated_at):
+            return {'action': 'ignored', 'reason': 'notificação fora de ordem', 'payment': payment.id,
+                    'status': payment.status}
+
+        # Condicionada ao estado lido: se outro worker gravou antes, decide de novo sobre o novo estado
+        previous_status = payment.status
+        written = Payment.query.filter_by(
+            id=payment.id, status=previous_status, payment_id=payment.payment_id
+        ).update({
+            'payment_id': payment_id,
+            'status': status,
+            'status_updated_at': updated_at,
+            'payment_method': payment_info.get('payment_method'),
+            'payment_type': payment_info.get('payment_type'),
+            'updated_at': datetime.datetime.utcnow()
+        }, synchronize_session=False)
+        if written:
+            break
+        db.session.rollback()
+
+    if status == 'approved' and previous_status != 'approved':
+        user = User.query.get(payment.user_id)
+        if user:
+            user.upgrade_plan(payment.plan)
+
+    with metrics.stage('db.save'):
+        db.session.commit()
+    return {'action': 'updated', 'payment': payment.id, 'previous_status': previous_status, 'status': status}
+
 @app.route('/api/payment/webhook', methods=['POST'])
 def payment_webhook():
+    """Só registra a notificação na fila, deduplicada por payment_id, e responde na hora"""
     try:
-        webhook_data = request.get_json()
-        
-        # Processar webhook
-        result = mp_integration.process_webhook(webhook_data)
-        
-        if result['success'] and result.get('action') == 'payment_update':
-            payment_info = result['payment_info']
-            
-            # Buscar pagamento no banco pelo external_reference
-            external_ref = payment_info.get('external_reference', '')
-            if external_ref:
-                # Extrair user_id do external_reference (formato: user_123_plan_timestamp)
-                parts = external_ref.split('_')
-                if len(parts) >= 2:
-                    user_id = int(parts[1])
-                    
-                    # Buscar pagamento pendente do usuário
-                    payment = Payment.query.filter_by(
-                        user_id=user_id,
-                        status='pending'
-                    ).order_by(Payment.created_at.desc()).first()
-                    
-                    if payment:
-                        # Atualizar status do pagamento
-                        payment.payment_id = payment_info['payment_id']
-                        payment.status = mp_integration.validate_payment_status(payment_info['status'])
-                        payment.payment_method = payment_info.get('payment_method')
-                        payment.payment_type = payment_info.get('payment_type')
-                        
-                        # Se pagamento aprovado, atualizar plano do usuário
-                        if payment.status == 'approved':
-                            user = User.query.get(user_id)
-                            if user:
-                                user.upgrade_plan(payment.plan)
-                        
-                        db.session.commit()
-        
-        return jsonify({'status': 'ok'})
-        
+        webhook_data = request.get_json(silent=True) or {}
+        payment_id = mp_integration.payment_id_from_webhook(webhook_data, request.args)
+
+        if payment_id is None:
+            metrics.PAYMENT_WEBHOOKS.inc('ignored')
+            return jsonify({'status': 'ignored'})
+
+        queued = webhook_queue.enqueue(payment_id)
+        metrics.PAYMENT_WEBHOOKS.inc('queued' if queued else 'duplicate')
+        return jsonify({'status': 'queued' if queued else 'duplicate'})
+
     except Exception as e:
-        print(f"Erro no webhook: {str(e)}")
+        app.logger.exception('Erro no webhook')
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/user/<int:user_id>/payments')
+@read_only
 def get_user_payments(user_id):
     try:
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        payments = Payment.query.filter_by(user_id=user_id).order_by(Payment.created_at.desc()).all()
+        query = Payment.query.filter_by(user_id=user_id)
+        fields = parse_fields(request.args.get('fields'), Payment)
+        cursor = request.args.get('cursor')
+        total = page_total(query, cursor, request.args.get('include_total'))
+        payments, next_cursor = keyset_page(
+            query, Payment, cursor, request.args.get('limit', HISTORY_DEFAULT_LIMIT, type=int), fields
+        )
         
-        return jsonify({
+        response = {
             'success': True,
-            'payments': [payment.to_dict() for payment in payments],
-            'total': len(payments)
-        })
+            'payments': [payment.to_dict(fields) for payment in payments],
+            'next_cursor': next_cursor
+        }
+        if total is not None:
+            response['total'] = total
+        return jsonify(response)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': f'Erro ao buscar pagamentos: {str(e)}'}), 500
 
@@ -378,5 +1089,7 @@ def serve(path):
             return "index.html not found", 404
 
 if __name__ == '__main__':
+    # Servidor de desenvolvimento: garante o schema antes de subir
+    init_database()
     app.run(host='0.0.0.0', port=5001, debug=True)
 
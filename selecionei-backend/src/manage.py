@@ -0,0 +1,133 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import json
+import re
+import subprocess
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def init_db_command(args):
+    """Cria/atualiza o schema; rodar no deploy antes de subir os workers"""
+    from src.main import init_database
+    from src.models.migrations import DuplicateValuesError
+
+    start = time.perf_counter()
+    try:
+        init_database()
+    except DuplicateValuesError as error:
+        sys.exit(f'Migração abortada: {error}')
+    print(f'Banco inicializado em {time.perf_counter() - start:.2f}s')
+
+
+def import_times() -> list:
+    """Tempo de importação de src.main por módulo (python -X importtime em um processo limpo)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.main'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'falha ao importar')
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append({
+            'module': name,
+            # Nível 0: importado direto por `import src.main`; cada nível a mais são 2 espaços
+            'depth': (len(indent) - 1) // 2,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    return modules
+
+
+def summarize_imports(modules: list, top: int) -> dict:
+    """Módulos do app (src.*) e pacotes externos que mais pesam na importação"""
+    own = [module for module in modules if module['module'].startswith('src.') or module['module'] == 'src']
+    # O tempo acumulado da linha do pacote (sem ponto) já inclui os submódulos
+    packages = {
+        module['module']: module['cumulative_ms']
+        for module in modules if '.' not in module['module'] and module['module'] != 'src'
+    }
+    total = next((module['cumulative_ms'] for module in modules if module['module'] == 'src.main'), 0.0)
+    return {
+        'total_ms': total,
+        'app_modules': sorted(own, key=lambda m: m['self_ms'], reverse=True)[:top],
+        'packages': sorted(({'package': name, 'cumulative_ms': ms} for name, ms in packages.items()),
+                           key=lambda p: p['cumulative_ms'], reverse=True)[:top]
+    }
+
+
+def initialization_times() -> list:
+    """Custo da importação do app e de cada inicialização adiada, medidos neste processo"""
+    steps = []
+
+    def step(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        steps.append({'step': name, 'ms': round((time.perf_counter() - start) * 1000, 3)})
+        return result
+
+    main = step('import src.main', lambda: __import__('src.main', fromlist=['app']))
+    client = main.app.test_client()
+    step('primeira requisição (/api/health)', lambda: client.get('/api/health'))
+
+    from src.ai_analyzer import get_analyzer
+    from src.ranking import get_skill_vocabulary
+    analyzer = step('analisador (get_analyzer)', get_analyzer)
+    step('vocabulário do ranking', get_skill_vocabulary)
+    step('extrator PDF (PyPDF2)', lambda: __import__('PyPDF2'))
+    step('extrator DOCX (python-docx)', lambda: __import__('docx'))
+    step('SDK do Mercado Pago', lambda: main.mp_integration.sdk)
+    step('primeira análise de texto', lambda: analyzer.analyze_resume('Python Django AWS 5 anos'.encode(), 'cv.txt'))
+    return steps
+
+
+def startup_report_command(args):
+    """Relatório do tempo de subida: importação por módulo e inicializações adiadas"""
+    imports = summarize_imports(import_times(), args.top)
+    report = {'imports': imports, 'initialization': initialization_times()}
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Importação de src.main: {imports['total_ms']:.1f} ms (processo limpo)\n")
+    print('Módulos do app (tempo próprio / acumulado, ms)')
+    for module in imports['app_modules']:
+        print(f"  {module['module']:40s} {module['self_ms']:9.1f} {module['cumulative_ms']:9.1f}")
+    print('\nPacotes externos, stdlib e terceiros (acumulado, ms)')
+    for package in imports['packages']:
+        print(f"  {package['package']:40s} {package['cumulative_ms']:9.1f}")
+    print('\nInicialização (ms)')
+    for step in report['initialization']:
+        print(f"  {step['step']:40s} {step['ms']:9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Comandos de administração do Selecionei')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('init-db', help='Cria/atualiza o schema do banco').set_defaults(handler=init_db_command)
+
+    report = commands.add_parser('startup-report', help='Tempo de importação e inicialização por módulo')
+    report.add_argument('--json', action='store_true', help='Saída em JSON')
+    report.add_argument('--top', type=int, default=15, help='Quantos módulos/pacotes listar')
+    report.set_defaults(handler=startup_report_command)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,40 @@
-import mercadopago
 import os
+import threading
+import uuid
 from datetime import datetime
 from typing import Dict, Optional
 
+from src.metrics import stage
+
+# URL base da API; em testes, a do servidor falso (src/mercado_pago_fake.py)
+MERCADO_PAGO_API_URL = os.getenv('MERCADO_PAGO_API_URL', '')
+
+
+class CircuitOpenError(Exception):
+    """API do Mercado Pago com taxa de erro alta: chamada recusada sem ir à rede"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f'Mercado Pago indisponível, nova tentativa em {retry_after:.0f}s')
+        self.retry_after = retry_after
+
+
+def unavailable(error: CircuitOpenError) -> Dict:
+    return {
+        'success': False,
+        'error': 'Mercado Pago temporariamente indisponível',
+        'unavailable': True,
+        'retry_after': int(error.retry_after + 0.5)
+    }
+
 class MercadoPagoIntegration:
     """Integração com Mercado Pago para processamento de pagamentos"""
     
-    def __init__(self, access_token: str = None):
+    def __init__(self, access_token: str = None, api_url: str = None):
         # Token de acesso (usar variável de ambiente em produção)
         self.access_token = access_token or os.getenv('MERCADO_PAGO_ACCESS_TOKEN', 'TEST-ACCESS-TOKEN')
-        self.sdk = mercadopago.SDK(self.access_token)
+        self.api_url = api_url or MERCADO_PAGO_API_URL
+        self._sdk = None
+        self._sdk_lock = threading.Lock()
         
         # Configurações dos planos
         self.plans = {
@@ -33,6 +58,21 @@ class MercadoPagoIntegration:
             }
         }
 
+    @property
+    def sdk(self):
+        """Cliente do SDK, criado (e o pacote mercadopago importado) só na primeira chamada de pagamento.
+
+        Usa o PooledHttpClient (src/mercado_pago_http.py): conexões reaproveitadas,
+        timeouts curtos e circuit breaker compartilhados por todas as chamadas do processo.
+        """
+        if self._sdk is None:
+            with self._sdk_lock:
+                if self._sdk is None:
+                    import mercadopago
+                    from src.mercado_pago_http import PooledHttpClient
+                    self._sdk = mercadopago.SDK(self.access_token, http_client=PooledHttpClient(self.api_url))
+        return self._sdk
+
     def create_preference(self, user_data: Dict, plan: str, success_url: str = None, 
                          failure_url: str = None, pending_url: str = None) -> Dict:
         """Cria uma preferência de pagamento no Mercado Pago"""
@@ -69,7 +109,8 @@ class MercadoPagoIntegration:
                 "pending": pending_url or f"{base_url}/payment/pending"
             },
             "auto_return": "approved",
-            "external_reference": f"user_{user_data.get('id')}_{plan}_{int(datetime.now().timestamp())}",
+            # Único por pagamento (índice único em Payment.external_reference)
+            "external_reference": f"user_{user_data.get('id')}_{plan}_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:8]}",
             "notification_url": f"{base_url}/api/payment/webhook",
             "statement_descriptor": "SELECIONEI",
             "expires": True,
@@ -78,7 +119,8 @@ class MercadoPagoIntegration:
         }
         
         try:
-            preference_response = self.sdk.preference().create(preference_data)
+            with stage('mercadopago.create_preference'):
+                preference_response = self.sdk.preference().create(preference_data)
             
             if preference_response["status"] == 201:
                 return {
@@ -95,6 +137,8 @@ class MercadoPagoIntegration:
                     'details': preference_response
                 }
                 
+        except CircuitOpenError as e:
+            return unavailable(e)
         except Exception as e:
             return {
                 'success': False,
@@ -104,7 +148,8 @@ class MercadoPagoIntegration:
     def get_payment_info(self, payment_id: str) -> Dict:
         """Busca informações de um pagamento específico"""
         try:
-            payment_response = self.sdk.payment().get(payment_id)
+            with stage('mercadopago.get_payment'):
+                payment_response = self.sdk.payment().get(payment_id)
             
             if payment_response["status"] == 200:
                 payment_data = payment_response["response"]
@@ -121,7 +166,8 @@ class MercadoPagoIntegration:
                     'external_reference': payment_data.get('external_reference'),
                     'payer_email': payment_data.get('payer', {}).get('email'),
                     'date_created': payment_data.get('date_created'),
-                    'date_approved': payment_data.get('date_approved')
+                    'date_approved': payment_data.get('date_approved'),
+                    'date_last_updated': payment_data.get('date_last_updated')
                 }
             else:
                 return {
@@ -129,51 +175,27 @@ class MercadoPagoIntegration:
                     'error': 'Pagamento não encontrado'
                 }
                 
+        except CircuitOpenError as e:
+            return unavailable(e)
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Erro ao buscar pagamento: {str(e)}'
             }
 
-    def process_webhook(self, webhook_data: Dict) -> Dict:
-        """Processa webhook do Mercado Pago"""
-        try:
-            # Verificar se é notificação de pagamento
-            if webhook_data.get('type') == 'payment':
-                payment_id = webhook_data.get('data', {}).get('id')
-                
-                if payment_id:
-                    # Buscar informações do pagamento
-                    payment_info = self.get_payment_info(str(payment_id))
-                    
-                    if payment_info['success']:
-                        return {
-                            'success': True,
-                            'action': 'payment_update',
-                            'payment_info': payment_info
-                        }
-                    else:
-                        return {
-                            'success': False,
-                            'error': 'Erro ao processar webhook'
-                        }
-                else:
-                    return {
-                        'success': False,
-                        'error': 'ID do pagamento não encontrado no webhook'
-                    }
-            else:
-                return {
-                    'success': True,
-                    'action': 'ignored',
-                    'message': 'Tipo de webhook não processado'
-                }
-                
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'Erro ao processar webhook: {str(e)}'
-            }
+    def payment_id_from_webhook(self, webhook_data: Dict, query_args: Dict = None) -> Optional[str]:
+        """ID do pagamento notificado (webhook em JSON ou IPN com topic/id na query string).
+
+        Retorna None para notificações que não são de pagamento.
+        """
+        query_args = query_args or {}
+        kind = (webhook_data.get('type') or webhook_data.get('topic')
+                or query_args.get('type') or query_args.get('topic'))
+        if kind != 'payment':
+            return None
+        data = webhook_data.get('data') or {}
+        payment_id = data.get('id') or query_args.get('data.id') or query_args.get('id')
+        return str(payment_id) if payment_id else None
 
     def get_plan_info(self, plan: str) -> Optional[Dict]:
         """Retorna informações de um plano específico"""
@@ -217,6 +239,7 @@ class MercadoPagoIntegration:
                     'success': True,
                     'payment_url': preference['init_point'],
                     'preference_id': preference['preference_id'],
+                    'external_reference': preference['external_reference'],
                     'plan_info': self.plans[plan]
                 }
             else:
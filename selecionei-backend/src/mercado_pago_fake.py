@@ -0,0 +1,195 @@
+"""Servidor HTTP falso da API do Mercado Pago, para testes locais da integração.
+
+Atende as rotas usadas por MercadoPagoIntegration (criar preferência e buscar
+pagamento) a partir de um dicionário em memória, com latência e falhas
+configuráveis. Aponte o app para ele com MERCADO_PAGO_API_URL:
+
+    python -m src.mercado_pago_fake --port 8099
+    MERCADO_PAGO_API_URL=http://127.0.0.1:8099 python src/main.py
+
+Em testes, use FakeMercadoPago como gerenciador de contexto.
+"""
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+PAYMENT_PATH = re.compile(r'^/v1/payments/([^/?]+)')
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Cliente que desistiu por timeout: esperado nos testes de latência
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeMercadoPago:
+    """API falsa em uma thread: pagamentos em memória, latência e falhas injetáveis"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.payments: Dict[str, Dict] = {}
+        self.preferences: Dict[str, Dict] = {}
+        self.latency = latency
+        # Requisições recebidas por rota ('GET /v1/payments', 'POST /checkout/preferences')
+        self.requests = Counter()
+        # Conexões TCP aceitas (com keep-alive, bem menos que as requisições)
+        self.connections = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = _QuietServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeMercadoPago':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-mercadopago', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def add_payment(self, payment_id, status: str = 'approved', external_reference: str = None,
+                    amount: float = 97.0, **fields) -> Dict:
+        """Cadastra (ou atualiza) um pagamento devolvido por GET /v1/payments/<id>"""
+        payment = {
+            'id': int(payment_id) if str(payment_id).isdigit() else payment_id,
+            'status': status,
+            'status_detail': 'accredited' if status == 'approved' else status,
+            'transaction_amount': amount,
+            'currency_id': 'BRL',
+            'payment_method_id': 'pix',
+            'payment_type_id': 'bank_transfer',
+            'external_reference': external_reference,
+            'payer': {'email': 'comprador@teste.com'},
+            'date_created': datetime.now().isoformat(),
+            'date_approved': datetime.now().isoformat() if status == 'approved' else None,
+            'date_last_updated': datetime.now().isoformat()
+        }
+        payment.update(fields)
+        with self._lock:
+            self.payments[str(payment_id)] = payment
+        return payment
+
+    def fail_next(self, count: int = 1, status: int = 500, delay: float = 0.0):
+        """As próximas count requisições respondem com status (ou só atrasam delay segundos, se status=0)"""
+        with self._lock:
+            self._failures.extend([(status, delay)] * count)
+
+    def _next_failure(self) -> Optional[tuple]:
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def _send(self, status: int, body: Dict):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _prepare(self, route: str) -> bool:
+                """Conta a requisição e aplica latência/falha injetada; False se já respondeu"""
+                with fake._lock:
+                    fake.requests[route] += 1
+                failure = fake._next_failure()
+                time.sleep(fake.latency + (failure[1] if failure else 0))
+                if failure and failure[0]:
+                    self._send(failure[0], {'message': 'falha simulada', 'status': failure[0]})
+                    return False
+                return True
+
+            def do_GET(self):
+                match = PAYMENT_PATH.match(self.path)
+                if not match:
+                    self._send(404, {'message': 'resource not found', 'status': 404})
+                    return
+                if not self._prepare('GET /v1/payments'):
+                    return
+                with fake._lock:
+                    payment = fake.payments.get(match.group(1))
+                if payment is None:
+                    self._send(404, {'message': 'Payment not found', 'status': 404})
+                else:
+                    self._send(200, payment)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if not self.path.startswith('/checkout/preferences'):
+                    self._send(404, {'message': 'resource not found', 'status': 404})
+                    return
+                if not self._prepare('POST /checkout/preferences'):
+                    return
+                preference_id = f'fake-{uuid.uuid4().hex[:12]}'
+                preference = dict(body, id=preference_id,
+                                  init_point=f'{fake.url}/checkout?pref_id={preference_id}',
+                                  sandbox_init_point=f'{fake.url}/sandbox/checkout?pref_id={preference_id}')
+                with fake._lock:
+                    fake.preferences[preference_id] = preference
+                self._send(201, preference)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor falso da API do Mercado Pago')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0, help='Atraso de cada resposta, em segundos')
+    parser.add_argument('--approved', nargs='*', default=[], metavar='PAYMENT_ID=EXTERNAL_REFERENCE',
+                        help='Pagamentos aprovados disponíveis, ex.: 123=user_1_starter_1700000000')
+    args = parser.parse_args()
+
+    fake = FakeMercadoPago(args.host, args.port, args.latency)
+    for item in args.approved:
+        payment_id, _, reference = item.partition('=')
+        fake.add_payment(payment_id, external_reference=reference or None)
+    print(f'Mercado Pago falso em {fake.url}')
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Camada HTTP do SDK do Mercado Pago: pool de conexões, timeouts, retries e circuit breaker.
+
+O HttpClient padrão do SDK abre uma sessão nova por chamada (sem keep-alive) e
+usa timeout de 60s. Este cliente mantém uma sessão compartilhada, separa os
+timeouts de conexão e de leitura e, quando a taxa de erro da API passa do
+limite, falha na hora (CircuitOpenError) em vez de prender os workers web.
+
+Importado só na criação do SDK (MercadoPagoIntegration.sdk).
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from mercadopago.config import Config
+from mercadopago.errors.exceptions import MPServerError
+from mercadopago.http import HttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from src.mercado_pago import CircuitOpenError
+from src.metrics import (MERCADO_PAGO_CIRCUIT_OPEN, MERCADO_PAGO_DURATION, MERCADO_PAGO_REQUESTS,
+                         MERCADO_PAGO_RETRIES)
+
+MERCADO_PAGO_CONNECT_TIMEOUT = float(os.getenv('MERCADO_PAGO_CONNECT_TIMEOUT', 2))
+MERCADO_PAGO_READ_TIMEOUT = float(os.getenv('MERCADO_PAGO_READ_TIMEOUT', 8))
+# Conexões mantidas abertas para a API (por host)
+MERCADO_PAGO_POOL_SIZE = int(os.getenv('MERCADO_PAGO_POOL_SIZE', 10))
+# Retries de GET em erro de rede, 429 e 5xx; POST só é repetido se a conexão nem abriu
+MERCADO_PAGO_MAX_RETRIES = int(os.getenv('MERCADO_PAGO_MAX_RETRIES', 2))
+MERCADO_PAGO_RETRY_BACKOFF = float(os.getenv('MERCADO_PAGO_RETRY_BACKOFF', 0.2))
+# Abre o circuito com pelo menos MIN_CALLS chamadas na janela e taxa de erro >= FAILURE_RATE
+MERCADO_PAGO_BREAKER_FAILURE_RATE = float(os.getenv('MERCADO_PAGO_BREAKER_FAILURE_RATE', 0.5))
+MERCADO_PAGO_BREAKER_MIN_CALLS = int(os.getenv('MERCADO_PAGO_BREAKER_MIN_CALLS', 10))
+MERCADO_PAGO_BREAKER_WINDOW_SECONDS = float(os.getenv('MERCADO_PAGO_BREAKER_WINDOW_SECONDS', 30))
+MERCADO_PAGO_BREAKER_OPEN_SECONDS = float(os.getenv('MERCADO_PAGO_BREAKER_OPEN_SECONDS', 30))
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+DEFAULT_API_URL = Config().api_base_url
+
+# Nome da operação nas métricas (rotas não listadas: método e caminho sem ids)
+OPERATIONS = (
+    ('POST', re.compile(r'^/checkout/preferences/?$'), 'create_preference'),
+    ('GET', re.compile(r'^/v1/payments/[^/]+$'), 'get_payment'),
+)
+_ID_SEGMENT = re.compile(r'/[0-9][^/]*')
+
+
+def operation_name(method: str, path: str) -> str:
+    for operation_method, pattern, name in OPERATIONS:
+        if method == operation_method and pattern.match(path):
+            return name
+    return '%s %s' % (method.lower(), _ID_SEGMENT.sub('/:id', path))
+
+
+class CircuitBreaker:
+    """Circuito por taxa de erro em uma janela de tempo.
+
+    Fechado: as chamadas passam e os resultados entram na janela. Aberto: falha
+    na hora por open_seconds. Depois disso, meio-aberto: uma chamada de teste
+    passa; se der certo o circuito fecha, senão abre de novo.
+    """
+
+    def __init__(self, failure_rate: float = MERCADO_PAGO_BREAKER_FAILURE_RATE,
+                 min_calls: int = MERCADO_PAGO_BREAKER_MIN_CALLS,
+                 window_seconds: float = MERCADO_PAGO_BREAKER_WINDOW_SECONDS,
+                 open_seconds: float = MERCADO_PAGO_BREAKER_OPEN_SECONDS):
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._calls = deque()  # (instante, falhou)
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing or time.monotonic() >= self._opened_at + self.open_seconds:
+                return 'half_open'
+            return 'open'
+
+    def before_call(self):
+        """Levanta CircuitOpenError se a chamada não deve ir para a API"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(max(remaining, 1.0))
+            self._probing = True
+
+    def record(self, failed: bool):
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                # Só o resultado da chamada de teste decide; respostas atrasadas são ignoradas
+                if self._probing:
+                    self._probing = False
+                    if failed:
+                        self._open(now)
+                    else:
+                        self._close()
+                return
+
+            self._calls.append((now, failed))
+            self._failures += failed
+            while self._calls and self._calls[0][0] < now - self.window_seconds:
+                self._failures -= self._calls.popleft()[1]
+            if len(self._calls) >= self.min_calls and self._failures / len(self._calls) >= self.failure_rate:
+                self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self._calls.clear()
+        self._failures = 0
+        MERCADO_PAGO_CIRCUIT_OPEN.set(1)
+
+    def _close(self):
+        self._opened_at = None
+        MERCADO_PAGO_CIRCUIT_OPEN.set(0)
+
+
+class PooledHttpClient(HttpClient):
+    """HttpClient do SDK sobre uma sessão compartilhada (keep-alive), com timeouts e circuit breaker"""
+
+    def __init__(self, api_url: Optional[str] = None,
+                 connect_timeout: float = MERCADO_PAGO_CONNECT_TIMEOUT,
+                 read_timeout: float = MERCADO_PAGO_READ_TIMEOUT,
+                 max_retries: int = MERCADO_PAGO_MAX_RETRIES,
+                 backoff_factor: float = MERCADO_PAGO_RETRY_BACKOFF,
+                 pool_size: int = MERCADO_PAGO_POOL_SIZE,
+                 breaker: Optional[CircuitBreaker] = None):
+        # URL base alternativa, ex.: servidor falso em src/mercado_pago_fake.py
+        self.api_url = api_url.rstrip('/') if api_url else None
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+
+        retry = Retry(
+            total=max_retries,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            backoff_factor=backoff_factor,
+            # Devolve a última resposta 5xx em vez de RetryError
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    def request(self, method, url, maxretries=None, retry_on=None, backoff_factor=None, **kwargs):
+        """Mesmo contrato do HttpClient do SDK; timeouts e retries do SDK são substituídos pelos deste cliente"""
+        operation = operation_name(method, urlsplit(url).path)
+        if self.api_url and url.startswith(DEFAULT_API_URL):
+            url = self.api_url + url[len(DEFAULT_API_URL):]
+        kwargs['timeout'] = self.timeout
+
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            MERCADO_PAGO_REQUESTS.inc(operation, 'circuit_open')
+            raise
+
+        start = time.perf_counter()
+        try:
+            api_result = self._session.request(method, url, **kwargs)
+        except requests.Timeout:
+            self._finish(operation, start, 'timeout')
+            raise
+        except requests.RequestException:
+            self._finish(operation, start, 'connection_error')
+            raise
+
+        status = api_result.status_code
+        if status in RETRY_STATUS or status >= 500:
+            outcome = 'server_error'
+        elif status >= 400:
+            # 4xx (ex.: pagamento não encontrado) é resposta válida da API, não falha do provedor
+            outcome = 'client_error'
+        else:
+            outcome = 'ok'
+        retries = getattr(api_result.raw, 'retries', None)
+        if retries is not None and retries.history:
+            MERCADO_PAGO_RETRIES.inc(operation, amount=len(retries.history))
+        self._finish(operation, start, outcome)
+
+        response = {'status': status, 'response': None}
+        if status != 204 and api_result.content:
+            try:
+                response['response'] = api_result.json()
+            except ValueError as exc:
+                raise MPServerError(status, {'message': 'Invalid JSON in response body',
+                                             'error': 'invalid_response'}) from exc
+        return response
+
+    def _finish(self, operation: str, start: float, outcome: str):
+        MERCADO_PAGO_DURATION.observe(time.perf_counter() - start, operation)
+        MERCADO_PAGO_REQUESTS.inc(operation, outcome)
+        self.breaker.record(outcome in ('server_error', 'timeout', 'connection_error'))
+
+    def close(self):
+        self._session.close()
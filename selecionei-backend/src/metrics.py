@@ -0,0 +1,257 @@
+"""Métricas em memória (contadores, gauges e histogramas) no formato texto do Prometheus.
+
+Cada processo mantém o próprio registro: com vários workers do servidor WSGI,
+cada um expõe as suas métricas em /api/metrics.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Limites (em segundos) dos buckets dos histogramas de etapas e de requisições
+STAGE_BUCKETS = tuple(float(b) for b in os.getenv(
+    'METRICS_STAGE_BUCKETS', '0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30'
+).split(','))
+
+# Parâmetro (query string ou formulário) que pede os tempos por etapa na resposta
+TIMINGS_PARAM = 'timings'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        # Contagem por bucket sem acumular; a soma acumulada é feita só na exportação
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="%s"' % ('+Inf' if bound == float('inf') else _format_value(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(round(total, 9))}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'selecionei_stage_duration_seconds', 'Tempo de cada etapa (extração, analisador, banco, Mercado Pago)', ('stage',))
+HTTP_REQUESTS = registry.counter(
+    'selecionei_http_requests_total', 'Requisições atendidas', ('endpoint', 'method', 'status'))
+HTTP_ERRORS = registry.counter(
+    'selecionei_http_request_errors_total', 'Requisições que terminaram com erro 5xx', ('endpoint', 'method'))
+HTTP_IN_FLIGHT = registry.gauge(
+    'selecionei_http_requests_in_flight', 'Requisições em andamento', ('endpoint',))
+HTTP_DURATION = registry.histogram(
+    'selecionei_http_request_duration_seconds', 'Tempo de resposta por endpoint', ('endpoint', 'method'))
+MERCADO_PAGO_DURATION = registry.histogram(
+    'selecionei_mercadopago_request_duration_seconds', 'Tempo das chamadas à API do Mercado Pago, com retries',
+    ('operation',))
+MERCADO_PAGO_REQUESTS = registry.counter(
+    'selecionei_mercadopago_requests_total',
+    'Chamadas à API do Mercado Pago por resultado (ok, client_error, server_error, timeout, connection_error, '
+    'circuit_open)', ('operation', 'outcome'))
+MERCADO_PAGO_RETRIES = registry.counter(
+    'selecionei_mercadopago_retries_total', 'Novas tentativas feitas pelo pool de conexões', ('operation',))
+MERCADO_PAGO_CIRCUIT_OPEN = registry.gauge(
+    'selecionei_mercadopago_circuit_open', 'Circuit breaker do Mercado Pago aberto (1) ou fechado (0)')
+PAYMENT_WEBHOOKS = registry.counter(
+    'selecionei_payment_webhooks_total', 'Notificações do Mercado Pago (queued, duplicate, ignored)', ('result',))
+
+
+def record_stage(name: str, seconds: float):
+    """Registra a duração de uma etapa no histograma e nos tempos da requisição atual"""
+    STAGE_SECONDS.observe(seconds, name)
+    if has_request_context():
+        timings = g.setdefault('stage_timings', {})
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record_stages(timings: Optional[Dict[str, float]]):
+    """Registra os tempos medidos em outro processo (ex.: pool de extração)"""
+    for name, seconds in (timings or {}).items():
+        record_stage(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Mede o bloco como a etapa name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def measure(timings: Dict[str, float], name: str):
+    """Só acumula a duração em timings; usado nos processos do pool, que não exportam métricas"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def timings_requested() -> bool:
+    value = request.args.get(TIMINGS_PARAM) or request.form.get(TIMINGS_PARAM) or ''
+    return value.lower() in ('1', 'true')
+
+
+def request_timings() -> Dict[str, float]:
+    """Tempos por etapa da requisição atual, em milissegundos"""
+    return {name: round(seconds * 1000, 3) for name, seconds in sorted(g.get('stage_timings', {}).items())}
+
+
+def instrument_engine(engine):
+    """Mede cada comando SQL da engine como a etapa db.query"""
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        record_stage('db.query', time.perf_counter() - conn.info['query_start'].pop())
+
+    def on_error(exception_context):
+        starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, 'before_cursor_execute', before)
+    event.listen(engine, 'after_cursor_execute', after)
+    event.listen(engine, 'handle_error', on_error)
+
+
+def init_app(app):
+    """Contadores, gauge de requisições em andamento e histograma de tempo por endpoint"""
+
+    def endpoint_label():
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_endpoint = endpoint_label()
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(g.metrics_endpoint)
+
+    @app.after_request
+    def record_request_metrics(response):
+        endpoint = g.get('metrics_endpoint')
+        if endpoint is not None:
+            HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+            if response.status_code >= 500:
+                HTTP_ERRORS.inc(endpoint, request.method)
+            HTTP_DURATION.observe(time.perf_counter() - g.metrics_start, endpoint, request.method)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            HTTP_IN_FLIGHT.dec(endpoint)
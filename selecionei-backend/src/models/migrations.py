@@ -0,0 +1,127 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import exists, func, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+
+def upgrade_schema(db):
+    """Aplica em bancos existentes o que o create_all não faz: colunas e índices novos"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.unique and index.name not in existing_indexes:
+                    check_duplicates(conn, table, index)
+                index.create(bind=conn, checkfirst=True)
+
+
+class DuplicateValuesError(RuntimeError):
+    """Valores repetidos impedem a criação de um índice único; nada foi alterado"""
+
+    def __init__(self, table, column, conflicts):
+        self.table = table
+        self.column = column
+        self.conflicts = conflicts  # valor -> ids das linhas que o repetem
+        lines = '\n'.join(f'  {value!r}: ids {", ".join(map(str, ids))}' for value, ids in conflicts.items())
+        super().__init__(
+            f'{len(conflicts)} valor(es) repetido(s) em {table}.{column}; resolva antes de rodar a migração:\n{lines}'
+        )
+
+
+def check_duplicates(conn, table, index):
+    """Antes de criar um índice único de uma coluna: aborta com o relatório dos valores repetidos.
+
+    Ex.: o webhook antigo podia gravar o mesmo payment_id em mais de um pagamento pendente.
+    Qual linha fica com o valor é decisão de quem conhece os pagamentos, não da migração.
+    """
+    if len(index.columns) != 1 or 'id' not in table.c:
+        return
+    column = next(iter(index.columns))
+    repeated = select(column).where(column.isnot(None)).group_by(column).having(func.count() > 1)
+    conflicts = {}
+    for value, row_id in conn.execute(
+            select(column, table.c.id).where(column.in_(repeated)).order_by(column, table.c.id)):
+        conflicts.setdefault(value, []).append(row_id)
+    if conflicts:
+        raise DuplicateValuesError(table.name, column.name, conflicts)
+
+
+def backfill_analysis_skills(db, skill_categories, batch_size=1000):
+    """Preenche analysis_skill para análises gravadas antes da tabela existir.
+
+    Essas análises só guardam as skills em JSON (sem categoria); a categoria vem
+    de skill_categories ({skill: categoria}). Skills fora da base ficam em 'outros'.
+    """
+    analysis = db.metadata.tables['analysis']
+    analysis_skill = db.metadata.tables['analysis_skill']
+    pending = select(
+        analysis.c.id, analysis.c.user_id, analysis.c.job_profile_id, analysis.c.skills_found
+    ).where(
+        analysis.c.skills_found.isnot(None),
+        analysis.c.skills_found != '[]',
+        ~exists().where(analysis_skill.c.analysis_id == analysis.c.id)
+    ).order_by(analysis.c.id).limit(batch_size)
+
+    last_id = 0
+    while True:
+        with db.engine.begin() as conn:
+            rows = conn.execute(pending.where(analysis.c.id > last_id)).all()
+            if not rows:
+                return
+            conn.execute(insert(analysis_skill), [
+                {
+                    'analysis_id': row.id,
+                    'user_id': row.user_id,
+                    'job_profile_id': row.job_profile_id,
+                    'skill': skill,
+                    'category': skill_categories.get(skill, 'outros')
+                }
+                for row in rows
+                for skill in dict.fromkeys(json.loads(row.skills_found))
+            ])
+        last_id = rows[-1].id
+
+
+def seed_platform_stats(db):
+    """Cria a linha de platform_stats a partir das tabelas, uma única vez"""
+    platform_stats = db.metadata.tables['platform_stats']
+    user = db.metadata.tables['user']
+    with db.engine.begin() as conn:
+        if conn.execute(select(platform_stats.c.id)).first():
+            return
+        total_users, total_analyses = conn.execute(
+            select(func.count(user.c.id), func.coalesce(func.sum(user.c.analyses_used), 0))
+        ).one()
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(platform_stats).values(
+                    id=1, total_users=total_users, total_analyses=total_analyses, updated_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Outro processo criou a linha ao mesmo tempo
+            pass
+
+
+def init_db(db, skill_categories):
+    """Cria e atualiza o schema e preenche os dados derivados; idempotente.
+
+    Roda no deploy (python -m src.manage init-db), não na importação do app.
+    """
+    db.create_all()
+    upgrade_schema(db)
+    seed_platform_stats(db)
+    backfill_analysis_skills(db, skill_categories)
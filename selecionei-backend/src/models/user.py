@@ -2,7 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+from src.db_config import RoutingSession
+
+# Consultas de endpoints read_only podem ir para a engine de leitura (DATABASE_READ_URL)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -73,11 +76,19 @@ class User(db.Model):
         }
 
 class Analysis(db.Model):
+    # Histórico do usuário em ordem de criação (paginação por cursor)
+    __table_args__ = (
+        db.Index('ix_analysis_user_created', 'user_id', 'created_at'),
+        # Um job da fila grava no máximo uma análise, mesmo se for retomado por outro worker
+        db.Index('ux_analysis_queue_job_id', 'queue_job_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(10), nullable=False)
-    job_description = db.Column(db.Text)
+    job_description = db.Column(db.Text)  # Apenas para vagas avulsas, sem JobProfile
+    job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profile.id'), index=True)
     
     # Resultados da análise
     score = db.Column(db.Integer)
@@ -93,33 +104,155 @@ class Analysis(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processing_time = db.Column(db.Float)  # Tempo em segundos
+    queue_job_id = db.Column(db.String(32))  # Job da fila assíncrona que gravou a análise
+    
+    # Skills normalizadas, gravadas junto com a análise
+    skills = db.relationship('AnalysisSkill', backref='analysis', cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Analysis {self.id} - {self.filename}>'
 
+    # Campo do to_dict -> coluna do modelo, para carregar só o que foi pedido em fields=
+    FIELD_COLUMNS = {
+        'id': 'id', 'user_id': 'user_id', 'filename': 'filename', 'file_type': 'file_type',
+        'job_description': 'job_description', 'job_id': 'job_profile_id', 'score': 'score',
+        'experience_years': 'experience_years', 'seniority_level': 'seniority_level',
+        'education_level': 'education_level', 'job_compatibility': 'job_compatibility',
+        'skills_found': 'skills_found', 'strengths': 'strengths',
+        'interview_questions': 'interview_questions', 'summary': 'summary',
+        'recommendation': 'recommendation', 'created_at': 'created_at',
+        'processing_time': 'processing_time'
+    }
+
+    def to_dict(self, fields=None):
+        import json
+        serializers = {
+            'id': lambda: self.id,
+            'user_id': lambda: self.user_id,
+            'filename': lambda: self.filename,
+            'file_type': lambda: self.file_type,
+            'job_description': lambda: self.job_description,
+            'job_id': lambda: self.job_profile_id,
+            'score': lambda: self.score,
+            'experience_years': lambda: self.experience_years,
+            'seniority_level': lambda: self.seniority_level,
+            'education_level': lambda: self.education_level,
+            'job_compatibility': lambda: self.job_compatibility,
+            'skills_found': lambda: json.loads(self.skills_found) if self.skills_found else [],
+            'strengths': lambda: json.loads(self.strengths) if self.strengths else [],
+            'interview_questions': lambda: json.loads(self.interview_questions) if self.interview_questions else [],
+            'summary': lambda: self.summary,
+            'recommendation': lambda: self.recommendation,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'processing_time': lambda: self.processing_time
+        }
+        # Só serializa (e só lê do banco) os campos pedidos
+        return {field: serializers[field]() for field in (fields or serializers)}
+
+class AnalysisSkill(db.Model):
+    """Uma linha por skill encontrada em uma análise, para filtros e agregações em SQL"""
+    __tablename__ = 'analysis_skill'
+    __table_args__ = (
+        db.Index('ix_analysis_skill_user_skill', 'user_id', 'skill'),
+        db.Index('ix_analysis_skill_job_skill', 'job_profile_id', 'skill'),
+        db.Index('ix_analysis_skill_skill_analysis', 'skill', 'analysis_id'),
+    )
+
+    # Chave composta: sem id próprio, as linhas são inseridas em lote (executemany)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('analysis.id', ondelete='CASCADE'), primary_key=True)
+    skill = db.Column(db.String(50), primary_key=True)
+    category = db.Column(db.String(50), nullable=False)
+    
+    # Copiados da análise para que as agregações por usuário e por vaga não precisem de join
+    user_id = db.Column(db.Integer, nullable=False)
+    job_profile_id = db.Column(db.Integer)
+
+    def __repr__(self):
+        return f'<AnalysisSkill {self.analysis_id} - {self.skill}>'
+
+    @classmethod
+    def from_categories(cls, user_id, job_profile_id, skills_by_category):
+        """Cria as linhas a partir de 'skills_por_categoria' do resultado da IA"""
+        return [
+            cls(skill=skill, category=category, user_id=user_id, job_profile_id=job_profile_id)
+            for category, skills in skills_by_category.items()
+            for skill in skills
+        ]
+
+class JobProfile(db.Model):
+    """Vaga com a descrição pré-processada uma única vez para pontuar vários currículos"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    title = db.Column(db.String(200))
+    description = db.Column(db.Text, nullable=False)
+    description_hash = db.Column(db.String(64), nullable=False, index=True)
+    
+    # Resultado de compile_job_description
+    required_skills = db.Column(db.Text)  # JSON string
+    keywords = db.Column(db.Text)  # JSON string
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<JobProfile {self.id} - {self.title}>'
+
+    def compiled(self):
+        """Retorna a vaga no formato aceito por calculate_job_compatibility"""
+        import json
+        return {
+            'skills': json.loads(self.required_skills) if self.required_skills else {},
+            'keywords': json.loads(self.keywords) if self.keywords else []
+        }
+
     def to_dict(self):
         import json
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'filename': self.filename,
-            'file_type': self.file_type,
-            'job_description': self.job_description,
-            'score': self.score,
-            'experience_years': self.experience_years,
-            'seniority_level': self.seniority_level,
-            'education_level': self.education_level,
-            'job_compatibility': self.job_compatibility,
-            'skills_found': json.loads(self.skills_found) if self.skills_found else [],
-            'strengths': json.loads(self.strengths) if self.strengths else [],
-            'interview_questions': json.loads(self.interview_questions) if self.interview_questions else [],
-            'summary': self.summary,
-            'recommendation': self.recommendation,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'processing_time': self.processing_time
+            'title': self.title,
+            'description': self.description,
+            'description_hash': self.description_hash,
+            'required_skills': json.loads(self.required_skills) if self.required_skills else {},
+            'keywords': json.loads(self.keywords) if self.keywords else [],
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class PlatformStats(db.Model):
+    """Contadores da plataforma (linha única), atualizados junto com cada cadastro e análise"""
+    __tablename__ = 'platform_stats'
+    id = db.Column(db.Integer, primary_key=True)
+    total_users = db.Column(db.Integer, nullable=False, default=0)
+    total_analyses = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    ROW_ID = 1
+
+    @classmethod
+    def increment(cls, users=0, analyses=0):
+        """Soma aos contadores na transação corrente; o commit fica com quem chamou"""
+        cls.query.filter_by(id=cls.ROW_ID).update({
+            cls.total_users: cls.total_users + users,
+            cls.total_analyses: cls.total_analyses + analyses,
+            cls.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+    def to_dict(self):
+        return {
+            'total_users': self.total_users,
+            'total_analyses': self.total_analyses,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class Payment(db.Model):
+    __table_args__ = (
+        db.Index('ix_payment_user_created', 'user_id', 'created_at'),
+        db.Index('ix_payment_user_status_created', 'user_id', 'status', 'created_at'),
+        # Conciliação do webhook: uma busca no índice, qualquer que seja o histórico
+        db.Index('ux_payment_external_reference', 'external_reference', unique=True),
+        db.Index('ux_payment_preference_id', 'preference_id', unique=True),
+        db.Index('ux_payment_payment_id', 'payment_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     plan = db.Column(db.String(20), nullable=False)
@@ -129,7 +262,9 @@ class Payment(db.Model):
     # Dados do Mercado Pago
     payment_id = db.Column(db.String(100))  # ID do pagamento no MP
     preference_id = db.Column(db.String(100))  # ID da preferência no MP
+    external_reference = db.Column(db.String(100))  # Referência enviada na preferência e devolvida pelo MP
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected, cancelled
+    status_updated_at = db.Column(db.DateTime)  # date_last_updated do MP no estado gravado (UTC)
     
     # Metadados
     payment_method = db.Column(db.String(50))
@@ -144,18 +279,28 @@ class Payment(db.Model):
     def __repr__(self):
         return f'<Payment {self.id} - {self.plan} - {self.status}>'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'plan': self.plan,
-            'amount': self.amount,
-            'currency': self.currency,
-            'payment_id': self.payment_id,
-            'preference_id': self.preference_id,
-            'status': self.status,
-            'payment_method': self.payment_method,
-            'payment_type': self.payment_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+    FIELD_COLUMNS = {
+        'id': 'id', 'user_id': 'user_id', 'plan': 'plan', 'amount': 'amount', 'currency': 'currency',
+        'payment_id': 'payment_id', 'preference_id': 'preference_id',
+        'external_reference': 'external_reference', 'status': 'status',
+        'payment_method': 'payment_method', 'payment_type': 'payment_type',
+        'created_at': 'created_at', 'updated_at': 'updated_at'
+    }
+
+    def to_dict(self, fields=None):
+        serializers = {
+            'id': lambda: self.id,
+            'user_id': lambda: self.user_id,
+            'plan': lambda: self.plan,
+            'amount': lambda: self.amount,
+            'currency': lambda: self.currency,
+            'payment_id': lambda: self.payment_id,
+            'preference_id': lambda: self.preference_id,
+            'external_reference': lambda: self.external_reference,
+            'status': lambda: self.status,
+            'payment_method': lambda: self.payment_method,
+            'payment_type': lambda: self.payment_type,
+            'created_at': lambda: self.created_at.isoformat() if self.created_at else None,
+            'updated_at': lambda: self.updated_at.isoformat() if self.updated_at else None
         }
+        return {field: serializers[field]() for field in (fields or serializers)}
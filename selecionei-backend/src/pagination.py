@@ -0,0 +1,78 @@
+import base64
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import load_only
+
+# Tamanho de página dos históricos (análises, pagamentos)
+HISTORY_DEFAULT_LIMIT = int(os.getenv('HISTORY_DEFAULT_LIMIT', 50))
+HISTORY_MAX_LIMIT = int(os.getenv('HISTORY_MAX_LIMIT', 200))
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginação mal formado"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Cursor opaco com a posição (created_at, id) do último item da página"""
+    raw = f'{created_at.isoformat()}|{row_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor('Cursor inválido') from e
+
+
+def parse_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    """Lê o parâmetro fields= ('id,filename,score'); None devolve todos os campos"""
+    if not fields:
+        return None
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in model.FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}")
+    return selected
+
+
+def page_total(query, cursor: Optional[str] = None, include_total: Optional[str] = None) -> Optional[int]:
+    """Total de linhas do histórico, só na primeira página (sem cursor) ou com include_total=1.
+
+    O COUNT percorre todas as linhas do filtro; as páginas seguintes custam só o LIMIT
+    e o cliente já tem o total da primeira.
+    """
+    if cursor and str(include_total).lower() not in ('1', 'true'):
+        return None
+    return query.with_entities(func.count()).scalar()
+
+
+def keyset_page(query, model, cursor: Optional[str] = None, limit: int = HISTORY_DEFAULT_LIMIT,
+                fields: Optional[List[str]] = None) -> Tuple[List, Optional[str]]:
+    """Página do histórico em ordem decrescente de (created_at, id), a partir do cursor.
+
+    Em vez de OFFSET, filtra pelas linhas anteriores ao cursor, o que usa o índice
+    (user_id, created_at) e custa o mesmo em qualquer página. Com fields, só as
+    colunas pedidas saem do banco.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < (created_at, row_id))
+    if fields is not None:
+        # created_at e id sempre vêm, pois formam o cursor da próxima página
+        columns = {model.FIELD_COLUMNS[field] for field in fields} | {'id', 'created_at'}
+        query = query.options(load_only(*(getattr(model, column) for column in columns)))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
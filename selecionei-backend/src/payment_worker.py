@@ -0,0 +1,43 @@
+import os
+import sys
+# DON'T CHANGE THIS !!!
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app, apply_payment_update, mp_integration, webhook_queue
+from src.polling_worker import run_workers
+
+# Buscas simultâneas na API do Mercado Pago (uma por thread)
+PAYMENT_WEBHOOK_WORKERS = int(os.getenv('PAYMENT_WEBHOOK_WORKERS', 2))
+PAYMENT_WEBHOOK_POLL_INTERVAL = float(os.getenv('PAYMENT_WEBHOOK_POLL_INTERVAL', 1))
+
+
+def process_next_webhook() -> bool:
+    """Busca e aplica um pagamento notificado. Retorna False se não houver notificação pronta"""
+    event = webhook_queue.claim()
+    if event is None:
+        return False
+
+    payment_id = event['payment_id']
+    try:
+        payment_info = mp_integration.get_payment_info(payment_id)
+        if not payment_info['success']:
+            # Erro de rede, 5xx ou pagamento ainda não visível na API: tenta de novo mais tarde
+            webhook_queue.retry(payment_id, event['attempts'], payment_info['error'])
+            return True
+
+        with app.app_context():
+            result = apply_payment_update(payment_info)
+        webhook_queue.complete(payment_id, result)
+    except Exception as e:
+        app.logger.exception('Erro ao processar o pagamento %s', payment_id)
+        webhook_queue.retry(payment_id, event['attempts'], f'Erro ao processar pagamento: {str(e)}')
+    return True
+
+
+def main():
+    run_workers(process_next_webhook, 'Workers das notificações de pagamento do Mercado Pago',
+                PAYMENT_WEBHOOK_WORKERS, PAYMENT_WEBHOOK_POLL_INTERVAL, 'payment-worker')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Loop comum dos workers que consomem uma fila em SQLite (job_worker, payment_worker).
+
+Cada worker só fornece process_next(), que trata um item da fila e retorna
+False quando não havia nada pronto; threads, intervalo de polling e parada
+por SIGTERM/SIGINT ficam aqui.
+"""
+import argparse
+import signal
+import threading
+from typing import Callable
+
+
+def work(process_next: Callable[[], bool], stop_event: threading.Event, poll_interval: float):
+    """Consome a fila até receber o sinal de parada"""
+    while not stop_event.is_set():
+        if not process_next():
+            stop_event.wait(poll_interval)
+
+
+def run_workers(process_next: Callable[[], bool], description: str, workers: int, poll_interval: float,
+                thread_name: str):
+    """main() de um worker: lê --workers/--poll-interval e roda as threads até SIGTERM/SIGINT"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, default=workers)
+    parser.add_argument('--poll-interval', type=float, default=poll_interval)
+    args = parser.parse_args()
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    threads = [
+        threading.Thread(target=work, args=(process_next, stop_event, args.poll_interval),
+                         name=f'{thread_name}-{i}')
+        for i in range(max(1, args.workers))
+    ]
+    for thread in threads:
+        thread.start()
+    print(f'{description}: {len(threads)} worker(s) em execução')
+    for thread in threads:
+        thread.join()
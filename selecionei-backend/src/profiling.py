@@ -0,0 +1,232 @@
+"""Perfil (cProfile) de requisições sob demanda, gravado em um diretório com rotação.
+
+Desligado por padrão. Com PROFILING_ENABLED, uma requisição é perfilada quando
+traz o cabeçalho X-Profile com o PROFILING_TOKEN ou quando é sorteada pela
+PROFILING_SAMPLE_RATE (só caminhos em PROFILING_PATHS). Desligado, o
+middleware nem é instalado e o pool de extração não recebe o pedido de perfil.
+Os perfis gravados só podem ser listados/baixados com o PROFILING_TOKEN.
+"""
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true')
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_PATHS = tuple(p for p in os.getenv('PROFILING_PATHS', '/api/analyze').split(',') if p)
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(os.path.dirname(__file__), 'database', 'profiles'))
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 50))
+PROFILING_TOP_FUNCTIONS = int(os.getenv('PROFILING_TOP_FUNCTIONS', 25))
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+_current = ContextVar('request_profile', default=None)
+
+
+def current() -> Optional['RequestProfile']:
+    """Perfil da requisição em andamento, se ela estiver sendo perfilada"""
+    return _current.get()
+
+
+def token_matches(value: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and hmac.compare_digest(value or '', PROFILING_TOKEN)
+
+
+class _RawStats:
+    """Adapta o dicionário de estatísticas de outro processo para pstats.Stats.add"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.status = None
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self._worker_stats = []
+        self._lock = threading.Lock()
+
+    def add_worker_stats(self, stats: Dict):
+        """Estatísticas do processo do pool que analisou um arquivo desta requisição"""
+        with self._lock:
+            self._worker_stats.append(stats)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for worker_stats in self._worker_stats:
+            stats.add(_RawStats(worker_stats))
+        return stats
+
+
+def top_functions(stats: pstats.Stats, limit: int = PROFILING_TOP_FUNCTIONS) -> List[Dict]:
+    """Funções com mais tempo próprio"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [{
+        'function': pstats.func_std_string(func),
+        'calls': nc,
+        'self_ms': round(tt * 1000, 3),
+        'cumulative_ms': round(ct * 1000, 3)
+    } for func, (cc, nc, tt, ct, callers) in rows]
+
+
+class ProfileStore:
+    """Diretório com os perfis mais recentes (.prof do pstats + resumo .json)"""
+
+    def __init__(self, path: str = PROFILING_DIR, max_files: int = PROFILING_MAX_FILES):
+        self.path = path
+        self.max_files = max(1, max_files)
+        self._lock = threading.Lock()
+
+    def _file(self, profile_id: str, extension: str) -> str:
+        return os.path.join(self.path, f'{os.path.basename(profile_id)}.{extension}')
+
+    def save(self, profile: RequestProfile) -> Dict:
+        stats = profile.stats()
+        summary = {
+            'id': profile.id,
+            'method': profile.method,
+            'path': profile.path,
+            'status': profile.status,
+            'reason': profile.reason,
+            'duration_ms': round(profile.elapsed * 1000, 3),
+            'worker_profiles': len(profile._worker_stats),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'top_functions': top_functions(stats)
+        }
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            stats.dump_stats(self._file(profile.id, 'prof'))
+            with open(self._file(profile.id, 'json'), 'w') as f:
+                json.dump(summary, f, ensure_ascii=False)
+            self._rotate()
+        return summary
+
+    def _recent_ids(self) -> List[str]:
+        """Ids dos perfis gravados, do mais novo para o mais antigo"""
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.name[:-len('.json')]))
+                except FileNotFoundError:
+                    pass
+        return [profile_id for _, profile_id in sorted(entries, reverse=True)]
+
+    def _rotate(self):
+        for profile_id in self._recent_ids()[self.max_files:]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(self._file(profile_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def list(self, limit: int = 20) -> List[Dict]:
+        if not os.path.isdir(self.path):
+            return []
+        summaries = (self.get(profile_id) for profile_id in self._recent_ids()[:limit])
+        return [summary for summary in summaries if summary]
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        try:
+            with open(self._file(profile_id, 'json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def pstats_path(self, profile_id: str) -> Optional[str]:
+        path = self._file(profile_id, 'prof')
+        return path if os.path.exists(path) else None
+
+
+class ProfilingMiddleware:
+    """Middleware WSGI que perfila as requisições escolhidas, inclusive respostas em streaming"""
+
+    def __init__(self, wsgi_app, store: ProfileStore, sample_rate: float = PROFILING_SAMPLE_RATE,
+                 paths=PROFILING_PATHS):
+        self.wsgi_app = wsgi_app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.paths = paths
+
+    def _reason(self, environ) -> Optional[str]:
+        if token_matches(environ.get('HTTP_X_PROFILE')):
+            return 'header'
+        if (self.sample_rate and environ.get('PATH_INFO', '').startswith(self.paths)
+                and random.random() < self.sample_rate):
+            return 'sample'
+        return None
+
+    def __call__(self, environ, start_response):
+        reason = self._reason(environ)
+        if reason is None:
+            return self.wsgi_app(environ, start_response)
+
+        profile = RequestProfile(environ.get('REQUEST_METHOD'), environ.get('PATH_INFO'), reason)
+
+        def profiled_start_response(status, headers, exc_info=None):
+            profile.status = int(status.split(' ', 1)[0])
+            headers.append((PROFILE_ID_HEADER, profile.id))
+            return start_response(status, headers, exc_info)
+
+        try:
+            result = self._run(profile, self.wsgi_app, environ, profiled_start_response)
+        except Exception:
+            self._finish(profile)
+            raise
+        return self._iterate(profile, result)
+
+    @staticmethod
+    def _run(profile: RequestProfile, fn, *args):
+        token = _current.set(profile)
+        profile.profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            profile.profiler.disable()
+            _current.reset(token)
+
+    def _iterate(self, profile: RequestProfile, result):
+        # O corpo de respostas em streaming (ex.: NDJSON do lote) é gerado aqui, fora do app
+        try:
+            iterator = iter(result)
+            while True:
+                try:
+                    chunk = self._run(profile, next, iterator)
+                except StopIteration:
+                    break
+                yield chunk
+        finally:
+            if hasattr(result, 'close'):
+                self._run(profile, result.close)
+            self._finish(profile)
+
+    def _finish(self, profile: RequestProfile):
+        profile.elapsed = time.perf_counter() - profile.started
+        self.store.save(profile)
+
+
+def init_app(app, store: Optional[ProfileStore] = None) -> Optional[ProfileStore]:
+    """Instala o middleware se PROFILING_ENABLED; retorna o ProfileStore ou None"""
+    if not PROFILING_ENABLED:
+        return None
+    store = store or ProfileStore()
+    app.wsgi_app = ProfilingMiddleware(app.wsgi_app, store)
+    return store
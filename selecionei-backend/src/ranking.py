@@ -0,0 +1,171 @@
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, exists, func, literal
+
+from src.ai_analyzer import get_analyzer
+from src.models.user import db, Analysis, AnalysisSkill
+
+# Limites de paginação do ranking
+RANK_DEFAULT_LIMIT = 20
+RANK_MAX_LIMIT = 100
+
+
+class SkillVocabulary:
+    """Nomes das skills da base, como gravados em analysis_skill"""
+
+    def __init__(self, skills_database: Dict[str, List[str]]):
+        self.skills = set()
+        for skills in skills_database.values():
+            self.skills.update(skill.title() for skill in skills)
+        # Palavras-chave da vaga são comparadas com o nome da skill em minúsculas
+        self.by_lower = {skill.lower(): skill for skill in self.skills}
+
+    def __len__(self):
+        return len(self.skills)
+
+
+_shared_vocabulary = None
+_shared_vocabulary_lock = threading.Lock()
+
+
+def get_skill_vocabulary() -> SkillVocabulary:
+    """Vocabulário da base de skills do analisador, montado no primeiro ranking"""
+    global _shared_vocabulary
+    if _shared_vocabulary is None:
+        with _shared_vocabulary_lock:
+            if _shared_vocabulary is None:
+                _shared_vocabulary = SkillVocabulary(get_analyzer().skills_database)
+    return _shared_vocabulary
+
+
+class JobWeights:
+    """Compatibilidade com uma vaga compilada calculada só a partir das skills do candidato.
+
+    Vale igualmente para análises salvas e arquivos enviados agora: skills da vaga que o
+    candidato tem / skills da vaga * 100, mais palavras-chave da vaga que são nomes de
+    skills do candidato / palavras-chave * 20, entre 60 e 95. Vaga sem skills dá 85.
+    """
+
+    def __init__(self, job: Dict, vocabulary: SkillVocabulary):
+        self.job_skills = {skill for skills in job['skills'].values() for skill in skills
+                           if skill in vocabulary.skills}
+        self.keyword_count = len(job['keywords'])
+        self.keyword_hits = Counter(vocabulary.by_lower[keyword] for keyword in job['keywords']
+                                    if keyword in vocabulary.by_lower)
+
+    @property
+    def skills(self) -> set:
+        """Skills que alteram a compatibilidade; candidatos sem nenhuma ficam no piso"""
+        return self.job_skills | set(self.keyword_hits) if self.job_skills else set()
+
+    def overlap(self, skills: Iterable[str]) -> Tuple[int, int]:
+        """(skills da vaga em comum, palavras-chave atendidas) para uma lista de skills"""
+        skills = set(skills)
+        return len(skills & self.job_skills), sum(self.keyword_hits[skill] for skill in skills)
+
+    def compatibility(self, common: int, keyword_hits: int) -> int:
+        if not self.job_skills:
+            return 85
+        value = common / len(self.job_skills) * 100
+        if self.keyword_count:
+            value += keyword_hits / self.keyword_count * 20
+        return min(95, max(60, math.floor(value)))
+
+
+def _top(entries: List[Tuple], limit: int, offset: int) -> List[Tuple]:
+    """Página do top-k por compatibilidade, pontuação geral e ordem de chegada.
+
+    Cada entrada é (compatibilidade, pontuação, -ordem, chave)."""
+    return heapq.nlargest(offset + limit, entries)[offset:]
+
+
+def rank_candidates(candidates: List[Dict], job: Dict, vocabulary: SkillVocabulary,
+                    limit: int = RANK_DEFAULT_LIMIT, offset: int = 0) -> Tuple[int, List[Dict]]:
+    """Ranqueia candidatos já em memória (ex.: arquivos analisados agora).
+
+    Cada candidato traz 'skills' (todas, não só o top 10) e 'score' (pontuação geral,
+    que não depende da vaga); a compatibilidade é sempre recalculada por JobWeights.
+    """
+    weights = JobWeights(job, vocabulary)
+    entries = [
+        (weights.compatibility(*weights.overlap(candidate['skills'])), candidate['score'] or 0, -index, index)
+        for index, candidate in enumerate(candidates)
+    ]
+
+    ranked = []
+    for position, (compatibility, score, _, index) in enumerate(_top(entries, limit, offset), start=offset + 1):
+        candidate = candidates[index]
+        ranked.append({
+            'rank': position,
+            'analysis_id': candidate.get('analysis_id'),
+            'filename': candidate.get('filename'),
+            'compatibility': compatibility,
+            'score': score,
+            'skills': candidate['skills']
+        })
+    return len(candidates), ranked
+
+
+def rank_stored_candidates(user_id: int, job: Dict, vocabulary: SkillVocabulary,
+                           limit: int = RANK_DEFAULT_LIMIT, offset: int = 0,
+                           job_profile_id: Optional[int] = None) -> Tuple[int, List[Dict]]:
+    """Ranqueia as análises salvas do usuário (ou só as feitas contra job_profile_id).
+
+    Só as análises com alguma skill relevante para a vaga saem do banco, já com as
+    contagens agregadas em SQL pelos índices (user_id, skill) / (job_profile_id, skill)
+    de analysis_skill; as demais têm a compatibilidade do piso e entram apenas as
+    offset + limit de maior pontuação geral.
+    """
+    analysis_scope = [Analysis.user_id == user_id]
+    skill_scope = [AnalysisSkill.user_id == user_id]
+    if job_profile_id is not None:
+        analysis_scope.append(Analysis.job_profile_id == job_profile_id)
+        skill_scope.append(AnalysisSkill.job_profile_id == job_profile_id)
+
+    total = db.session.query(func.count(Analysis.id)).filter(*analysis_scope).scalar()
+    if not total:
+        return 0, []
+
+    weights = JobWeights(job, vocabulary)
+    skills = weights.skills
+    entries = []
+    if skills:
+        common = func.sum(case((AnalysisSkill.skill.in_(weights.job_skills), 1), else_=0))
+        keyword_hits = (func.sum(case(dict(weights.keyword_hits), value=AnalysisSkill.skill, else_=0))
+                        if weights.keyword_hits else literal(0))
+        matched = db.session.query(Analysis.id, Analysis.score, common, keyword_hits).join(
+            AnalysisSkill, AnalysisSkill.analysis_id == Analysis.id
+        ).filter(*skill_scope, AnalysisSkill.skill.in_(skills)).group_by(Analysis.id)
+        entries = [(weights.compatibility(common, hits), score or 0, -analysis_id, analysis_id)
+                   for analysis_id, score, common, hits in matched]
+
+    rest = db.session.query(Analysis.id, Analysis.score).filter(*analysis_scope)
+    if entries:
+        rest = rest.filter(~exists().where(AnalysisSkill.analysis_id == Analysis.id,
+                                           AnalysisSkill.skill.in_(skills)))
+    floor = weights.compatibility(0, 0)
+    entries.extend((floor, score or 0, -analysis_id, analysis_id) for analysis_id, score in
+                   rest.order_by(Analysis.score.desc(), Analysis.id).limit(offset + limit))
+
+    top = _top(entries, limit, offset)
+    page_ids = [analysis_id for *_, analysis_id in top]
+    filenames = dict(db.session.query(Analysis.id, Analysis.filename).filter(Analysis.id.in_(page_ids)))
+    # Skills completas de analysis_skill (skills_found guarda só o top 10), só da página
+    skills_by_analysis = {}
+    for analysis_id, skill in db.session.query(AnalysisSkill.analysis_id, AnalysisSkill.skill).filter(
+            AnalysisSkill.analysis_id.in_(page_ids)):
+        skills_by_analysis.setdefault(analysis_id, []).append(skill)
+
+    ranked = [{
+        'rank': position,
+        'analysis_id': analysis_id,
+        'filename': filenames.get(analysis_id),
+        'compatibility': compatibility,
+        'score': score,
+        'skills': skills_by_analysis.get(analysis_id, [])
+    } for position, (compatibility, score, _, analysis_id) in enumerate(top, start=offset + 1)]
+    return total, ranked
@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from src.models.user import User, db
+from src.models.user import PlatformStats, User, db
 
 user_bp = Blueprint('user', __name__)
 
@@ -14,6 +14,7 @@ def create_user():
     data = request.json
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
+    PlatformStats.increment(users=1)
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
@@ -35,11 +36,17 @@ def update_user(user_id):
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
+    PlatformStats.increment(users=-1)
     db.session.commit()
     return '', 204
 
 
-from src.ai_analyzer import IntelligentResumeAnalyzer
+import os
+
+from src.ai_analyzer import get_analyzer
+
+# Máximo de textos por chamada de /avaliar_curriculo/batch
+AVALIAR_BATCH_MAX_TEXTS = int(os.getenv('AVALIAR_BATCH_MAX_TEXTS', 1000))
 
 @user_bp.route('/avaliar_curriculo', methods=['POST'])
 def avaliar_curriculo():
@@ -48,7 +55,27 @@ def avaliar_curriculo():
     if not texto.strip():
         return jsonify({"erro": "Texto do currículo está vazio."}), 400
 
-    ia = IntelligentResumeAnalyzer()
+    ia = get_analyzer()
     resultado = ia.avaliar_curriculo_com_parecer(texto)
 
     return jsonify(resultado)
+
+@user_bp.route('/avaliar_curriculo/batch', methods=['POST'])
+def avaliar_curriculo_batch():
+    """Avalia vários textos de currículo de uma vez: {"textos": ["...", "..."]}"""
+    data = request.get_json(silent=True)
+    textos = data.get("textos") if isinstance(data, dict) else data
+    if not isinstance(textos, list) or not textos:
+        return jsonify({"erro": "Envie uma lista de textos em 'textos'."}), 400
+    if len(textos) > AVALIAR_BATCH_MAX_TEXTS:
+        return jsonify({"erro": f"Máximo de {AVALIAR_BATCH_MAX_TEXTS} textos por chamada."}), 400
+
+    ia = get_analyzer()
+    resultados = []
+    for indice, texto in enumerate(textos):
+        if not isinstance(texto, str) or not texto.strip():
+            resultados.append({"indice": indice, "erro": "Texto do currículo está vazio."})
+            continue
+        resultados.append({"indice": indice, **ia.avaliar_curriculo_com_parecer(texto)})
+
+    return jsonify({"resultados": resultados, "total": len(resultados)})
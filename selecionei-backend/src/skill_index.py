@@ -0,0 +1,250 @@
+import os
+import re
+import threading
+import time
+from array import array
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from src.models.user import db, Analysis, AnalysisSkill
+
+# Análises gravadas por outros processos (workers da fila, outros workers web) entram
+# no índice em até SKILL_INDEX_REFRESH_SECONDS; as deste processo, na próxima busca
+SKILL_INDEX_REFRESH_SECONDS = float(os.getenv('SKILL_INDEX_REFRESH_SECONDS', 5))
+
+TERM_PATTERN = re.compile(r'\(|\)|,|"[^"]+"|[^\s(),"]+')
+OPERATORS = {'and', 'or', 'not'}
+
+
+class QuerySyntaxError(ValueError):
+    """Consulta booleana de skills mal formada"""
+
+
+class SkillIndexSnapshot:
+    """Conteúdo do índice em um momento; a reconstrução troca o snapshot inteiro,
+    então bitmaps e posições de uma mesma consulta são sempre consistentes"""
+
+    def __init__(self):
+        # Posições densas, atribuídas em ordem de id: os bitmaps têm o tamanho do
+        # número de análises indexadas, não do maior id
+        self.positions = {}  # analysis_id -> posição
+        self.ids = array('q')  # posição -> analysis_id
+        self.users = {}  # user_id -> array de posições (crescente)
+        self.skills = {}  # skill -> bitmap de posições
+        # Maior id indexado e seu created_at (detecta remoção/reuso do rowid)
+        self.watermark = 0
+        self.watermark_created_at = None
+
+    def scope(self, user_ids: Iterable[int]) -> int:
+        """Bitmap com todas as análises dos usuários informados"""
+        bits = bytearray((len(self.ids) + 7) // 8)
+        for user_id in user_ids:
+            for position in self.users.get(user_id, ()):
+                bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, 'little')
+
+    def search(self, query: str, scope: int) -> int:
+        """Avalia a consulta booleana e devolve o bitmap de análises dentro do escopo"""
+        tokens = _tokenize(query)
+        if not tokens:
+            raise QuerySyntaxError('Consulta de skills vazia')
+        parser = _Parser(tokens, self.skills, scope)
+        result = parser.parse()
+        return result & scope
+
+    def page(self, bitmap: int, limit: int, offset: int = 0) -> List[int]:
+        """Ids de análise do bitmap, do mais recente (maior id) para o mais antigo"""
+        ids = self.ids
+        result = []
+        position = 0
+        while bitmap and len(result) < limit:
+            top = bitmap.bit_length() - 1
+            if position >= offset:
+                result.append(ids[top])
+            position += 1
+            bitmap ^= 1 << top
+        return result
+
+
+class SkillIndex:
+    """Índice invertido skill -> análises, em bitmaps (inteiros Python, bit i = i-ésima análise).
+
+    Operações AND/OR/NOT viram &, | e ~ sobre os bitmaps, feitas em C. Cada
+    usuário guarda só as posições das próprias análises (array compacto); o
+    escopo vira bitmap na hora da consulta. O índice é lido do banco de forma
+    incremental e reconstruído quando análises são removidas; as consultas usam
+    o snapshot devolvido por refresh().
+
+    Para não consultar o banco a cada busca, o snapshot vale até uma escrita de
+    análises neste processo (commit com análises novas ou removidas incrementa a
+    versão) ou até refresh_seconds, o atraso aceito para escritas de outros processos.
+    """
+
+    def __init__(self, refresh_seconds: float = SKILL_INDEX_REFRESH_SECONDS):
+        self._state = SkillIndexSnapshot()
+        self._lock = threading.Lock()
+        self.refresh_seconds = refresh_seconds
+        self._version = 0
+        self._checked_version = -1
+        self._checked_at = 0.0
+        event.listen(Session, 'after_flush', self._track_writes)
+        event.listen(Session, 'after_commit', self._after_commit)
+
+    def invalidate(self):
+        """Faz a próxima busca conferir o banco"""
+        with self._lock:
+            self._version += 1
+
+    def _track_writes(self, session, flush_context):
+        # Inclui as análises removidas em cascata (ex.: exclusão do usuário)
+        if any(isinstance(obj, Analysis) for obj in (*session.new, *session.deleted)):
+            session.info[self] = True
+
+    def _after_commit(self, session):
+        if session.info.pop(self, False):
+            self.invalidate()
+
+    @staticmethod
+    def _add(state: SkillIndexSnapshot, analysis_id: int, user_id: int, skills: Iterable[str]):
+        if analysis_id in state.positions:
+            return
+        position = len(state.ids)
+        state.positions[analysis_id] = position
+        state.ids.append(analysis_id)
+        state.users.setdefault(user_id, array('q')).append(position)
+        bit = 1 << position
+        for skill in skills:
+            key = skill.lower()
+            state.skills[key] = state.skills.get(key, 0) | bit
+
+    @staticmethod
+    def _load(state: SkillIndexSnapshot, after_id: int, up_to_id: int):
+        """Indexa as análises com after_id < id <= up_to_id"""
+        # Junção externa: análises sem nenhuma skill também entram no escopo do usuário (NOT)
+        rows = db.session.query(Analysis.id, Analysis.user_id, AnalysisSkill.skill).outerjoin(
+            AnalysisSkill, AnalysisSkill.analysis_id == Analysis.id
+        ).filter(Analysis.id > after_id, Analysis.id <= up_to_id).order_by(Analysis.id).all()
+        skills_by_analysis = {}
+        for analysis_id, user_id, skill in rows:
+            skills = skills_by_analysis.setdefault((analysis_id, user_id), [])
+            if skill:
+                skills.append(skill)
+        for (analysis_id, user_id), skills in skills_by_analysis.items():
+            SkillIndex._add(state, analysis_id, user_id, skills)
+
+    def refresh(self) -> SkillIndexSnapshot:
+        """Indexa análises gravadas desde a última leitura (inclusive por outros processos).
+
+        Se análises indexadas foram removidas (total menor que o indexado, ou a
+        linha do maior id sumiu ou foi reaproveitada), o índice é reconstruído.
+        Com o snapshot em dia (ver invalidate), não consulta o banco.
+        """
+        if (self._checked_version == self._version
+                and time.monotonic() - self._checked_at < self.refresh_seconds):
+            return self._state
+
+        with self._lock:
+            version = self._version
+            state = self._state
+            total, max_id = db.session.query(func.count(Analysis.id), func.max(Analysis.id)).one()
+            max_id = max_id or 0
+
+            stale = max_id < state.watermark
+            if not stale and state.watermark:
+                created_at = db.session.query(Analysis.created_at).filter(Analysis.id == state.watermark).scalar()
+                stale = created_at != state.watermark_created_at
+
+            if stale:
+                state = SkillIndexSnapshot()
+            if max_id > state.watermark:
+                self._load(state, state.watermark, max_id)
+            if len(state.positions) != total and not stale:
+                # Remoção abaixo do maior id: relê tudo
+                state = SkillIndexSnapshot()
+                self._load(state, 0, max_id)
+
+            if max_id != state.watermark:
+                state.watermark = max_id
+                state.watermark_created_at = db.session.query(Analysis.created_at).filter(
+                    Analysis.id == max_id).scalar() if max_id else None
+            self._state = state
+            self._checked_version = version
+            self._checked_at = time.monotonic()
+        return state
+
+
+def _tokenize(query: str) -> List[str]:
+    """Separa operadores e parênteses; palavras seguidas formam uma skill ('react native')"""
+    tokens = []
+    phrase = []
+    for raw in TERM_PATTERN.findall(query):
+        if raw in ('(', ')', ',') or raw.lower() in OPERATORS:
+            if phrase:
+                tokens.append(' '.join(phrase))
+                phrase = []
+            tokens.append(raw.lower() if raw.lower() in OPERATORS else raw)
+        elif raw.startswith('"'):
+            if phrase:
+                tokens.append(' '.join(phrase))
+                phrase = []
+            tokens.append(raw.strip('"'))
+        else:
+            phrase.append(raw)
+    if phrase:
+        tokens.append(' '.join(phrase))
+    return tokens
+
+
+class _Parser:
+    """expr := termo (OR termo)* ; termo := fator ((AND | ,) fator)* ; fator := NOT fator | (expr) | skill"""
+
+    def __init__(self, tokens: List[str], skills: dict, universe: int):
+        self.tokens = tokens
+        self.position = 0
+        self.skills = skills
+        self.universe = universe
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise QuerySyntaxError('Consulta de skills incompleta')
+        self.position += 1
+        return token
+
+    def parse(self) -> int:
+        result = self._expr()
+        if self._peek() is not None:
+            raise QuerySyntaxError(f"Token inesperado na consulta: '{self._peek()}'")
+        return result
+
+    def _expr(self) -> int:
+        result = self._term()
+        while self._peek() == 'or':
+            self._next()
+            result |= self._term()
+        return result
+
+    def _term(self) -> int:
+        result = self._factor()
+        while self._peek() in ('and', ','):
+            self._next()
+            result &= self._factor()
+        return result
+
+    def _factor(self) -> int:
+        token = self._next()
+        if token == 'not':
+            return self.universe & ~self._factor()
+        if token == '(':
+            result = self._expr()
+            if self._next() != ')':
+                raise QuerySyntaxError('Parêntese não fechado na consulta')
+            return result
+        if token in (')', ',', 'and', 'or'):
+            raise QuerySyntaxError(f"Token inesperado na consulta: '{token}'")
+        return self.skills.get(token.lower(), 0)
@@ -0,0 +1,45 @@
+import os
+import threading
+import time
+from typing import Any, Callable
+
+# Por quanto tempo /api/stats serve o mesmo valor sem consultar o banco
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', 30))
+
+
+class SingleFlightCache:
+    """Valor em memória com validade, recarregado por uma única thread por vez.
+
+    Quando o valor expira, a primeira thread recarrega e as demais continuam
+    recebendo o valor anterior em vez de irem todas ao banco. Só na primeira
+    carga (sem valor algum) as outras threads esperam pelo resultado.
+    """
+
+    def __init__(self, loader: Callable[[], Any], ttl: float = STATS_CACHE_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self.loads = 0
+
+    def get(self) -> Any:
+        if time.monotonic() < self._expires_at:
+            return self._value
+
+        if not self._refresh_lock.acquire(blocking=self._value is None):
+            # Outra thread já está recarregando: serve o valor anterior
+            return self._value
+        try:
+            # Pode ter sido recarregado enquanto esta thread esperava o lock
+            if time.monotonic() < self._expires_at:
+                return self._value
+            self._value = self.loader()
+            self._expires_at = time.monotonic() + self.ttl
+            self.loads += 1
+            return self._value
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        self._expires_at = 0.0
@@ -0,0 +1,150 @@
+"""Uploads em disco acima de um limite e entregues aos extratores como mmap, sem cópias.
+
+Arquivos pequenos ficam em memória (bytes). Acima de UPLOAD_SPOOL_THRESHOLD o
+werkzeug grava o upload em um arquivo temporário nomeado; o conteúdo vira um
+MappedUpload (mmap somente leitura) que o hash do cache, a fila e os extratores
+leem direto do page cache. Enviado ao pool de extração, um MappedUpload viaja
+só como o caminho do arquivo: o processo do pool mapeia o mesmo arquivo.
+"""
+import functools
+import mmap
+import os
+import tempfile
+from io import BytesIO
+from typing import Union
+
+from flask import Request, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+MB = 1024 * 1024
+
+# Acima disso (tamanho total da requisição), os arquivos enviados vão para disco
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 1 * MB))
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR') or None
+
+# Limite padrão de qualquer requisição (MAX_CONTENT_LENGTH) e limites dos endpoints de upload
+MAX_REQUEST_MB = float(os.getenv('MAX_REQUEST_MB', 16))
+ANALYZE_MAX_UPLOAD_MB = float(os.getenv('ANALYZE_MAX_UPLOAD_MB', 10))
+BATCH_MAX_UPLOAD_MB = float(os.getenv('BATCH_MAX_UPLOAD_MB', 200))
+RANK_MAX_UPLOAD_MB = float(os.getenv('RANK_MAX_UPLOAD_MB', 200))
+
+
+class MappedUpload(mmap.mmap):
+    """Arquivo em disco mapeado em memória; no pickle, vira só o caminho.
+
+    A instância dona (owner) remove o arquivo quando deixa de ser usada; as
+    cópias abertas pelo caminho em outros processos só leem.
+    """
+
+    def __new__(cls, path: str, fileno: int, owner: bool = False):
+        upload = super().__new__(cls, fileno, 0, access=mmap.ACCESS_READ)
+        upload.path = path
+        upload.owner = owner
+        return upload
+
+    def __reduce__(self):
+        return open_mapped, (self.path,)
+
+    def __del__(self):
+        if self.owner:
+            _unlink(self.path)
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def open_mapped(path: str, owner: bool = False) -> Union[MappedUpload, bytes]:
+    with open(path, 'rb') as f:
+        # mmap não aceita arquivo vazio
+        if os.fstat(f.fileno()).st_size == 0:
+            if owner:
+                _unlink(path)
+            return b''
+        return MappedUpload(path, f.fileno(), owner)
+
+
+def as_stream(content):
+    """Objeto de arquivo sobre o conteúdo, sem copiá-lo (mmap já é um arquivo)"""
+    if isinstance(content, mmap.mmap):
+        content.seek(0)
+        return content
+    return BytesIO(content)
+
+
+def upload_content(file) -> Union[MappedUpload, bytes]:
+    """Conteúdo de um FileStorage: mmap do arquivo em disco ou os bytes em memória.
+
+    O arquivo em disco passa a pertencer ao MappedUpload: continua existindo depois
+    do fim da requisição enquanto o conteúdo estiver em uso (ex.: lote em streaming).
+    """
+    stream = file.stream
+    path = getattr(stream, 'name', None)
+    if isinstance(path, str) and path in getattr(request, 'spooled_files', ()):
+        stream.flush()
+        request.spooled_files.discard(path)
+        return open_mapped(path, owner=True)
+    return file.read()
+
+
+class SpooledRequest(Request):
+    """Request que grava uploads grandes em um arquivo temporário com nome (para o mmap e o pool)"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is None or total_content_length > UPLOAD_SPOOL_THRESHOLD:
+            spooled = tempfile.NamedTemporaryFile('wb+', prefix='upload-', dir=UPLOAD_SPOOL_DIR, delete=False)
+            self.spooled_files = getattr(self, 'spooled_files', set())
+            self.spooled_files.add(spooled.name)
+            return spooled
+        return BytesIO()
+
+    def close(self):
+        super().close()
+        # Arquivos que nenhum endpoint usou com upload_content
+        for path in getattr(self, 'spooled_files', ()):
+            _unlink(path)
+
+
+def too_large(limit: int = None):
+    limit = limit or request.max_content_length
+    return jsonify({
+        'error': 'Arquivo muito grande',
+        'max_mb': round(limit / MB, 1) if limit else None
+    }), 413
+
+
+def upload_limit(max_mb: float):
+    """Limite de tamanho do endpoint no lugar de MAX_CONTENT_LENGTH (aplicado em check_content_length)"""
+    max_bytes = int(max_mb * MB)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                # Lê o formulário aqui: sem Content-Length, o limite só é detectado durante a leitura
+                request.files
+            except RequestEntityTooLarge:
+                return too_large()
+            return view(*args, **kwargs)
+        wrapper.max_upload_bytes = max_bytes
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    app.request_class = SpooledRequest
+    app.config['MAX_CONTENT_LENGTH'] = int(MAX_REQUEST_MB * MB)
+    app.register_error_handler(RequestEntityTooLarge, lambda error: too_large())
+
+    @app.before_request
+    def check_content_length():
+        """Recusa com 413 antes de ler o corpo quando o Content-Length já passa do limite do endpoint"""
+        limit = getattr(app.view_functions.get(request.endpoint), 'max_upload_bytes', None)
+        if limit:
+            request.max_content_length = limit
+        if (request.content_length is not None and request.max_content_length is not None
+                and request.content_length > request.max_content_length):
+            return too_large()
@@ -0,0 +1,172 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from src.db_config import apply_sqlite_pragmas
+
+# Fila persistente de notificações de pagamento do Mercado Pago, uma linha por payment_id
+WEBHOOK_QUEUE_PATH = os.getenv(
+    'PAYMENT_WEBHOOKS_PATH',
+    os.path.join(os.path.dirname(__file__), 'database', 'webhooks.db')
+)
+WEBHOOK_LEASE_SECONDS = int(os.getenv('PAYMENT_WEBHOOK_LEASE_SECONDS', 120))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('PAYMENT_WEBHOOK_MAX_ATTEMPTS', 8))
+# Backoff exponencial entre tentativas: base * 2^(tentativa - 1), até o máximo
+WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv('PAYMENT_WEBHOOK_RETRY_BASE_SECONDS', 5))
+WEBHOOK_RETRY_MAX_SECONDS = float(os.getenv('PAYMENT_WEBHOOK_RETRY_MAX_SECONDS', 600))
+# Notificações repetidas logo depois de processar o pagamento viram uma única nova busca após esse intervalo
+WEBHOOK_DEDUP_SECONDS = float(os.getenv('PAYMENT_WEBHOOK_DEDUP_SECONDS', 10))
+
+
+def retry_delay(attempts: int, base: float = WEBHOOK_RETRY_BASE_SECONDS,
+                maximum: float = WEBHOOK_RETRY_MAX_SECONDS) -> float:
+    """Espera antes da próxima tentativa, com jitter para não sincronizar os reenvios"""
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class WebhookQueue:
+    """Fila de notificações de pagamento em SQLite, deduplicada por payment_id.
+
+    O Mercado Pago reenvia a mesma notificação várias vezes: enquanto o pagamento
+    está na fila, as repetições só incrementam o contador. Se chegar notificação
+    durante o processamento, o pagamento é buscado de novo ao terminar (o status
+    pode ter mudado depois da busca em andamento).
+    """
+
+    def __init__(self, path: str = WEBHOOK_QUEUE_PATH, lease_seconds: int = WEBHOOK_LEASE_SECONDS,
+                 max_attempts: int = WEBHOOK_MAX_ATTEMPTS, dedup_seconds: float = WEBHOOK_DEDUP_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.dedup_seconds = dedup_seconds
+        self._local = threading.local()
+        self._initialized = False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Uma conexão por thread, em modo autocommit (transações explícitas)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            apply_sqlite_pragmas(conn)
+            if not self._initialized:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS payment_webhook ('
+                    'payment_id TEXT PRIMARY KEY, status TEXT NOT NULL, '
+                    'notifications INTEGER NOT NULL DEFAULT 1, recheck INTEGER NOT NULL DEFAULT 0, '
+                    'attempts INTEGER NOT NULL DEFAULT 0, result TEXT, error TEXT, '
+                    'received_at REAL NOT NULL, next_attempt_at REAL NOT NULL, started_at REAL, finished_at REAL)'
+                )
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS ix_payment_webhook_status_next '
+                    'ON payment_webhook (status, next_attempt_at)'
+                )
+                self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payment_id: str) -> bool:
+        """Registra a notificação. Retorna False se ela foi absorvida por uma já pendente"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT status, finished_at FROM payment_webhook WHERE payment_id = ?', (payment_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    'INSERT INTO payment_webhook (payment_id, status, received_at, next_attempt_at) '
+                    "VALUES (?, 'queued', ?, ?)",
+                    (payment_id, now, now)
+                )
+                queued = True
+            elif row['status'] == 'queued':
+                conn.execute(
+                    'UPDATE payment_webhook SET notifications = notifications + 1 WHERE payment_id = ?',
+                    (payment_id,)
+                )
+                queued = False
+            elif row['status'] == 'running':
+                conn.execute(
+                    'UPDATE payment_webhook SET notifications = notifications + 1, recheck = 1 WHERE payment_id = ?',
+                    (payment_id,)
+                )
+                queued = False
+            else:
+                # Já processado: busca de novo (processar é idempotente), mas repetições
+                # em rajada logo após o processamento esperam o intervalo de deduplicação
+                conn.execute(
+                    "UPDATE payment_webhook SET status = 'queued', notifications = notifications + 1, "
+                    'attempts = 0, error = NULL, next_attempt_at = ? WHERE payment_id = ?',
+                    (max(now, (row['finished_at'] or now) + self.dedup_seconds), payment_id)
+                )
+                queued = True
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return queued
+
+    def claim(self) -> Optional[Dict]:
+        """Reserva a próxima notificação pronta para este worker (leases expirados são retomados)"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT payment_id, attempts FROM payment_webhook '
+                "WHERE (status = 'queued' AND next_attempt_at <= ?) OR (status = 'running' AND started_at < ?) "
+                'ORDER BY next_attempt_at LIMIT 1',
+                (now, now - self.lease_seconds)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            if row['attempts'] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE payment_webhook SET status = 'failed', error = ?, finished_at = ? WHERE payment_id = ?",
+                    ('Número máximo de tentativas excedido', now, row['payment_id'])
+                )
+                conn.execute('COMMIT')
+                return self.claim()
+            conn.execute(
+                "UPDATE payment_webhook SET status = 'running', recheck = 0, started_at = ?, "
+                'attempts = attempts + 1 WHERE payment_id = ?',
+                (now, row['payment_id'])
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return {'payment_id': row['payment_id'], 'attempts': row['attempts'] + 1}
+
+    def complete(self, payment_id: str, result: Dict):
+        """Conclui a notificação; volta para a fila se chegou outra durante o processamento"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE payment_webhook SET status = CASE WHEN recheck THEN 'queued' ELSE 'done' END, "
+            'attempts = CASE WHEN recheck THEN 0 ELSE attempts END, recheck = 0, '
+            'result = ?, error = NULL, next_attempt_at = ?, finished_at = ? WHERE payment_id = ?',
+            (json.dumps(result), now, now, payment_id)
+        )
+
+    def retry(self, payment_id: str, attempts: int, error: str):
+        """Reagenda com backoff ou marca como falha após o máximo de tentativas"""
+        now = time.time()
+        if attempts >= self.max_attempts:
+            self._connection().execute(
+                "UPDATE payment_webhook SET status = 'failed', error = ?, finished_at = ? WHERE payment_id = ?",
+                (error, now, payment_id)
+            )
+            return
+        self._connection().execute(
+            "UPDATE payment_webhook SET status = 'queued', error = ?, next_attempt_at = ? WHERE payment_id = ?",
+            (error, now + retry_delay(attempts), payment_id)
+        )
@@ -0,0 +1,53 @@
+import os
+import sys
+import tempfile
+import uuid
+
+# Bancos e filas do teste em um diretório temporário, antes de importar o app
+_data_dir = tempfile.mkdtemp(prefix='selecionei-tests-')
+os.environ.update(
+    DATABASE_URL=f'sqlite:///{_data_dir}/app.db',
+    ANALYSIS_CACHE_PATH=os.path.join(_data_dir, 'analysis_cache.db'),
+    ANALYSIS_JOBS_PATH=os.path.join(_data_dir, 'jobs.db'),
+    PAYMENT_WEBHOOKS_PATH=os.path.join(_data_dir, 'webhooks.db'),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.mercado_pago_fake import FakeMercadoPago
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    from src import main
+    main.init_database()
+    return main
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    response = client.post('/api/register', json={
+        'name': 'Recrutadora Teste',
+        'email': f'{uuid.uuid4().hex[:8]}@teste.com',
+        'password': 'senha123',
+        'company': 'Selecionei'
+    })
+    assert response.status_code == 200
+    return response.get_json()['user']
+
+
+@pytest.fixture
+def fake_mercado_pago(app_module):
+    """Mercado Pago falso, com o SDK do app apontando para ele (recriado a cada teste)"""
+    integration = app_module.mp_integration
+    api_url = integration.api_url
+    with FakeMercadoPago() as fake:
+        integration.api_url, integration._sdk = fake.url, None
+        yield fake
+        integration.api_url, integration._sdk = api_url, None
@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from src.analysis_cache import AnalysisCache
+
+
+def result(text='x', processed='2020-01-01T00:00:00'):
+    return {'resumo': text, 'skills_por_categoria': {'programming': ['Python']}, 'processado_em': processed}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(path=str(tmp_path / 'cache.db'), memory_entries=2, max_bytes=10_000)
+
+
+def disk_totals(cache):
+    conn = sqlite3.connect(cache.path)
+    try:
+        return conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+    finally:
+        conn.close()
+
+
+def test_running_totals_follow_inserts_updates_and_evictions(cache):
+    cache.put('a', result('a' * 100))
+    cache.put('b', result('b' * 200))
+    cache.put('a', result('a' * 10))  # Substitui com outro tamanho
+    stats = cache.stats()
+    assert (stats['disk_entries'], stats['disk_bytes']) == disk_totals(cache)
+
+    for index in range(60):
+        cache.put(f'k{index}', result('k' * 300))
+    stats = cache.stats()
+    assert (stats['disk_entries'], stats['disk_bytes']) == disk_totals(cache)
+    assert stats['disk_bytes'] <= cache.max_bytes
+    # As acessadas há mais tempo saem primeiro
+    assert cache.get('a') is None
+    assert cache.get('k59') is not None
+
+
+def test_put_does_not_sum_the_table(cache):
+    cache.put('a', result())
+    statements = []
+    cache._conn.set_trace_callback(statements.append)
+    cache.put('b', result())
+    assert statements and not any('SUM(' in statement.upper() for statement in statements)
+
+
+def test_totals_are_seeded_for_existing_cache(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE analysis_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                 'size INTEGER NOT NULL, accessed_at REAL NOT NULL)')
+    conn.executemany('INSERT INTO analysis_cache VALUES (?, ?, ?, 0)', [('a', '{}', 2), ('b', '{"x": 1}', 8)])
+    conn.commit()
+    conn.close()
+
+    cache = AnalysisCache(path=path)
+    stats = cache.stats()
+    assert (stats['disk_entries'], stats['disk_bytes']) == (2, 10)
+    cache.put('c', {})
+    assert cache.stats()['disk_bytes'] == 12
+
+
+@pytest.mark.parametrize('from_disk', [False, True])
+def test_get_returns_a_fresh_copy(cache, from_disk):
+    stored = result()
+    cache.put('a', stored)
+    stored['resumo'] = 'alterado depois do put'
+    if from_disk:
+        cache = AnalysisCache(path=cache.path)
+
+    first = cache.get('a')
+    first['resumo'] = 'alterado pelo chamador'
+    first['skills_por_categoria']['programming'].append('Java')
+
+    second = cache.get('a')
+    assert second['resumo'] == 'x'
+    assert second['skills_por_categoria'] == {'programming': ['Python']}
+    assert second is not first
+
+
+def test_get_refreshes_processado_em(cache):
+    cache.put('a', result(processed='2020-01-01T00:00:00'))
+    assert cache.get('a')['processado_em'] > '2020-01-01T00:00:00'
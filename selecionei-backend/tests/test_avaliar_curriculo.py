@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from src.ai_analyzer import ResumeDocument, get_analyzer
+
+WORDS = ['python', 'javascript', 'trabalhei', 'experiência', 'go', 'google', 'react native', 'sql server',
+         'next.js', 'empresa', 'projetos', 'r', 'equipe', 'aws', 'docker', 'liderança', 'vendas', 'c++']
+
+
+def reference_grade(texto):
+    """Regra original: soma de texto_lower.count(skill) de todas as skills, sem parada antecipada"""
+    analyzer = get_analyzer()
+    habilidades = sum(texto.lower().count(skill) for group in analyzer.skills_database.values() for skill in group)
+    return 4 if habilidades >= 10 else 2.5 if habilidades >= 5 else 1
+
+
+FAIXAS = {4: 'Possui várias habilidades', 2.5: 'Possui algumas habilidades', 1: 'Poucas habilidades'}
+
+
+@pytest.mark.parametrize('texto, pontos', [
+    # Substring, não palavra: 'r' em 'trabalhei', 'java' em 'javascript' e 'go' em 'google'
+    # também contam (por palavra, seria 1 habilidade)
+    ('Trabalhei com javascript no Google', 2.5),
+    ('Gerente de vendas', 1),
+    ('Atuação em loja', 1),
+    ('Python, Django, AWS, Docker, React, Redis, Kubernetes, Terraform', 4),
+])
+def test_skill_points_count_substrings(texto, pontos):
+    assert reference_grade(texto) == pontos
+    assert FAIXAS[pontos] in get_analyzer().avaliar_curriculo_com_parecer(texto)['parecer']
+
+
+def test_early_stop_matches_full_count():
+    analyzer = get_analyzer()
+    rng = random.Random(16)
+    for _ in range(500):
+        texto = ' '.join(rng.choices(WORDS, k=rng.randint(0, 40)))
+        resultado = analyzer.avaliar_curriculo_com_parecer(texto)
+        assert FAIXAS[reference_grade(texto)] in resultado['parecer']
+        # Mesma nota para texto puro ou ResumeDocument já pré-processado
+        assert analyzer.avaliar_curriculo_com_parecer(ResumeDocument(texto)) == resultado
+
+
+def test_batch_grades_each_text(client):
+    response = client.post('/api/avaliar_curriculo/batch', json={'textos': ['Trabalhei com Python', '  ', 3]})
+    assert response.status_code == 200
+    resultados = response.get_json()['resultados']
+    assert resultados[0] == {'indice': 0, **get_analyzer().avaliar_curriculo_com_parecer('Trabalhei com Python')}
+    assert [resultado.get('erro') is not None for resultado in resultados] == [False, True, True]
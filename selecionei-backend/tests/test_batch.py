@@ -0,0 +1,46 @@
+import threading
+import time
+
+from src import batch
+
+
+class SlowPool:
+    """Pool de extração falso: um processo, cada análise leva delay segundos"""
+
+    size = 1
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.analyzed = []
+        self._lock = threading.Lock()
+
+    def analyze(self, content, filename, job_description=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.analyzed.append(filename)
+        return {'pontuacao_geral': 80}
+
+
+def test_results_stream_in_completion_order(monkeypatch):
+    pool = SlowPool(delay=0.01)
+    monkeypatch.setattr(batch, 'get_extraction_pool', lambda: pool)
+    items = [(f'cv{i}.txt', b'conteudo') for i in range(5)]
+
+    results = list(batch.analyze_batch(items))
+    assert sorted(result['filename'] for result in results) == [name for name, _ in items]
+    assert all(result['success'] for result in results)
+
+
+def test_abandoned_stream_cancels_pending_files(monkeypatch):
+    pool = SlowPool()
+    monkeypatch.setattr(batch, 'get_extraction_pool', lambda: pool)
+    items = [(f'cv{i}.txt', b'conteudo') for i in range(20)]
+
+    results = batch.analyze_batch(items)
+    first = next(results)
+    results.close()
+    time.sleep(pool.delay * 4)
+
+    # Só o arquivo entregue e o que já estava no pool foram analisados
+    assert first['filename'] == 'cv0.txt'
+    assert len(pool.analyzed) <= 2
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.db_config import READ_BIND, RoutingSession, configure_database, read_only
+
+
+def make_app(tmp_path, with_replica=True):
+    """App mínimo com o banco principal e, opcionalmente, um arquivo de réplica com outro conteúdo"""
+    app = Flask(__name__)
+    db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+        body = db.Column(db.String(50))
+
+    read_url = f'sqlite:///{tmp_path}/replica.db' if with_replica else None
+    configure_database(app, db, f'sqlite:///{tmp_path}/primary.db', read_url)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Note(body='principal'))
+        db.session.commit()
+        if with_replica:
+            # A réplica é só leitura para o app: preenchida direto no arquivo
+            conn = sqlite3.connect(f'{tmp_path}/replica.db')
+            conn.execute('CREATE TABLE note (id INTEGER PRIMARY KEY, body VARCHAR(50))')
+            conn.execute("INSERT INTO note (body) VALUES ('réplica')")
+            conn.commit()
+            conn.close()
+
+    def bodies():
+        return jsonify(sorted(note.body for note in Note.query.all()))
+
+    app.add_url_rule('/notes', 'notes', bodies)
+    app.add_url_rule('/notes/read', 'notes_read', read_only(bodies))
+
+    @app.route('/notes/read-then-write', methods=['POST'])
+    @read_only
+    def read_then_write():
+        seen = [note.body for note in Note.query.all()]
+        db.session.add(Note(body='escrita'))
+        db.session.commit()
+        return jsonify(seen)
+
+    return app, db, Note
+
+
+def test_read_only_views_query_the_replica(tmp_path):
+    app, _, _ = make_app(tmp_path)
+    client = app.test_client()
+
+    assert client.get('/notes').get_json() == ['principal']
+    assert client.get('/notes/read').get_json() == ['réplica']
+
+
+def test_writes_in_read_only_views_go_to_the_primary(tmp_path):
+    app, db, Note = make_app(tmp_path)
+
+    assert app.test_client().post('/notes/read-then-write').get_json() == ['réplica']
+
+    with app.app_context():
+        assert sorted(note.body for note in Note.query.all()) == ['escrita', 'principal']
+        with db.engines[READ_BIND].connect() as conn:
+            assert conn.execute(text('SELECT body FROM note')).scalars().all() == ['réplica']
+
+
+def test_replica_connections_are_query_only(tmp_path):
+    app, db, _ = make_app(tmp_path)
+    with app.app_context():
+        with db.engines[READ_BIND].connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("INSERT INTO note (body) VALUES ('x')"))
+        with db.engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA query_only')).scalar() == 0
+
+
+def test_without_replica_read_only_views_use_the_primary(tmp_path):
+    app, db, _ = make_app(tmp_path, with_replica=False)
+    with app.app_context():
+        assert READ_BIND not in db.engines
+
+    assert app.test_client().get('/notes/read').get_json() == ['principal']
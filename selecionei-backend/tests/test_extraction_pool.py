@@ -0,0 +1,68 @@
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.extraction_pool import ExtractionPool, ExtractionPoolBusy, ExtractionTimeout
+
+CV = 'Desenvolvedor Python com Django e AWS, 5 anos de experiência.'.encode()
+# ~10 MB: a análise leva centenas de ms, bem acima do limite de tempo dos testes
+SLOW_CV = ('Python Django AWS desenvolvedor experiência 5 anos\n' * 200000).encode()
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(size=1, timeout=30, queue_timeout=30)
+    yield pool
+    pool.close()
+
+
+def worker_pid(pool):
+    [worker] = pool._workers
+    return worker.process.pid
+
+
+def test_timed_out_worker_is_replaced(pool):
+    pid = worker_pid(pool)
+
+    with pytest.raises(ExtractionTimeout):
+        pool.analyze(SLOW_CV, 'cv.txt', timeout=0.01)
+
+    assert pool.replaced == 1
+    assert worker_pid(pool) != pid
+    # O processo novo atende o próximo documento
+    assert 'Python' in pool.analyze(CV, 'cv.txt')['skills_tecnicas']
+
+
+def test_dead_worker_is_replaced_before_use(pool):
+    os.kill(worker_pid(pool), signal.SIGKILL)
+    [worker] = pool._workers
+    worker.process.join(timeout=5)
+
+    text, _ = pool.extract(CV, 'cv.txt')
+    assert text.startswith('Desenvolvedor Python')
+    assert pool.replaced == 1
+
+
+def test_pool_busy_when_no_worker_frees_up():
+    pool = ExtractionPool(size=1, queue_timeout=0.1)
+    try:
+        held = pool._idle.get()
+        with pytest.raises(ExtractionPoolBusy):
+            pool.extract(CV, 'cv.txt')
+        pool._idle.put(held)
+        assert pool.extract(CV, 'cv.txt')[0]
+    finally:
+        pool.close()
+
+
+def test_concurrent_documents_share_the_workers():
+    pool = ExtractionPool(size=2, timeout=30, queue_timeout=30)
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(lambda index: pool.analyze(CV, f'{index}.txt'), range(12)))
+        assert all('Python' in result['skills_tecnicas'] for result in results)
+        assert pool.replaced == 0 and len(pool._workers) == 2
+    finally:
+        pool.close()
@@ -0,0 +1,155 @@
+import os
+import struct
+import time
+
+import pytest
+
+from src import extractors
+from src.extractors import OLE2Error, ole2_streams, word_document_text
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+ENDOFCHAIN, FREESECT, FATSECT = 0xFFFFFFFE, 0xFFFFFFFF, 0xFFFFFFFD
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def build_compound_file(streams):
+    """Compound file v3 mínimo (setores de 512 bytes): FAT no setor 0, diretório no 1, streams a seguir.
+
+    Os streams têm pelo menos 4096 bytes, então ficam todos na FAT (sem mini stream).
+    """
+    fat = [FATSECT, ENDOFCHAIN]
+    entries = [('Root Entry', 5, ENDOFCHAIN, 0)]
+    data = b''
+    for name, content in streams.items():
+        content = content.ljust(4096, b'\0')
+        start, count = len(fat), -(-len(content) // 512)
+        fat += list(range(start + 1, start + count)) + [ENDOFCHAIN]
+        entries.append((name, 2, start, len(content)))
+        data += content.ljust(count * 512, b'\0')
+    assert len(fat) <= 128 and len(entries) <= 4
+
+    header = bytearray(512)
+    header[:8] = extractors.OLE2_MAGIC
+    struct.pack_into('<HHHHH', header, 0x18, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into('<8I', header, 0x2C, 1, 1, 0, 4096, ENDOFCHAIN, 0, ENDOFCHAIN, 0)
+    struct.pack_into('<109I', header, 0x4C, 0, *[FREESECT] * 108)
+
+    directory = bytearray(512)
+    for index, (name, kind, start, size) in enumerate(entries):
+        offset = index * 128
+        encoded = (name + '\0').encode('utf-16-le')
+        directory[offset:offset + len(encoded)] = encoded
+        # Árvore do diretório: a raiz aponta para o primeiro stream, e cada stream para o seguinte
+        right = index + 1 if 0 < index < len(entries) - 1 else FREESECT
+        struct.pack_into('<HBB3I', directory, offset + 64, len(encoded), kind, 1, FREESECT, right,
+                         1 if index == 0 else FREESECT)
+        struct.pack_into('<II', directory, offset + 116, start, size)
+    fat_sector = struct.pack('<128I', *(fat + [FREESECT] * (128 - len(fat))))
+    return bytes(header) + fat_sector + bytes(directory) + data
+
+
+def build_word_document(pieces, text_chars=None, prcs=b'', flags=0x0204):
+    """.doc com a tabela de peças pedida: pieces é uma lista de (texto, comprimido, posição no stream).
+
+    flags padrão: fComplex (salvamento rápido) e tabela em 1Table.
+    """
+    word = bytearray(8192)
+    struct.pack_into('<HH', word, 0, 0xA5EC, 0xC1)
+    struct.pack_into('<H', word, 0x0A, flags)
+    offset = 0x20
+    struct.pack_into('<H', word, offset, 14)
+    offset += 2 + 28
+    struct.pack_into('<H', word, offset, 22)
+    total = sum(len(text) for text, _, _ in pieces)
+    struct.pack_into('<I', word, offset + 2 + 12, total if text_chars is None else text_chars)
+    offset += 2 + 88
+    struct.pack_into('<H', word, offset, 93)
+    fib_rg_fc_lcb = offset + 2
+
+    cps, pcds, cp = [0], b'', 0
+    for text, compressed, position in pieces:
+        encoded = text.encode('cp1252' if compressed else 'utf-16-le')
+        word[position:position + len(encoded)] = encoded
+        fc = (position * 2) | 0x40000000 if compressed else position
+        cp += len(text)
+        cps.append(cp)
+        pcds += struct.pack('<HIH', 0, fc, 0)
+    plc = struct.pack(f'<{len(cps)}I', *cps) + pcds
+    clx = prcs + b'\x02' + struct.pack('<I', len(plc)) + plc
+    table = bytes(16) + clx
+    struct.pack_into('<II', word, fib_rg_fc_lcb + 33 * 8, 16, len(clx))
+    return build_compound_file({'WordDocument': bytes(word), '1Table': table})
+
+
+def patch_fat(content, fat_patch):
+    fat = bytearray(content[512:1024])
+    for index, value in fat_patch.items():
+        struct.pack_into('<I', fat, index * 4, value)
+    return content[:512] + bytes(fat) + content[1024:]
+
+
+def test_real_word_document():
+    content = fixture('test-ole-file.doc')
+    assert extractors.sniff_format(content) == extractors.FORMAT_OLE2
+    assert word_document_text(content) == 'Test OLE file, saved as Word 97-2003 Document.\n'
+
+    streams = ole2_streams(content, ['WordDocument', '1Table', '\x01CompObj', 'Ausente'])
+    # CompObj (114 bytes) fica no mini stream; os demais na FAT
+    assert {name: len(data) for name, data in streams.items()} == {
+        'WordDocument': 4096, '1Table': 6438, '\x01CompObj': 114
+    }
+
+
+def test_fast_saved_piece_table():
+    body = [
+        # Peças fora da ordem do stream, comprimidas (cp1252) e em UTF-16, com campo e marcas do Word
+        ('Experiência: ', True, 3000),
+        ('Python e\x13 HYPERLINK "http://x" \x14Django\x15\r', False, 2048),
+        ('Célula\x07Fim\x0bLinha\x1e2\r', True, 4000),
+    ]
+    # Depois do corpo (ccpText), o texto das notas de rodapé
+    content = build_word_document(
+        body + [('Nota de rodapé\r', True, 5000)],
+        text_chars=sum(len(text) for text, _, _ in body),
+        prcs=b'\x01\x03\x00abc' + b'\x01\x01\x00z'
+    )
+    assert word_document_text(content) == 'Experiência: Python eDjango\nCélula\nFim\nLinha-2\n'
+
+
+def test_truncated_document_falls_back_to_strings():
+    content = fixture('test-ole-file.doc')[:3000]
+    with pytest.raises(OLE2Error):
+        word_document_text(content)
+    text = ''.join(extractors._open_word_binary(content)[0])
+    assert '\xff' not in text
+
+
+def test_cyclic_fat_chain_is_rejected():
+    pieces = [('Texto do currículo\r', True, 2048)]
+    valid = build_word_document(pieces)
+    assert word_document_text(valid) == 'Texto do currículo\n'
+
+    # WordDocument ocupa os setores 2 a 17: o último aponta de volta para o primeiro
+    cyclic = patch_fat(valid, {17: 2})
+    start = time.perf_counter()
+    with pytest.raises(OLE2Error):
+        ole2_streams(cyclic, ['WordDocument'])
+    assert time.perf_counter() - start < 1
+    # O backend não falha: cai na varredura de strings
+    extractors._open_word_binary(cyclic)
+
+
+def test_encrypted_document_is_not_decoded():
+    content = build_word_document([('segredo\r', True, 2048)], flags=0x0304)
+    with pytest.raises(OLE2Error):
+        word_document_text(content)
+
+
+@pytest.mark.parametrize('content', [b'', extractors.OLE2_MAGIC, extractors.OLE2_MAGIC + bytes(600)])
+def test_invalid_headers(content):
+    with pytest.raises(OLE2Error):
+        ole2_streams(content, ['WordDocument'])
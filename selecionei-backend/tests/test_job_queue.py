@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from src import job_worker
+from src.job_queue import JobQueue
+from src.models.user import db, Analysis, User
+
+CV = 'Desenvolvedora Python com Django e AWS, 5 anos de experiência.'.encode()
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """Fila própria do teste, também usada pelo job_worker"""
+    queue = JobQueue(path=str(tmp_path / 'jobs.db'), lease_seconds=300, max_attempts=2)
+    monkeypatch.setattr(job_worker, 'job_queue', queue)
+    return queue
+
+
+def analyses_used(app_module, user_id):
+    with app_module.app.app_context():
+        return db.session.get(User, user_id).analyses_used
+
+
+def enqueue_reserved(app_module, jobs, user_id):
+    """Como o /api/analyze assíncrono: reserva a cota e grava o job"""
+    with app_module.app.app_context():
+        assert app_module.reserve_quota(user_id) == 1
+    return jobs.enqueue(CV, 'cv.txt', user_id=user_id)
+
+
+def test_concurrent_claims_lease_each_job_once(jobs):
+    job_ids = {jobs.enqueue(CV, f'{index}.txt') for index in range(40)}
+    claimed = []
+    barrier = threading.Barrier(8)
+
+    def claim_all():
+        barrier.wait()
+        while (job := jobs.claim()) is not None:
+            claimed.append(job['id'])
+
+    threads = [threading.Thread(target=claim_all) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+
+
+def test_expired_lease_is_retried_then_failed_once(jobs):
+    job_id = jobs.enqueue(CV, 'cv.txt')
+    assert jobs.claim()['attempts'] == 0
+    # Lease em vigor: ninguém mais pega o job
+    assert jobs.claim() is None
+
+    jobs.lease_seconds = -1  # Worker morreu: o lease expira
+    retry = jobs.claim()
+    assert (retry['id'], retry['status'], retry['attempts']) == (job_id, 'running', 1)
+
+    exhausted = jobs.claim()
+    assert (exhausted['id'], exhausted['status']) == (job_id, 'failed')
+    # Devolvido como 'failed' uma única vez
+    assert jobs.claim() is None
+    assert jobs.get(job_id)['status'] == 'failed'
+
+
+def test_exhausted_job_releases_quota_exactly_once(app_module, user, jobs):
+    job_id = enqueue_reserved(app_module, jobs, user['id'])
+    assert analyses_used(app_module, user['id']) == 1
+
+    jobs.lease_seconds = -1
+    jobs.claim(), jobs.claim()  # Duas tentativas sem resposta
+
+    assert job_worker.process_next_job() is True
+    assert analyses_used(app_module, user['id']) == 0
+    assert job_worker.process_next_job() is False
+    assert analyses_used(app_module, user['id']) == 0
+    assert jobs.get(job_id)['status'] == 'failed'
+
+
+def test_exhausted_job_keeps_quota_of_saved_analysis(app_module, user, jobs):
+    job_id = enqueue_reserved(app_module, jobs, user['id'])
+    # Uma das tentativas gravou a análise antes de o worker morrer
+    with app_module.app.app_context():
+        db.session.add(Analysis(user_id=user['id'], filename='cv.txt', file_type='.txt', queue_job_id=job_id))
+        db.session.commit()
+
+    jobs.lease_seconds = -1
+    jobs.claim(), jobs.claim()
+
+    assert job_worker.process_next_job() is True
+    assert analyses_used(app_module, user['id']) == 1
+
+
+def test_resumed_job_does_not_save_or_charge_twice(app_module, user, jobs):
+    job_id = enqueue_reserved(app_module, jobs, user['id'])
+
+    assert job_worker.process_next_job() is True
+    assert jobs.get(job_id)['status'] == 'done'
+    # Lease expirado depois do commit da análise: outro worker retoma o mesmo job
+    with app_module.app.app_context():
+        app_module.run_analysis(CV, 'cv.txt', '', user['id'], queue_job_id=job_id)
+        assert Analysis.query.filter_by(queue_job_id=job_id).count() == 1
+    assert analyses_used(app_module, user['id']) == 1
@@ -0,0 +1,58 @@
+import time
+
+import mercadopago
+import pytest
+
+from src.mercado_pago_http import CircuitBreaker, PooledHttpClient
+
+
+@pytest.fixture
+def breaker(app_module, fake_mercado_pago):
+    """Circuito que abre com 2 falhas em 2 chamadas; SDK do app sem retries, com leitura curta"""
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window_seconds=60, open_seconds=30)
+    integration = app_module.mp_integration
+    integration._sdk = mercadopago.SDK(integration.access_token, http_client=PooledHttpClient(
+        fake_mercado_pago.url, read_timeout=0.3, max_retries=0, breaker=breaker
+    ))
+    return breaker
+
+
+def test_open_circuit_returns_503_with_retry_after(client, user, fake_mercado_pago, breaker):
+    fake_mercado_pago.fail_next(2, status=500)
+    for _ in range(2):
+        response = client.post('/api/payment/create', json={'user_id': user['id'], 'plan': 'starter'})
+        assert response.status_code == 400
+    assert breaker.state == 'open'
+
+    # Circuito aberto: responde na hora, sem chamar a API
+    response = client.post('/api/payment/create', json={'user_id': user['id'], 'plan': 'starter'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert response.get_json()['unavailable'] is True
+    assert fake_mercado_pago.requests['POST /checkout/preferences'] == 2
+
+
+def test_read_timeouts_open_circuit(app_module, fake_mercado_pago, breaker):
+    fake_mercado_pago.add_payment('7001')
+    fake_mercado_pago.fail_next(2, status=0, delay=0.6)
+    for _ in range(2):
+        assert app_module.mp_integration.get_payment_info('7001')['success'] is False
+    assert breaker.state == 'open'
+
+    result = app_module.mp_integration.get_payment_info('7001')
+    assert result['unavailable'] is True
+    assert fake_mercado_pago.requests['GET /v1/payments'] == 2
+
+
+def test_half_open_probe_closes_circuit(app_module, fake_mercado_pago, breaker):
+    breaker.open_seconds = 0.2
+    fake_mercado_pago.add_payment('7002')
+    fake_mercado_pago.fail_next(2, status=503)
+    for _ in range(2):
+        app_module.mp_integration.get_payment_info('7002')
+    assert breaker.state == 'open'
+
+    time.sleep(0.3)
+    assert breaker.state == 'half_open'
+    assert app_module.mp_integration.get_payment_info('7002')['success'] is True
+    assert breaker.state == 'closed'
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from src.models.migrations import DuplicateValuesError, upgrade_schema
+from src.models.user import db
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    """Banco com a tabela payment de antes dos índices únicos"""
+    engine = create_engine(f'sqlite:///{tmp_path}/legacy.db')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE payment (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, plan VARCHAR(20) NOT NULL, '
+            'amount FLOAT NOT NULL, payment_id VARCHAR(100), status VARCHAR(20))'
+        ))
+    yield SimpleNamespace(engine=engine, metadata=db.metadata)
+    engine.dispose()
+
+
+def add_payments(legacy, *payment_ids):
+    with legacy.engine.begin() as conn:
+        for payment_id in payment_ids:
+            conn.execute(text("INSERT INTO payment (user_id, plan, amount, payment_id, status) "
+                              "VALUES (1, 'pro', 49.9, :payment_id, 'pending')"), {'payment_id': payment_id})
+
+
+def test_duplicates_abort_with_report_and_change_nothing(legacy):
+    add_payments(legacy, 'mp-1', 'mp-2', 'mp-1', None, None, 'mp-3', 'mp-3', 'mp-1')
+
+    with pytest.raises(DuplicateValuesError) as error:
+        upgrade_schema(legacy)
+
+    assert (error.value.table, error.value.column) == ('payment', 'payment_id')
+    assert error.value.conflicts == {'mp-1': [1, 3, 8], 'mp-3': [6, 7]}
+    assert "'mp-1': ids 1, 3, 8" in str(error.value)
+    # Nenhum valor sobrescrito
+    with legacy.engine.connect() as conn:
+        assert conn.execute(text('SELECT payment_id FROM payment ORDER BY id')).scalars().all() == [
+            'mp-1', 'mp-2', 'mp-1', None, None, 'mp-3', 'mp-3', 'mp-1'
+        ]
+
+    # Resolvidos os conflitos, a mesma migração roda até o fim
+    with legacy.engine.begin() as conn:
+        conn.execute(text("UPDATE payment SET payment_id = NULL WHERE id IN (1, 3, 6)"))
+    upgrade_schema(legacy)
+    assert 'ux_payment_payment_id' in {index['name'] for index in inspect(legacy.engine).get_indexes('payment')}
+
+
+def test_unique_indexes_created_without_duplicates(legacy):
+    add_payments(legacy, 'mp-1', 'mp-2', None, None)
+
+    upgrade_schema(legacy)
+
+    indexes = {index['name']: index['unique'] for index in inspect(legacy.engine).get_indexes('payment')}
+    assert indexes['ux_payment_payment_id'] and indexes['ux_payment_external_reference']
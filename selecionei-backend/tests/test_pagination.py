@@ -0,0 +1,43 @@
+from sqlalchemy import event
+
+from src.models.user import db, Analysis
+
+
+def count_statements():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_history_total_only_on_first_page(app_module, client, user):
+    with app_module.app.app_context():
+        db.session.add_all(Analysis(user_id=user['id'], filename=f'{index}.pdf', file_type='.pdf', score=70)
+                           for index in range(5))
+        db.session.commit()
+    url = f"/api/user/{user['id']}/analyses?limit=2&fields=id,filename"
+
+    first = client.get(url).get_json()
+    assert first['total'] == 5 and len(first['analyses']) == 2
+
+    with app_module.app.app_context():
+        statements, stop = count_statements()
+        try:
+            second = client.get(f"{url}&cursor={first['next_cursor']}").get_json()
+        finally:
+            stop()
+    assert 'total' not in second and len(second['analyses']) == 2
+    assert statements and not any('count(' in statement.lower() for statement in statements)
+
+    # Sob pedido, também nas páginas seguintes
+    third = client.get(f"{url}&cursor={second['next_cursor']}&include_total=1").get_json()
+    assert third['total'] == 5 and len(third['analyses']) == 1 and third['next_cursor'] is None
+
+    seen = [analysis['id'] for page in (first, second, third) for analysis in page['analyses']]
+    assert len(set(seen)) == 5
+
+
+def test_payment_history_total_only_on_first_page(client, user):
+    url = f"/api/user/{user['id']}/payments?limit=1"
+    assert client.get(url).get_json()['total'] == 0
+    assert 'total' not in client.get(f'{url}&cursor=MjAyNi0wMS0wMVQwMDowMDowMHwx').get_json()
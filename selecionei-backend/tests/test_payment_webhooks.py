@@ -0,0 +1,115 @@
+from src import payment_worker
+from src.models.user import Payment, User
+
+
+def create_payment(client, user_id, plan='professional'):
+    response = client.post('/api/payment/create', json={'user_id': user_id, 'plan': plan})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def notify(client, payment_id):
+    return client.post('/api/payment/webhook', json={'type': 'payment', 'data': {'id': payment_id}})
+
+
+def test_webhook_is_queued_and_applied_by_worker(app_module, client, user, fake_mercado_pago):
+    created = create_payment(client, user['id'])
+    with app_module.app.app_context():
+        reference = Payment.query.filter_by(preference_id=created['preference_id']).one().external_reference
+    fake_mercado_pago.add_payment('9001', status='approved', external_reference=reference)
+
+    # O webhook só enfileira: nenhuma chamada à API durante a requisição
+    assert notify(client, '9001').get_json() == {'status': 'queued'}
+    assert notify(client, '9001').get_json() == {'status': 'duplicate'}
+    assert fake_mercado_pago.requests['GET /v1/payments'] == 0
+
+    assert payment_worker.process_next_webhook() is True
+    assert payment_worker.process_next_webhook() is False
+    # Notificação duplicada absorvida: o pagamento foi buscado uma única vez
+    assert fake_mercado_pago.requests['GET /v1/payments'] == 1
+
+    with app_module.app.app_context():
+        payment = Payment.query.filter_by(preference_id=created['preference_id']).one()
+        assert (payment.status, payment.payment_id) == ('approved', '9001')
+        assert User.query.get(user['id']).plan == 'professional'
+
+
+def test_webhook_for_unknown_payment_is_retried(app_module, client, user, fake_mercado_pago):
+    # Pagamento ainda não visível na API: a notificação volta para a fila com backoff
+    assert notify(client, '9002').get_json() == {'status': 'queued'}
+    assert payment_worker.process_next_webhook() is True
+
+    event = app_module.webhook_queue._connection().execute(
+        'SELECT status, attempts, error FROM payment_webhook WHERE payment_id = ?', ('9002',)
+    ).fetchone()
+    assert tuple(event) == ('queued', 1, 'Pagamento não encontrado')
+
+
+def test_non_payment_notification_is_ignored(client):
+    response = client.post('/api/payment/webhook', json={'type': 'plan', 'data': {'id': '1'}})
+    assert response.get_json() == {'status': 'ignored'}
+
+
+def reference_of(app_module, created):
+    with app_module.app.app_context():
+        return Payment.query.filter_by(preference_id=created['preference_id']).one().external_reference
+
+
+def apply(app_module, payment_id, status, reference, updated=None):
+    with app_module.app.app_context():
+        return app_module.apply_payment_update({
+            'payment_id': payment_id, 'status': status, 'external_reference': reference,
+            'date_last_updated': updated
+        })
+
+
+def stored_payment(app_module, created):
+    with app_module.app.app_context():
+        payment = Payment.query.filter_by(preference_id=created['preference_id']).one()
+        return payment.status, payment.payment_id
+
+
+def test_older_pending_does_not_overwrite_approved(app_module, client, user, fake_mercado_pago):
+    created = create_payment(client, user['id'])
+    reference = reference_of(app_module, created)
+    # Dois workers buscaram o mesmo pagamento; o 'pending' buscado antes é aplicado por último
+    fake_mercado_pago.add_payment('9101', status='pending', external_reference=reference,
+                                  date_last_updated='2026-03-01T10:00:00.000-03:00')
+    stale = app_module.mp_integration.get_payment_info('9101')
+    fake_mercado_pago.add_payment('9101', status='approved', external_reference=reference,
+                                  date_last_updated='2026-03-01T10:05:00.000-03:00')
+    assert notify(client, '9101').get_json() == {'status': 'queued'}
+    assert payment_worker.process_next_webhook() is True
+
+    with app_module.app.app_context():
+        result = app_module.apply_payment_update(stale)
+    assert result['action'] == 'ignored'
+    assert stored_payment(app_module, created) == ('approved', '9101')
+
+    # Estorno posterior do mesmo pagamento continua sendo aplicado
+    assert apply(app_module, '9101', 'refunded', reference, '2026-03-02T09:00:00.000-03:00')['action'] == 'updated'
+    assert stored_payment(app_module, created) == ('refunded', '9101')
+
+
+def test_status_precedence_without_dates(app_module, client, user, fake_mercado_pago):
+    created = create_payment(client, user['id'])
+    reference = reference_of(app_module, created)
+
+    assert apply(app_module, '9201', 'approved', reference)['action'] == 'updated'
+    assert apply(app_module, '9201', 'in_process', reference)['action'] == 'ignored'
+    assert stored_payment(app_module, created) == ('approved', '9201')
+
+
+def test_other_attempt_does_not_replace_approved_payment(app_module, client, user, fake_mercado_pago):
+    created = create_payment(client, user['id'])
+    reference = reference_of(app_module, created)
+
+    # Tentativa recusada substituída por uma nova, que é aprovada
+    assert apply(app_module, '9301', 'rejected', reference, '2026-03-01T10:00:00+00:00')['action'] == 'updated'
+    assert apply(app_module, '9302', 'approved', reference, '2026-03-01T10:10:00+00:00')['action'] == 'updated'
+    # Notificações atrasadas da primeira tentativa, ou uma terceira pendente, não mexem mais no pagamento
+    assert apply(app_module, '9301', 'rejected', reference, '2026-03-01T10:01:00+00:00')['action'] == 'ignored'
+    assert apply(app_module, '9303', 'pending', reference, '2026-03-01T10:20:00+00:00')['action'] == 'ignored'
+    assert stored_payment(app_module, created) == ('approved', '9302')
+    with app_module.app.app_context():
+        assert User.query.get(user['id']).plan == 'professional'
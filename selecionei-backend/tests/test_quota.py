@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from src.models.user import db, User
+
+LIMIT = 20
+
+
+@pytest.fixture
+def limited_user(app_module, user):
+    with app_module.app.app_context():
+        db.session.get(User, user['id']).analyses_limit = LIMIT
+        db.session.commit()
+    return user
+
+
+def analyses_used(app_module, user_id):
+    with app_module.app.app_context():
+        return db.session.get(User, user_id).analyses_used
+
+
+def run_threads(count, target):
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_parallel_reservations_never_exceed_the_limit(app_module, limited_user, batch_size):
+    reserved = []
+
+    def reserve(index):
+        with app_module.app.app_context():
+            # Lote (compare-and-set) ou unitário (UPDATE condicional), até a cota acabar
+            while amount := app_module.reserve_quota(limited_user['id'], batch_size):
+                reserved.append(amount)
+
+    run_threads(12, reserve)
+
+    assert sum(reserved) == LIMIT
+    assert all(1 <= amount <= batch_size for amount in reserved)
+    assert analyses_used(app_module, limited_user['id']) == LIMIT
+
+
+def test_parallel_reserve_and_release_balance(app_module, limited_user):
+    def reserve_then_release(index):
+        with app_module.app.app_context():
+            for _ in range(10):
+                amount = app_module.reserve_quota(limited_user['id'], 2)
+                app_module.release_quota(limited_user['id'], amount)
+
+    run_threads(8, reserve_then_release)
+
+    assert analyses_used(app_module, limited_user['id']) == 0
+
+
+def test_partial_reservation_and_release_floor(app_module, limited_user):
+    with app_module.app.app_context():
+        assert app_module.reserve_quota(limited_user['id'], LIMIT - 2) == LIMIT - 2
+        # Lote maior que o restante: reserva só o que cabe
+        assert app_module.reserve_quota(limited_user['id'], 5) == 2
+        assert app_module.reserve_quota(limited_user['id']) == 0
+        # Devolver mais do que foi usado não deixa o contador negativo
+        app_module.release_quota(limited_user['id'], LIMIT + 1)
+    assert analyses_used(app_module, limited_user['id']) == LIMIT
@@ -0,0 +1,110 @@
+import pytest
+
+from src.models.user import db, Analysis, AnalysisSkill
+from src.ranking import get_skill_vocabulary, rank_candidates, rank_stored_candidates
+
+# Skills da vaga: Python, React, Django, Aws, Docker; palavras-chave: 6, das quais
+# python, django, docker e react são nomes de skills
+JOB_DESCRIPTION = 'Desenvolvedor Python com Django, AWS e Docker. Desejável React.'
+
+# filename -> (skills, pontuação geral, compatibilidade esperada)
+CANDIDATES = {
+    'todas.pdf': (['Python', 'React', 'Django', 'Aws', 'Docker'], 70, 95),
+    'quase.pdf': (['Python', 'Django', 'Aws', 'Docker', 'Java'], 80, 90),
+    'tres.pdf': (['Python', 'Django', 'Docker'], 90, 70),
+    # Piso de 60: ordenados só pela pontuação geral, com ou sem skill da vaga
+    'java.pdf': (['Java'], 95, 60),
+    'vazio.pdf': ([], 85, 60),
+    'duas.pdf': (['Python', 'Django'], 75, 60),
+}
+EXPECTED_ORDER = ['todas.pdf', 'quase.pdf', 'tres.pdf', 'java.pdf', 'vazio.pdf', 'duas.pdf']
+
+
+@pytest.fixture
+def job(client, user):
+    response = client.post('/api/jobs', json={'user_id': user['id'], 'description': JOB_DESCRIPTION})
+    return response.get_json()['job']
+
+
+@pytest.fixture
+def stored(app_module, user, job):
+    """Análises salvas do usuário, todas feitas contra a vaga; retorna filename -> id"""
+    with app_module.app.app_context():
+        analyses = {
+            filename: Analysis(user_id=user['id'], filename=filename, file_type='.pdf', score=score,
+                               job_profile_id=job['id'], job_compatibility=0,
+                               skills=[AnalysisSkill(skill=skill, category='x', user_id=user['id'],
+                                                     job_profile_id=job['id']) for skill in skills])
+            for filename, (skills, score, _) in CANDIDATES.items()
+        }
+        db.session.add_all(analyses.values())
+        db.session.commit()
+        return {filename: analysis.id for filename, analysis in analyses.items()}
+
+
+def rank(client, job, **params):
+    response = client.post(f"/api/jobs/{job['id']}/rank", json=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_stored_candidates_rank_by_compatibility_then_score(client, job, stored):
+    result = rank(client, job, limit=10)
+
+    assert result['total'] == len(CANDIDATES)
+    assert [candidate['filename'] for candidate in result['candidates']] == EXPECTED_ORDER
+    for position, candidate in enumerate(result['candidates'], start=1):
+        skills, score, compatibility = CANDIDATES[candidate['filename']]
+        assert candidate['rank'] == position
+        assert candidate['analysis_id'] == stored[candidate['filename']]
+        # A compatibilidade salva (0) é ignorada: todos são pontuados pelas skills
+        assert (candidate['compatibility'], candidate['score']) == (compatibility, score)
+        assert sorted(candidate['skills']) == sorted(skills)
+
+
+def test_stored_candidates_pages_cross_the_floor(client, job, stored):
+    result = rank(client, job, limit=2, offset=2)
+
+    assert result['total'] == len(CANDIDATES)
+    assert [(candidate['rank'], candidate['filename']) for candidate in result['candidates']] == [
+        (3, 'tres.pdf'), (4, 'java.pdf')
+    ]
+
+
+def test_only_job_limits_to_analyses_of_the_job(app_module, client, user, job, stored):
+    with app_module.app.app_context():
+        db.session.add(Analysis(user_id=user['id'], filename='avulsa.pdf', file_type='.pdf', score=60,
+                                skills=[AnalysisSkill(skill='Python', category='x', user_id=user['id'])]))
+        db.session.commit()
+
+    assert rank(client, job, limit=10)['total'] == len(CANDIDATES) + 1
+    result = rank(client, job, limit=10, only_job=True)
+    assert result['total'] == len(CANDIDATES)
+    assert [candidate['filename'] for candidate in result['candidates']] == EXPECTED_ORDER
+
+
+def test_uploaded_and_stored_candidates_are_scored_the_same_way(app_module, user, job, stored):
+    compiled = {'skills': job['required_skills'], 'keywords': job['keywords']}
+    in_memory = [{'filename': filename, 'skills': skills, 'score': score}
+                 for filename, (skills, score, _) in CANDIDATES.items()]
+
+    with app_module.app.app_context():
+        total, from_db = rank_stored_candidates(user['id'], compiled, get_skill_vocabulary(), 10, 0, job['id'])
+    _, from_memory = rank_candidates(in_memory, compiled, get_skill_vocabulary(), 10, 0)
+
+    assert total == len(CANDIDATES)
+    assert ([(c['filename'], c['compatibility'], c['score']) for c in from_db] ==
+            [(c['filename'], c['compatibility'], c['score']) for c in from_memory])
+
+
+def test_job_without_skills_ranks_by_score(app_module, user):
+    with app_module.app.app_context():
+        analyses = [Analysis(user_id=user['id'], filename=f'{score}.pdf', file_type='.pdf', score=score)
+                    for score in (70, 90, 80)]
+        db.session.add_all(analyses)
+        db.session.commit()
+        total, ranked = rank_stored_candidates(user['id'], {'skills': {}, 'keywords': ['python']},
+                                               get_skill_vocabulary(), 2, 0)
+
+    assert total == 3
+    assert [(c['filename'], c['compatibility']) for c in ranked] == [('90.pdf', 85), ('80.pdf', 85)]
@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import event
+
+from src.models.user import db, Analysis, AnalysisSkill
+from src.skill_index import QuerySyntaxError, SkillIndex, SkillIndexSnapshot
+
+# análise -> (usuário, skills)
+ANALYSES = {
+    10: (1, ['Python', 'Django', 'React']),
+    11: (1, ['Python', 'Flask']),
+    12: (1, ['React', 'React Native']),
+    13: (1, []),
+    20: (2, ['Python', 'Django']),
+}
+
+
+@pytest.fixture
+def snapshot():
+    state = SkillIndexSnapshot()
+    for analysis_id, (user_id, skills) in ANALYSES.items():
+        SkillIndex._add(state, analysis_id, user_id, skills)
+    return state
+
+
+def search(snapshot, query, user_ids=(1,)):
+    return sorted(snapshot.page(snapshot.search(query, snapshot.scope(user_ids)), limit=100))
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('python', [10, 11]),
+    ('PYTHON and django', [10]),
+    ('python, react', [10]),
+    ('python or react', [10, 11, 12]),
+    ('not python', [12, 13]),
+    ('not not python', [10, 11]),
+    # AND antes de OR; NOT antes de AND
+    ('flask or python and react', [10, 11]),
+    ('(flask or python) and react', [10]),
+    ('python and not django', [11]),
+    ('not (python or react)', [13]),
+    # Palavras seguidas formam uma skill; aspas também
+    ('react native', [12]),
+    ('"react native" or flask', [11, 12]),
+    ('kotlin', []),
+    ('not kotlin', [10, 11, 12, 13]),
+])
+def test_boolean_queries(snapshot, query, expected):
+    assert search(snapshot, query) == expected
+
+
+def test_scope_limits_results_to_users(snapshot):
+    assert search(snapshot, 'django', user_ids=(2,)) == [20]
+    assert search(snapshot, 'django', user_ids=(1, 2)) == [10, 20]
+    assert search(snapshot, 'not django', user_ids=(2,)) == []
+    assert search(snapshot, 'django', user_ids=(3,)) == []
+
+
+@pytest.mark.parametrize('query', ['', '   ', '(', 'python and', 'and python', 'python)', '(python',
+                                   'python or or react', ', python', 'not'])
+def test_malformed_queries(snapshot, query):
+    with pytest.raises(QuerySyntaxError):
+        snapshot.search(query, snapshot.scope([1]))
+
+
+def test_page_is_newest_first(snapshot):
+    matches = snapshot.search('python or react', snapshot.scope([1]))
+    assert matches.bit_count() == 3
+    assert snapshot.page(matches, limit=2) == [12, 11]
+    assert snapshot.page(matches, limit=2, offset=2) == [10]
+
+
+def count_queries():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_refresh_follows_writes_without_querying_when_fresh(app_module, user):
+    index = SkillIndex(refresh_seconds=3600)
+
+    def add_analysis(skills):
+        analysis = Analysis(user_id=user['id'], filename='cv.txt', file_type='.txt',
+                            skills=[AnalysisSkill(skill=skill, category='x', user_id=user['id'])
+                                    for skill in skills])
+        db.session.add(analysis)
+        db.session.commit()
+        return analysis.id
+
+    with app_module.app.app_context():
+        first = add_analysis(['Golang'])
+        state = index.refresh()
+        assert state.page(state.search('golang', state.scope([user['id']])), 10) == [first]
+
+        # Sem escrita nova: o snapshot é servido sem ir ao banco
+        statements, stop = count_queries()
+        try:
+            assert index.refresh() is state
+        finally:
+            stop()
+        assert statements == []
+
+        # Commit com análise nova invalida o snapshot
+        second = add_analysis(['Golang', 'Rust'])
+        state = index.refresh()
+        assert state.page(state.search('golang', state.scope([user['id']])), 10) == [second, first]
+
+        # Remoção também
+        db.session.delete(db.session.get(Analysis, second))
+        db.session.commit()
+        state = index.refresh()
+        assert state.page(state.search('golang or rust', state.scope([user['id']])), 10) == [first]